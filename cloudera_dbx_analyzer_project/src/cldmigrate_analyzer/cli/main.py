@@ -7,6 +7,8 @@ from ..runtime.paths import compute_default_output_dir, to_runtime_fs_path
 from ..utils.logging import setup_logger
 from ..config.loader import load_defaults, load_patterns, load_rubric
 from ..core.pipeline.analyze_repo import analyze_repository
+from ..core.pipeline.analysis_cache import CACHE_FILENAME
+from ..core.extraction.sql_cache import STATEMENT_CACHE_FILENAME
 
 
 def _parse_globs(s: str):
@@ -38,6 +40,74 @@ def main():
         default=None,
         help="Max file size (MB) to fully read/parse; larger files are sample-scanned",
     )
+    parser.add_argument(
+        "--sample-budget-mb",
+        type=int,
+        default=None,
+        help="Bytes (MB) scanned per file above --max-file-mb; larger files are sampled head to tail",
+    )
+    parser.add_argument(
+        "--content-cache-mb",
+        type=int,
+        default=None,
+        help="Memory budget (MB) for the shared file content cache; overflow spills to local temp disk",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for per-file analysis (1 = serial, 0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["walk", "git"],
+        default=None,
+        help="File enumeration: walk the directory tree, or read tracked files from .git/index",
+    )
+    parser.add_argument(
+        "--git-untracked",
+        action="store_true",
+        help="With --source git, also include untracked files not ignored by .gitignore",
+    )
+    parser.add_argument(
+        "--scan-threads",
+        type=int,
+        default=None,
+        help="Threads for listing directories during the scan (helps on /dbfs and NFS; default 1)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse per-file results from <output>/analysis_cache.sqlite; only changed files are re-analyzed",
+    )
+    parser.add_argument(
+        "--sql-cache-entries",
+        type=int,
+        default=None,
+        help="SQL statement shapes whose analysis is kept in memory per worker (0 = no statement cache)",
+    )
+    parser.add_argument(
+        "--persist-sql-cache",
+        action="store_true",
+        help="Keep SQL statement analyses in <output>/sql_statement_cache.sqlite across runs (local disk only)",
+    )
+    parser.add_argument(
+        "--sql-file-budget-s",
+        type=float,
+        default=None,
+        help="Seconds of SQL complexity analysis per file before the rest is analyzed coarsely (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--sql-statement-budget-s",
+        type=float,
+        default=None,
+        help="Seconds of SQL complexity analysis per statement before remaining metrics are skipped (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Analyze byte-identical files separately instead of once per content hash",
+    )
     parser.add_argument(
         "--follow-symlinks",
         action="store_true",
@@ -59,6 +129,18 @@ def main():
         default=None,
         help="Redaction mode for secrets/credentials",
     )
+    parser.add_argument(
+        "--artifact-format",
+        choices=["json", "ndjson", "ndjson.gz"],
+        default=None,
+        help="Artifact files: pretty JSON, or NDJSON streamed record by record (optionally gzip-compressed)",
+    )
+    parser.add_argument(
+        "--report-mode",
+        choices=["inline", "paged"],
+        default=None,
+        help="HTML report: every table inline, or a summary page whose large tables load page by page from report_data/",
+    )
     parser.add_argument(
         "--no-json",
         action="store_true",
@@ -89,8 +171,36 @@ def main():
     # Merge CLI overrides into defaults (we map them to analyze_repository args below)
     if args.max_file_mb is not None:
         defaults["max_file_mb"] = args.max_file_mb
+    if args.sample_budget_mb is not None:
+        defaults["sample_budget_mb"] = args.sample_budget_mb
+    if args.content_cache_mb is not None:
+        defaults["content_cache_mb"] = args.content_cache_mb
+    if args.jobs is not None:
+        defaults["jobs"] = args.jobs
+    if args.source:
+        defaults["source"] = args.source
+    if args.git_untracked:
+        defaults["git_untracked"] = True
+    if args.scan_threads is not None:
+        defaults["scan_threads"] = args.scan_threads
+    if args.incremental:
+        defaults["incremental"] = True
+    if args.sql_cache_entries is not None:
+        defaults["sql_cache_entries"] = args.sql_cache_entries
+    if args.persist_sql_cache:
+        defaults["sql_cache_persist"] = True
+    if args.sql_file_budget_s is not None:
+        defaults["sql_file_budget_s"] = args.sql_file_budget_s
+    if args.sql_statement_budget_s is not None:
+        defaults["sql_statement_budget_s"] = args.sql_statement_budget_s
+    if args.no_dedup:
+        defaults["dedup"] = False
     if args.follow_symlinks:
         defaults["follow_symlinks"] = True
+    if args.artifact_format:
+        defaults["artifact_format"] = args.artifact_format
+    if args.report_mode:
+        defaults["report_mode"] = args.report_mode
     if args.redaction_mode:
         defaults["redaction_mode"] = args.redaction_mode
 
@@ -121,9 +231,25 @@ def main():
         patterns=patterns,
         rubric=rubric,
         max_file_mb=int(defaults.get("max_file_mb") or 10),
+        sample_budget_mb=int(defaults.get("sample_budget_mb") or 64),
         include_globs=list(defaults.get("include_globs") or []),
         exclude_globs=list(defaults.get("exclude_globs") or []),
         log=logger,
+        content_cache_mb=int(defaults.get("content_cache_mb", 256)),
+        jobs=int(defaults.get("jobs", 1)),
+        scan_threads=int(defaults.get("scan_threads", 1)),
+        source=str(defaults.get("source") or "walk"),
+        git_untracked=bool(defaults.get("git_untracked", False)),
+        dedup=bool(defaults.get("dedup", True)),
+        cache_path=str(Path(output_root) / CACHE_FILENAME) if defaults.get("incremental") else None,
+        sql_cache_entries=int(defaults.get("sql_cache_entries", 4096)),
+        sql_cache_path=(
+            str(Path(output_root) / STATEMENT_CACHE_FILENAME) if defaults.get("sql_cache_persist") else None
+        ),
+        sql_file_budget_s=float(defaults.get("sql_file_budget_s", 60)),
+        sql_statement_budget_s=float(defaults.get("sql_statement_budget_s", 5)),
+        artifact_format=str(defaults.get("artifact_format") or "json"),
+        report_mode=str(defaults.get("report_mode") or "inline"),
     )
 
     out_html = run_dir / "report.html"
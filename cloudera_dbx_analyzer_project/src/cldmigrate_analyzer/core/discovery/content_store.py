@@ -0,0 +1,234 @@
+"""
+Read-once content store shared by all pipeline stages.
+
+Every stage of ``analyze_repository`` used to call ``Path.read_text`` on its own,
+which meant 8+ full passes over the repository. On FUSE mounts such as /dbfs
+that I/O dominates the run. The store reads each file from the repository at
+most once and keeps the bytes (and the decoded text, once requested) in an LRU
+cache bounded by a memory budget. Entries evicted from memory are spilled to a
+local temporary directory, so a later stage re-reads them from local disk
+instead of going back to the slow mount.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+def decode_text(data: bytes) -> str:
+    """
+    Decode bytes exactly like ``Path.read_text(encoding="utf-8", errors="replace")``,
+    including universal-newline translation of ``\\r\\n`` and ``\\r``.
+    """
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def blob_sha1(data: bytes) -> str:
+    """
+    Content hash of a file, computed like ``git hash-object`` (SHA-1 over
+    ``b"blob <size>\\0" + data``) so it can be compared with git blob ids.
+    """
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def blob_sha1_file(path: Union[str, Path], chunk_bytes: int = 4 * 1024 * 1024) -> str:
+    """``blob_sha1`` of a file on disk, read in chunks (for files kept out of the store)."""
+    h = hashlib.sha1(b"blob %d\0" % os.path.getsize(path))
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_bytes), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _Entry:
+    __slots__ = ("data", "text")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.text: Optional[str] = None
+
+    @property
+    def cost(self) -> int:
+        return len(self.data) + (len(self.text) if self.text is not None else 0)
+
+
+class ContentStore:
+    """
+    Repository file reader with an LRU memory budget and spill-to-disk eviction.
+
+    Paths may be given relative to the repository root (as stored in
+    ``files_index``) or as absolute paths under the root; ``root`` and
+    ``path()`` are always absolute.
+
+    Usage:
+        with ContentStore(repo_root, memory_budget_mb=256) as store:
+            text = store.read_text("etl/load.hql")
+    """
+
+    def __init__(
+        self,
+        repo_root: Union[str, Path],
+        memory_budget_mb: int = 256,
+        spill_dir: Optional[Union[str, Path]] = None,
+    ):
+        # Absolute, so paths built from ``root`` map back to the same key
+        # whatever the current directory
+        self._root_str = os.path.abspath(str(repo_root))
+        self.root = Path(self._root_str)
+        self.memory_budget_bytes = max(0, int(memory_budget_mb)) * 1024 * 1024
+        self._spill_parent = Path(spill_dir) if spill_dir else None
+        self._spill_dir: Optional[Path] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._cached_bytes = 0
+        self._spilled: Dict[str, Path] = {}
+        self._errors: Dict[str, OSError] = {}
+        self._read_stats: Dict[str, Tuple[int, int]] = {}
+
+        self.stats: Dict[str, int] = {
+            "source_reads": 0,
+            "source_bytes": 0,
+            "memory_hits": 0,
+            "spill_writes": 0,
+            "spill_reads": 0,
+            "read_errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def key(self, path: Union[str, Path]) -> str:
+        """Normalize a path to the repo-relative POSIX key used by files_index."""
+        p = str(path)
+        if os.path.isabs(p):
+            p = os.path.relpath(p, self._root_str)
+        return p.replace("\\", "/")
+
+    def path(self, path: Union[str, Path]) -> Path:
+        """Absolute (repo_root-joined) path for a repo-relative path."""
+        return self.root / self.key(path)
+
+    def read_bytes(self, path: Union[str, Path]) -> bytes:
+        """Return the raw bytes of a file, reading the repository at most once."""
+        return self._get(self.key(path)).data
+
+    def read_text(self, path: Union[str, Path]) -> str:
+        """Return the decoded text of a file (utf-8, errors replaced)."""
+        key = self.key(path)
+        entry = self._get(key)
+        if entry.text is None:
+            entry.text = decode_text(entry.data)
+            if key in self._cache:
+                self._cached_bytes += len(entry.text)
+                self._enforce_budget()
+        return entry.text
+
+    def read_stat(self, path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+        """
+        ``(st_size, st_mtime_ns)`` of a file as of its read from the repository
+        (taken before reading), or None when the store has not read it.
+        """
+        return self._read_stats.get(self.key(path))
+
+    def close(self) -> None:
+        """Drop cached content and remove spilled files."""
+        self._cache.clear()
+        self._cached_bytes = 0
+        self._spilled.clear()
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._spill_dir = None
+
+    def __enter__(self) -> "ContentStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _get(self, key: str) -> _Entry:
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return entry
+
+        err = self._errors.get(key)
+        if err is not None:
+            raise err
+
+        spilled = self._spilled.get(key)
+        try:
+            if spilled is not None:
+                data = spilled.read_bytes()
+                self.stats["spill_reads"] += 1
+            else:
+                with open(self.root / key, "rb") as fh:
+                    st = os.fstat(fh.fileno())
+                    data = fh.read()
+                self._read_stats[key] = (st.st_size, st.st_mtime_ns)
+                self.stats["source_reads"] += 1
+                self.stats["source_bytes"] += len(data)
+        except OSError as e:
+            self._errors[key] = e
+            self.stats["read_errors"] += 1
+            raise
+
+        entry = _Entry(data)
+        if len(data) > self.memory_budget_bytes:
+            # Too big to ever fit: keep a local copy so later stages avoid the source FS
+            self._spill(key, entry)
+            return entry
+
+        self._cache[key] = entry
+        self._cached_bytes += entry.cost
+        self._enforce_budget()
+        return entry
+
+    def _enforce_budget(self) -> None:
+        while self._cached_bytes > self.memory_budget_bytes and len(self._cache) > 1:
+            key, entry = self._cache.popitem(last=False)
+            self._cached_bytes -= entry.cost
+            self._spill(key, entry)
+
+    def _spill(self, key: str, entry: _Entry) -> None:
+        if key in self._spilled:
+            return
+        if self._spill_dir is None:
+            if self._spill_parent is not None:
+                self._spill_parent.mkdir(parents=True, exist_ok=True)
+            self._spill_dir = Path(tempfile.mkdtemp(
+                prefix="cldmigrate_spill_",
+                dir=str(self._spill_parent) if self._spill_parent else None,
+            ))
+            # Remove spilled files even if the pipeline aborts before close()
+            self._finalizer = weakref.finalize(
+                self, shutil.rmtree, str(self._spill_dir), ignore_errors=True
+            )
+        name = hashlib.sha1(key.encode("utf-8", errors="surrogateescape")).hexdigest()
+        target = self._spill_dir / name
+        try:
+            target.write_bytes(entry.data)
+        except OSError:
+            # Spilling is an optimization; fall back to re-reading the source
+            return
+        self._spilled[key] = target
+        self.stats["spill_writes"] += 1
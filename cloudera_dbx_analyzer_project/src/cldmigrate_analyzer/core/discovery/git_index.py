@@ -0,0 +1,182 @@
+"""
+Direct reader for the git index (``.git/index``), versions 2-4.
+
+Used by ``scan_repository(source="git")`` to enumerate tracked files without
+walking the tree or shelling out to git. Each entry carries the path, size,
+mtime, inode, mode and blob SHA-1 recorded at the last ``git add``/checkout;
+callers stat the working file to decide whether that SHA still describes it.
+
+Format reference: Documentation/gitformat-index.txt in git.git.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+_HEADER = struct.Struct(">4sII")
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, sha1, flags
+_ENTRY = struct.Struct(">IIIIIIIIII20sH")
+
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE_MASK = 0x3000
+_FLAG_NAME_MASK = 0x0FFF
+_EXT_SKIP_WORKTREE = 0x4000
+
+MODE_TYPE_MASK = 0o170000
+MODE_SYMLINK = 0o120000
+MODE_GITLINK = 0o160000
+MODE_DIR = 0o040000
+
+
+class GitIndexError(Exception):
+    """The index file is missing, truncated or in an unsupported format."""
+
+
+class GitIndexEntry(NamedTuple):
+    path: str            # worktree-relative, POSIX separators
+    mode: int
+    size: int            # low 32 bits of the file size, as git stores it
+    mtime_s: int
+    mtime_ns: int        # nanosecond part (0 when git was built without USE_NSEC)
+    ino: int
+    sha: str             # blob SHA-1, hex
+
+
+def find_git_dir(start: Union[str, Path]) -> Optional[Tuple[Path, Path]]:
+    """
+    Locate the enclosing git worktree of ``start``.
+
+    Returns (worktree_root, git_dir), following ``.git`` files written for
+    linked worktrees and submodules (``gitdir: <path>``); None if not in a repo.
+    """
+    cur = Path(os.path.abspath(str(start)))
+    for d in (cur, *cur.parents):
+        dot_git = d / ".git"
+        if dot_git.is_dir():
+            return d, dot_git
+        if dot_git.is_file():
+            try:
+                line = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+            except OSError:
+                return None
+            if not line.startswith("gitdir:"):
+                return None
+            target = Path(line[len("gitdir:"):].strip())
+            if not target.is_absolute():
+                target = (d / target).resolve()
+            return d, target
+    return None
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    # git's "offset" varint (varint.c), used for v4 path prefix compression
+    c = data[pos]
+    pos += 1
+    val = c & 0x7F
+    while c & 0x80:
+        val += 1
+        c = data[pos]
+        pos += 1
+        val = (val << 7) + (c & 0x7F)
+    return val, pos
+
+
+def read_git_index(index_path: Union[str, Path]) -> List[GitIndexEntry]:
+    """
+    Parse a git index file and return its stage-0 worktree entries, in index
+    (path) order.
+
+    Skipped: conflict stages 1-3, gitlinks (submodules), sparse-directory
+    entries and skip-worktree entries (not present in the worktree).
+    """
+    try:
+        data = Path(index_path).read_bytes()
+    except OSError as e:
+        raise GitIndexError(f"cannot read {index_path}: {e}") from e
+
+    if len(data) < _HEADER.size:
+        raise GitIndexError("index too short")
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC":
+        raise GitIndexError("bad index signature")
+    if version not in (2, 3, 4):
+        raise GitIndexError(f"unsupported index version {version}")
+
+    entries: List[GitIndexEntry] = []
+    pos = _HEADER.size
+    prev_name = b""
+    try:
+        for _ in range(count):
+            start = pos
+            (_cs, _cns, mtime_s, mtime_ns, _dev, ino, mode, _uid, _gid,
+             size, sha, flags) = _ENTRY.unpack_from(data, pos)
+            pos += _ENTRY.size
+
+            ext_flags = 0
+            if flags & _FLAG_EXTENDED:
+                if version < 3:
+                    raise GitIndexError("extended flag in a version 2 index")
+                (ext_flags,) = struct.unpack_from(">H", data, pos)
+                pos += 2
+
+            if version == 4:
+                strip, pos = _read_varint(data, pos)
+                end = data.index(b"\0", pos)
+                name = prev_name[: len(prev_name) - strip] + data[pos:end]
+                pos = end + 1
+            else:
+                name_len = flags & _FLAG_NAME_MASK
+                if name_len < _FLAG_NAME_MASK:
+                    end = pos + name_len
+                else:
+                    end = data.index(b"\0", pos)
+                name = data[pos:end]
+                # entries are NUL-padded to a multiple of 8 bytes
+                pos = start + ((end - start + 8) & ~7)
+            prev_name = name
+
+            if flags & _FLAG_STAGE_MASK:
+                continue
+            if ext_flags & _EXT_SKIP_WORKTREE:
+                continue
+            kind = mode & MODE_TYPE_MASK
+            if kind in (MODE_GITLINK, MODE_DIR):
+                continue
+
+            entries.append(GitIndexEntry(
+                path=name.decode("utf-8", errors="surrogateescape"),
+                mode=mode,
+                size=size,
+                mtime_s=mtime_s,
+                mtime_ns=mtime_ns,
+                ino=ino,
+                sha=sha.hex(),
+            ))
+    except (struct.error, ValueError, IndexError) as e:
+        raise GitIndexError(f"truncated or corrupt index: {e}") from e
+
+    return entries
+
+
+def is_clean(entry: GitIndexEntry, st: os.stat_result, index_mtime_ns: int) -> bool:
+    """
+    True when ``st`` (a stat of the working file) shows the file unchanged since
+    it was indexed, so ``entry.sha`` is the hash of its content.
+
+    Mirrors git's stat check, including the "racily clean" rule: a file
+    modified in the same timestamp tick as the index write is not trusted.
+    """
+    if (entry.mode & MODE_TYPE_MASK) == MODE_SYMLINK:
+        return False  # the blob is the link target, not the file content
+    if (st.st_size & 0xFFFFFFFF) != entry.size:
+        return False
+    if st.st_mtime_ns // 1_000_000_000 != entry.mtime_s:
+        return False
+    if entry.mtime_ns and st.st_mtime_ns % 1_000_000_000 != entry.mtime_ns:
+        return False
+    if st.st_mtime_ns >= index_mtime_ns:
+        return False
+    return True
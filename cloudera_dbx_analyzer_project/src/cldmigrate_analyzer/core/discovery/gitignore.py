@@ -0,0 +1,147 @@
+"""
+Minimal ``.gitignore`` evaluation for untracked files in ``--source git`` mode.
+
+Supports the gitignore(5) pattern rules: comments, ``!`` negation, trailing
+``/`` (directories only), anchoring by a leading or inner ``/``, ``*``/``?``
+not crossing ``/``, ``**`` in leading/trailing/middle position and bracket
+expressions. Sources, lowest precedence first: ``$GIT_DIR/info/exclude``,
+then ``.gitignore`` files from the worktree root down to the file's
+directory; the last matching rule wins. ``core.excludesFile`` (per-user
+configuration) is not consulted.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Tuple, Union
+
+# (regex, negated, dir_only)
+_Rule = Tuple[Pattern[str], bool, bool]
+
+
+def _translate(pat: str) -> str:
+    i, n = 0, len(pat)
+    res: List[str] = []
+    while i < n:
+        if pat.startswith("**/", i):
+            res.append("(?:.*/)?")
+            i += 3
+            continue
+        if pat.startswith("**", i) and i + 2 == n:
+            res.append(".*")
+            i += 2
+            continue
+        c = pat[i]
+        i += 1
+        if c == "*":
+            res.append("[^/]*")
+        elif c == "?":
+            res.append("[^/]")
+        elif c == "\\" and i < n:
+            res.append(re.escape(pat[i]))
+            i += 1
+        elif c == "[":
+            j = i
+            if j < n and pat[j] in "!^":
+                j += 1
+            if j < n and pat[j] == "]":
+                j += 1
+            while j < n and pat[j] != "]":
+                j += 1
+            if j >= n:
+                res.append("\\[")
+            else:
+                stuff = pat[i:j].replace("\\", "\\\\")
+                stuff = re.sub(r"([&~|])", r"\\\1", stuff)
+                i = j + 1
+                if stuff[:1] in ("!", "^"):
+                    stuff = "^" + stuff[1:]
+                elif stuff.startswith("["):
+                    stuff = "\\" + stuff
+                res.append(f"[{stuff}]")
+        else:
+            res.append(re.escape(c))
+    return "".join(res)
+
+
+def parse_gitignore(text: str) -> List[_Rule]:
+    """Compile the rules of one ignore file (patterns relative to its directory)."""
+    rules: List[_Rule] = []
+    for raw in text.splitlines():
+        line = raw
+        # trailing spaces are ignored unless escaped
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        if not line or line.startswith("#"):
+            continue
+        negated = False
+        if line.startswith("!"):
+            negated = True
+            line = line[1:]
+        elif line.startswith(("\\!", "\\#")):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = _translate(line)
+        if not anchored:
+            body = "(?:.*/)?" + body
+        rules.append((re.compile(f"(?s:{body})"), negated, dir_only))
+    return rules
+
+
+class GitIgnore:
+    """
+    Ignore-rule evaluator for one worktree.
+
+    ``.gitignore`` files are read lazily, once per directory. Callers walking
+    the tree top-down prune ignored directories, so a path's ancestors are
+    never re-checked (git likewise cannot re-include a file whose parent
+    directory is excluded).
+    """
+
+    def __init__(self, worktree_root: Union[str, Path], git_dir: Optional[Union[str, Path]] = None):
+        self.root = Path(worktree_root)
+        self._by_dir: Dict[str, List[_Rule]] = {}
+        self._base: List[_Rule] = []
+        if git_dir is not None:
+            try:
+                exclude = (Path(git_dir) / "info" / "exclude").read_text(encoding="utf-8", errors="replace")
+                self._base = parse_gitignore(exclude)
+            except OSError:
+                pass
+
+    def _rules_for(self, rel_dir: str) -> List[_Rule]:
+        rules = self._by_dir.get(rel_dir)
+        if rules is None:
+            p = self.root / rel_dir / ".gitignore" if rel_dir else self.root / ".gitignore"
+            try:
+                rules = parse_gitignore(p.read_text(encoding="utf-8", errors="replace"))
+            except OSError:
+                rules = []
+            self._by_dir[rel_dir] = rules
+        return rules
+
+    def is_ignored(self, rel: str, is_dir: bool) -> bool:
+        """``rel`` is worktree-relative with POSIX separators, no trailing slash."""
+        ignored = False
+        for base, rules in self._sources(rel):
+            sub = rel[len(base) + 1:] if base else rel
+            for rx, negated, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if rx.fullmatch(sub):
+                    ignored = not negated
+        return ignored
+
+    def _sources(self, rel: str):
+        yield "", self._base
+        parts = rel.split("/")[:-1]
+        yield "", self._rules_for("")
+        for i in range(1, len(parts) + 1):
+            d = "/".join(parts[:i])
+            yield d, self._rules_for(d)
@@ -0,0 +1,157 @@
+"""
+Compiled include/exclude glob matching for the repository scanner.
+
+A pattern set is compiled once into a GlobMatcher. Common shapes are answered
+with plain string operations and never reach the regex engine:
+
+- ``*.ext`` / ``*suffix``     -> ``str.endswith`` on a tuple of suffixes
+- ``name`` (no wildcards)    -> set lookup on the path and its basename
+- ``dir/*`` / ``dir/**``     -> ``str.startswith`` on a tuple of prefixes
+- ``**/dir/**``              -> substring test for ``/dir/``
+
+Everything else is translated into one combined regex, matched against the
+path and against its basename (the same two candidates fnmatch was tried on).
+
+Semantics stay a superset of the previous ``fnmatch`` behaviour: ``*`` and
+``?`` still cross ``/``, and ``**/`` additionally matches zero directories,
+so ``**/.git/**`` also prunes a top-level ``.git/``. Matching is
+case-insensitive on Windows, like ``fnmatch.fnmatch``.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+_MAGIC = frozenset("*?[")
+
+
+def _has_magic(s: str) -> bool:
+    return any(c in _MAGIC for c in s)
+
+
+def _translate(pat: str) -> str:
+    """Translate one glob to a regex body (no anchors)."""
+    i, n = 0, len(pat)
+    res: List[str] = []
+    while i < n:
+        c = pat[i]
+        if c == "*":
+            if pat.startswith("**/", i):
+                # zero or more leading directories
+                res.append("(?:.*/)?")
+                i += 3
+                continue
+            while i < n and pat[i] == "*":
+                i += 1
+            res.append(".*")
+            continue
+        i += 1
+        if c == "?":
+            res.append(".")
+        elif c == "[":
+            j = i
+            if j < n and pat[j] == "!":
+                j += 1
+            if j < n and pat[j] == "]":
+                j += 1
+            while j < n and pat[j] != "]":
+                j += 1
+            if j >= n:
+                res.append("\\[")
+            else:
+                stuff = pat[i:j].replace("\\", "\\\\")
+                stuff = re.sub(r"([&~|])", r"\\\1", stuff)
+                i = j + 1
+                if stuff.startswith("!"):
+                    stuff = "^" + stuff[1:]
+                elif stuff.startswith(("^", "[")):
+                    stuff = "\\" + stuff
+                res.append(f"[{stuff}]")
+        else:
+            res.append(re.escape(c))
+    return "".join(res)
+
+
+class GlobMatcher:
+    """
+    Precompiled matcher for a list of glob patterns.
+
+    ``match(path)`` is true when any pattern matches the repo-relative POSIX
+    path or its basename. Directory paths are passed with a trailing ``/``.
+    """
+
+    __slots__ = ("patterns", "_fold", "_suffixes", "_literals", "_prefixes",
+                 "_segments", "_regex")
+
+    def __init__(self, patterns: Iterable[str], case_sensitive: Optional[bool] = None):
+        if case_sensitive is None:
+            case_sensitive = os.path.normcase("A") == "A"
+        self._fold = not case_sensitive
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+
+        suffixes: List[str] = []
+        literals: List[str] = []
+        prefixes: List[str] = []
+        segments: List[str] = []
+        complex_: List[str] = []
+
+        for pat in self.patterns:
+            p = pat.replace("\\", "/") if self._fold else pat
+            if self._fold:
+                p = p.lower()
+            if not p:
+                literals.append(p)
+            elif not _has_magic(p):
+                literals.append(p)
+            elif p.startswith("*") and not _has_magic(p.lstrip("*")):
+                suffixes.append(p.lstrip("*"))
+            elif p.endswith(("/*", "/**")) and not _has_magic(p.rstrip("*")):
+                prefixes.append(p.rstrip("*"))
+            elif (p.startswith("**/") and p.endswith("/**")
+                  and len(p) > 6 and not _has_magic(p[3:-3])):
+                segments.append("/" + p[3:-3] + "/")
+            else:
+                complex_.append(p)
+
+        self._suffixes = tuple(suffixes)
+        self._literals = frozenset(literals)
+        self._prefixes = tuple(prefixes)
+        self._segments = tuple(segments)
+        self._regex = None
+        if complex_:
+            body = "|".join(f"(?:{_translate(p)})" for p in complex_)
+            self._regex = re.compile(f"(?s:{body})", re.IGNORECASE if self._fold else 0)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def match(self, path: str) -> bool:
+        if not self.patterns:
+            return False
+        if self._fold:
+            path = path.lower()
+        if self._suffixes and path.endswith(self._suffixes):
+            return True
+        base = path.rsplit("/", 1)[-1]
+        if self._literals and (path in self._literals or base in self._literals):
+            return True
+        if self._prefixes and path.startswith(self._prefixes):
+            return True
+        if self._segments:
+            rooted = "/" + path
+            for seg in self._segments:
+                if seg in rooted:
+                    return True
+        if self._regex is not None:
+            return (self._regex.fullmatch(path) is not None
+                    or self._regex.fullmatch(base) is not None)
+        return False
+
+
+@lru_cache(maxsize=32)
+def compile_globs(patterns: Tuple[str, ...]) -> GlobMatcher:
+    """Cached GlobMatcher for a pattern tuple."""
+    return GlobMatcher(patterns)
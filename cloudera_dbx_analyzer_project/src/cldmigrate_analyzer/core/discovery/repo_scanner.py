@@ -1,8 +1,13 @@
 import os
-import fnmatch
-from dataclasses import dataclass
+import stat
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional, Set, Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .glob_matcher import GlobMatcher, compile_globs
+from .git_index import GitIndexError, find_git_dir, is_clean, read_git_index
+from .gitignore import GitIgnore
 
 @dataclass
 class ScanConfig:
@@ -11,52 +16,295 @@ class ScanConfig:
     skip_extensions: Set[str]
     follow_symlinks: bool
     max_file_bytes: int
+    # compiled once per scan (see glob_matcher)
+    include_matcher: GlobMatcher = field(init=False, repr=False, compare=False)
+    exclude_matcher: GlobMatcher = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.include_matcher = GlobMatcher(self.include_globs or [])
+        self.exclude_matcher = GlobMatcher(self.exclude_globs or [])
 
 def _match_any(path: str, patterns: List[str]) -> bool:
-    for pat in patterns:
-        if fnmatch.fnmatch(path, pat) or fnmatch.fnmatch(os.path.basename(path), pat):
-            return True
-    return False
+    return compile_globs(tuple(patterns)).match(path)
 
-def iter_files(root: str, cfg: ScanConfig) -> Iterator[str]:
-    root_path = Path(root)
-    for dirpath, dirnames, filenames in os.walk(root_path, followlinks=cfg.follow_symlinks):
-        rel_dir = os.path.relpath(dirpath, root_path)
-        rel_dir = "" if rel_dir == "." else rel_dir
-
-        # prune excluded directories
-        pruned = []
-        for d in list(dirnames):
-            rel = os.path.join(rel_dir, d).replace("\\", "/")
-            if _match_any(rel + "/", cfg.exclude_globs):
-                pruned.append(d)
-        for d in pruned:
-            dirnames.remove(d)
-
-        for f in filenames:
-            full = os.path.join(dirpath, f)
-            rel = os.path.join(rel_dir, f).replace("\\", "/")
-            ext = os.path.splitext(f)[1].lower()
+class ScanEntry(NamedTuple):
+    """One scanned file: everything downstream needs from a single stat."""
+    path: str            # repo-relative, POSIX separators
+    full_path: str       # root-joined path usable for I/O
+    size: int
+    mtime_ns: int
+    inode: int
+    detected_type: str
+    blob_sha: Optional[str] = None   # git blob id, only when known to match the file
+
+
+def _list_dir(
+    dirpath: str,
+    rel_dir: str,
+    cfg: ScanConfig,
+) -> Tuple[List[ScanEntry], List[Tuple[str, str]]]:
+    """
+    List one directory with os.scandir.
+
+    Returns (files, subdirs) in directory order, mirroring os.walk: files are
+    filtered and stat'ed once (following symlinks, like os.stat); subdirs are
+    (full_path, rel_path) pairs already pruned by exclude_globs.
+    """
+    files: List[ScanEntry] = []
+    subdirs: List[Tuple[str, str]] = []
+    try:
+        it = os.scandir(dirpath)
+    except OSError:
+        return files, subdirs
+
+    with it:
+        for entry in it:
+            name = entry.name
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # prune excluded directories
+                if cfg.exclude_matcher.match(rel + "/"):
+                    continue
+                try:
+                    is_link = entry.is_symlink()
+                except OSError:
+                    is_link = False
+                if cfg.follow_symlinks or not is_link:
+                    subdirs.append((entry.path, rel))
+                continue
+
+            ext = os.path.splitext(name)[1].lower()
             if ext in cfg.skip_extensions:
                 continue
-            if cfg.include_globs and not _match_any(rel, cfg.include_globs):
+            if cfg.include_matcher and not cfg.include_matcher.match(rel):
+                continue
+            if cfg.exclude_matcher.match(rel):
                 continue
-            if _match_any(rel, cfg.exclude_globs):
+            try:
+                st = entry.stat()
+            except OSError:
                 continue
+            files.append(ScanEntry(
+                path=rel,
+                full_path=entry.path,
+                size=st.st_size,
+                mtime_ns=st.st_mtime_ns,
+                inode=st.st_ino,
+                detected_type=_detect_type_name(name),
+            ))
+    return files, subdirs
+
+
+def _walk_serial(root: str, cfg: ScanConfig) -> Iterator[ScanEntry]:
+    stack: List[Tuple[str, str]] = [(root, "")]
+    while stack:
+        dirpath, rel_dir = stack.pop()
+        files, subdirs = _list_dir(dirpath, rel_dir, cfg)
+        yield from files
+        # reversed so the first subdirectory is walked next (os.walk order)
+        stack.extend(reversed(subdirs))
+
+
+def _walk_threaded(root: str, cfg: ScanConfig, threads: int) -> Iterator[ScanEntry]:
+    """
+    Walk with directory listings prefetched on a thread pool.
+
+    Each finished listing immediately schedules its subdirectories, so on
+    high-latency filesystems many directories are listed and stat'ed at once,
+    while entries are still yielded in exactly the serial (os.walk) order.
+    """
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="repo_scan")
+
+    def _task(dirpath: str, rel_dir: str):
+        files, subdirs = _list_dir(dirpath, rel_dir, cfg)
+        children = [executor.submit(_task, d, r) for d, r in subdirs]
+        return files, children
+
+    try:
+        stack: List[Future] = [executor.submit(_task, root, "")]
+        while stack:
+            files, children = stack.pop().result()
+            yield from files
+            stack.extend(reversed(children))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_entries(root: str, cfg: ScanConfig, threads: int = 1) -> Iterator[ScanEntry]:
+    """
+    Yield a ScanEntry per included file, in os.walk (top-down) order.
+
+    threads > 1 lists directories concurrently, which pays off on network
+    filesystems (/dbfs, NFS) where per-directory latency dominates.
+    """
+    root = os.fspath(root)
+    if threads > 1:
+        return _walk_threaded(root, cfg, threads)
+    return _walk_serial(root, cfg)
+
+
+def iter_files(root: str, cfg: ScanConfig) -> Iterator[str]:
+    for entry in iter_entries(root, cfg):
+        yield entry.full_path
+
+
+def _dir_excluded(rel: str, cfg: ScanConfig, memo: dict) -> bool:
+    """True if any ancestor directory of ``rel`` is pruned by exclude_globs."""
+    i = rel.rfind("/")
+    if i < 0:
+        return False
+    d = rel[:i]
+    hit = memo.get(d)
+    if hit is None:
+        hit = _dir_excluded(d, cfg, memo) or cfg.exclude_matcher.match(d + "/")
+        memo[d] = hit
+    return hit
+
+
+def _file_included(rel: str, name: str, cfg: ScanConfig) -> bool:
+    if os.path.splitext(name)[1].lower() in cfg.skip_extensions:
+        return False
+    if cfg.include_matcher and not cfg.include_matcher.match(rel):
+        return False
+    return not cfg.exclude_matcher.match(rel)
+
+
+def iter_git_entries(
+    root: str,
+    cfg: ScanConfig,
+    threads: int = 1,
+    include_untracked: bool = False,
+) -> List[ScanEntry]:
+    """
+    Enumerate files from the git index instead of walking the tree.
+
+    Tracked files come straight from ``.git/index``; each is stat'ed once to
+    drop deleted files and to decide whether its indexed blob SHA still
+    describes the working copy (``ScanEntry.blob_sha`` is None otherwise).
+    With include_untracked, the tree is also walked for untracked files,
+    pruning directories ignored by ``.gitignore``/``info/exclude``.
+
+    ``root`` may be a subdirectory of the worktree. Entries are in git path
+    order. Raises GitIndexError if ``root`` is not in a git checkout.
+    """
+    found = find_git_dir(root)
+    if found is None:
+        raise GitIndexError(f"not inside a git worktree: {root}")
+    worktree, git_dir = found
+    index_path = git_dir / "index"
+    index_entries = read_git_index(index_path)
+    index_mtime_ns = os.stat(index_path).st_mtime_ns
+
+    root = os.path.abspath(os.fspath(root))
+    prefix = os.path.relpath(root, worktree).replace("\\", "/")
+    prefix = "" if prefix == "." else prefix + "/"
+
+    dir_memo: dict = {}
+    candidates = []
+    for e in index_entries:
+        if prefix and not e.path.startswith(prefix):
+            continue
+        rel = e.path[len(prefix):]
+        name = rel.rsplit("/", 1)[-1]
+        if _dir_excluded(rel, cfg, dir_memo) or not _file_included(rel, name, cfg):
+            continue
+        candidates.append((rel, name, e))
+
+    def _stat(item):
+        rel, name, e = item
+        full = os.path.join(root, *rel.split("/"))
+        try:
+            st = os.stat(full)
+        except OSError:
+            return None  # deleted (or unreadable) in the working tree
+        if stat.S_ISDIR(st.st_mode):
+            return None
+        return ScanEntry(
+            path=rel,
+            full_path=full,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            inode=st.st_ino,
+            detected_type=_detect_type_name(name),
+            blob_sha=e.sha if is_clean(e, st, index_mtime_ns) else None,
+        )
+
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="git_scan") as ex:
+            stated = list(ex.map(_stat, candidates, chunksize=256))
+    else:
+        stated = [_stat(c) for c in candidates]
+    out = [s for s in stated if s is not None]
+
+    if include_untracked:
+        tracked = {e.path for e in index_entries}
+        ignore = GitIgnore(worktree, git_dir)
+        stack = [(root, "")]
+        while stack:
+            dirpath, rel_dir = stack.pop()
             try:
-                st = os.stat(full)
+                it = os.scandir(dirpath)
             except OSError:
                 continue
-            yield full
-            
+            subdirs = []
+            with it:
+                for entry in it:
+                    name = entry.name
+                    rel = f"{rel_dir}/{name}" if rel_dir else name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if name == ".git" or ignore.is_ignored(prefix + rel, True):
+                            continue
+                        if cfg.exclude_matcher.match(rel + "/"):
+                            continue
+                        subdirs.append((entry.path, rel))
+                        continue
+                    if prefix + rel in tracked or ignore.is_ignored(prefix + rel, False):
+                        continue
+                    if not _file_included(rel, name, cfg):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        continue
+                    out.append(ScanEntry(
+                        path=rel,
+                        full_path=entry.path,
+                        size=st.st_size,
+                        mtime_ns=st.st_mtime_ns,
+                        inode=st.st_ino,
+                        detected_type=_detect_type_name(name),
+                    ))
+            stack.extend(reversed(subdirs))
+        out.sort(key=lambda e: e.path.encode("utf-8", errors="surrogateescape"))
+
+    return out
+
+
 def _detect_type_simple(full_path: str) -> str:
     """
     Lightweight detector (cross-platform) to support Phase-1.
     This avoids YAML regex issues and keeps the pipeline running.
     """
-    p = Path(full_path)
-    name = p.name.lower()
-    ext = p.suffix.lower()
+    return _detect_type_name(os.path.basename(full_path))
+
+
+def _detect_type_name(filename: str) -> str:
+    """_detect_type_simple on a bare file name (no Path objects on the scan hot path)."""
+    name = filename.lower()
+    # same rule as PurePath.suffix
+    i = name.rfind(".")
+    ext = name[i:] if 0 < i < len(name) - 1 else ""
 
     # Oozie XMLs by common filenames
     if name == "workflow.xml":
@@ -115,10 +363,20 @@ def scan_repository(
     include_globs: list[str] | None = None,
     exclude_globs: list[str] | None = None,
     patterns: dict | None = None,
+    scan_threads: int = 1,
+    source: str = "walk",
+    git_untracked: bool = False,
 ):
     """
     Compatibility wrapper expected by the pipeline.
     Returns a list of dicts with minimal fields needed downstream.
+
+    scan_threads > 1 walks directories on a thread pool (see iter_entries).
+
+    source="git" enumerates files from .git/index instead of walking (see
+    iter_git_entries); entries whose content matches the index also get a
+    "content_hash" (the git blob SHA). Raises GitIndexError when repo_root is
+    not in a git checkout.
     """
     include_globs = include_globs or []
     exclude_globs = exclude_globs or []
@@ -138,28 +396,24 @@ def scan_repository(
         max_file_bytes=max_file_mb * 1024 * 1024,
     )
 
-    out = []
-    root_str = str(repo_root)
-
-    for full in iter_files(root_str, cfg):
-        p = Path(full)
-        try:
-            rel = p.relative_to(repo_root).as_posix()
-        except Exception:
-            # fallback
-            rel = str(p).replace("\\", "/")
-
-        try:
-            size = p.stat().st_size
-        except Exception:
-            size = None
-
-        out.append(
-            {
-                "path": rel,
-                "detected_type": _detect_type_simple(full),
-                "parse_status": "ok",
-                "size_bytes": size,
-            }
+    if source == "git":
+        entries = iter_git_entries(
+            str(repo_root), cfg, threads=scan_threads, include_untracked=git_untracked
         )
+    elif source == "walk":
+        entries = iter_entries(str(repo_root), cfg, threads=scan_threads)
+    else:
+        raise ValueError(f"Unknown scan source: {source!r} (expected 'walk' or 'git')")
+
+    out = []
+    for entry in entries:
+        rec = {
+            "path": entry.path,
+            "detected_type": entry.detected_type,
+            "parse_status": "ok",
+            "size_bytes": entry.size,
+        }
+        if entry.blob_sha:
+            rec["content_hash"] = entry.blob_sha
+        out.append(rec)
     return out
@@ -0,0 +1,186 @@
+"""
+Windowed, memory-mapped scanning of files above ``max_file_mb``.
+
+Such files never go through the ContentStore. The file is memory-mapped and
+handed to the extractors as a sequence of line-aligned windows:
+
+- a file within the sample budget is streamed whole, window after window;
+- a larger one is sampled: ``budget // WINDOW_BYTES`` windows spread evenly
+  from the head to the tail of the file.
+
+Each window owns the full lines of its byte range (``text``/``lines``,
+numbered from ``first_line`` like ``splitlines()`` of the whole file) and
+carries an overlap tail of up to OVERLAP_BYTES of the following lines
+(``span_text``), so set-valued extractors still see statements that cross
+the window end. ``ranges`` lists the byte ranges covered, merged.
+"""
+
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .content_store import decode_text
+
+WINDOW_BYTES = 4 * 1024 * 1024
+OVERLAP_BYTES = 64 * 1024
+
+
+class Window:
+    """One scanned slice of a large file."""
+
+    __slots__ = ("start", "end", "first_line", "text", "tail", "_lines")
+
+    def __init__(self, start: int, end: int, first_line: int, text: str, tail: str):
+        self.start = start
+        self.end = end
+        self.first_line = first_line
+        self.text = text
+        self.tail = tail
+        self._lines: Optional[List[str]] = None
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    @property
+    def span_text(self) -> str:
+        """Owned text plus the overlap tail."""
+        return self.text + self.tail
+
+
+class SampledFile:
+    """
+    Memory-mapped large file, scanned window by window.
+
+    Usage:
+        with SampledFile(path, budget_bytes) as sf:
+            for w in sf.windows():
+                ...
+            covered = sf.ranges
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        budget_bytes: int,
+        window_bytes: int = WINDOW_BYTES,
+        overlap_bytes: int = OVERLAP_BYTES,
+    ):
+        self.path = Path(path)
+        self.window_bytes = max(1, int(window_bytes))
+        self.overlap_bytes = max(0, int(overlap_bytes))
+        self.budget_bytes = max(self.window_bytes, int(budget_bytes))
+        self._fh = open(self.path, "rb")
+        try:
+            self._mm: Optional[mmap.mmap] = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._mm = None
+        self.size = len(self._mm) if self._mm is not None else 0
+        self._planned: Optional[List[Tuple[int, int]]] = None
+
+    @property
+    def sampled(self) -> bool:
+        """True when part of the file is not covered by the windows."""
+        return self.size > self.budget_bytes
+
+    @property
+    def ranges(self) -> List[List[int]]:
+        """Covered byte ranges ``[start, end)``, adjacent windows merged."""
+        out: List[List[int]] = []
+        for start, end in self.plan():
+            if out and out[-1][1] == start:
+                out[-1][1] = end
+            else:
+                out.append([start, end])
+        return out
+
+    # ------------------------------------------------------------------
+
+    def _char_boundary(self, pos: int) -> int:
+        mm = self._mm
+        while 0 < pos < self.size and 0x80 <= mm[pos] < 0xC0:
+            pos -= 1
+        if 0 < pos < self.size and mm[pos - 1] == 0x0D and mm[pos] == 0x0A:
+            pos += 1  # keep \r\n together
+        return pos
+
+    def _after_newline(self, pos: int) -> int:
+        """First line start at or after ``pos`` (within one window), else a char boundary."""
+        if pos <= 0 or pos >= self.size:
+            return max(0, min(pos, self.size))
+        if self._mm[pos - 1] == 0x0A:
+            return pos
+        i = self._mm.find(b"\n", pos, min(self.size, pos + self.window_bytes))
+        return i + 1 if i >= 0 else self._char_boundary(pos)
+
+    def plan(self) -> List[Tuple[int, int]]:
+        """Window byte ranges, in file order."""
+        if self._planned is None:
+            self._planned = self._plan() if self._mm is not None else []
+        return self._planned
+
+    def _window_end(self, start: int) -> int:
+        end = self._after_newline(min(self.size, start + self.window_bytes))
+        return end if end > start else min(self.size, start + self.window_bytes)
+
+    def _plan(self) -> List[Tuple[int, int]]:
+        size, win = self.size, self.window_bytes
+        plan: List[Tuple[int, int]] = []
+        if size <= self.budget_bytes:
+            start = 0
+            while start < size:
+                end = self._window_end(start)
+                plan.append((start, end))
+                start = end
+            return plan
+
+        n = max(1, self.budget_bytes // win)
+        targets = [0] if n == 1 else [i * (size - win) // (n - 1) for i in range(n)]
+        prev_end = 0
+        for target in targets:
+            start = max(prev_end, self._after_newline(target))
+            if start >= size:
+                break
+            end = self._window_end(start)
+            plan.append((start, end))
+            prev_end = end
+        return plan
+
+    def _tail(self, end: int) -> str:
+        if not self.overlap_bytes or end >= self.size:
+            return ""
+        stop = min(self.size, end + self.overlap_bytes)
+        if stop < self.size:
+            nl = self._mm.rfind(b"\n", end, stop)
+            stop = nl + 1 if nl >= 0 else self._char_boundary(stop)
+        return decode_text(self._mm[end:stop])
+
+    def windows(self) -> Iterator[Window]:
+        """Yield the windows in file order."""
+        # metrics.counts imports the engine, which imports this module
+        from ..metrics.counts import count_line_breaks
+
+        line = 1
+        counted_to = 0
+        for start, end in self.plan():
+            line += count_line_breaks(self._mm, counted_to, start)
+            text = decode_text(self._mm[start:end])
+            yield Window(start, end, line, text, self._tail(end))
+            line += count_line_breaks(self._mm, start, end)
+            counted_to = end
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._fh.close()
+
+    def __enter__(self) -> "SampledFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,201 @@
+"""
+Microbenchmark of the registered extractors and the configured patterns.
+
+    python -m cldmigrate_analyzer.core.extraction.bench <corpus_dir> [--repeat 3] [--min-mb-s 5]
+
+Every registered plugin (see registry.py) visits each corpus file it
+accepts; files are read and decoded beforehand, so only the visits are timed
+(best of ``repeat``). The reported cost is time per byte relative to the
+counts plugin, the unit of ``ExtractorSpec.cost``.
+
+Every regex in config/patterns/*.yml is also run on its own over the whole
+corpus. Patterns slower than ``--min-mb-s`` are flagged and make the exit
+status 1, so a backtracking-prone pattern is caught before it ships.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..discovery.content_store import ContentStore
+from ..discovery.repo_scanner import scan_repository
+from ..pipeline.engine import Document
+from .registry import build_extractors, extractor_specs
+
+MB = 1024 * 1024
+
+
+def load_corpus(corpus_dir: str, max_file_mb: int = 10) -> Tuple[ContentStore, List[Document]]:
+    """Scan ``corpus_dir`` and return its readable files up to ``max_file_mb``, decoded."""
+    files = scan_repository(Path(corpus_dir), max_file_mb=max_file_mb)
+    store = ContentStore(corpus_dir, memory_budget_mb=1 << 20)  # keep the corpus in memory
+    docs = []
+    for f in files:
+        if int(f.get("size_bytes") or 0) > max_file_mb * MB:
+            continue
+        doc = Document(store, f)
+        try:
+            doc.text
+        except Exception:
+            continue
+        docs.append(doc)
+    return store, docs
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def benchmark_extractors(
+    docs: Sequence[Document],
+    patterns: Dict[str, Any],
+    repeat: int = 3,
+    names: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Time each registered plugin over the documents it accepts.
+
+    Returns one row per plugin: extractor, files, bytes, seconds, mb_per_s,
+    cost (per-byte time relative to "counts", when benchmarked) and
+    registered_cost.
+    """
+    specs = {s.name: s for s in extractor_specs(names)}
+    rows = []
+    # Repeated runs must not time statement-cache hits
+    for analyzer in build_extractors(patterns, names, options={"sql_cache_entries": 0}):
+        mine = [d for d in docs if analyzer.accepts(d.info)]
+        size = sum(int(d.info.get("size_bytes") or 0) for d in mine)
+
+        def run(analyzer=analyzer, mine=mine):
+            for d in mine:
+                try:
+                    analyzer.visit(d)
+                except Exception:
+                    pass
+
+        seconds = _best_of(repeat, run) if mine else 0.0
+        rows.append({
+            "extractor": analyzer.name,
+            "files": len(mine),
+            "bytes": size,
+            "seconds": seconds,
+            "mb_per_s": (size / MB) / seconds if seconds else None,
+            "registered_cost": specs[analyzer.name].cost,
+        })
+
+    base = next((r for r in rows if r["extractor"] == "counts" and r["seconds"] and r["bytes"]), None)
+    for r in rows:
+        r["cost"] = None
+        if base and r["seconds"] and r["bytes"]:
+            r["cost"] = (r["seconds"] / r["bytes"]) / (base["seconds"] / base["bytes"])
+    return rows
+
+
+def _regex_lists(patterns: Dict[str, Any]) -> Iterator[Tuple[str, str, str]]:
+    for section, body in (patterns or {}).items():
+        if not isinstance(body, dict):
+            continue
+        for key, values in body.items():
+            if isinstance(values, list):
+                for p in values:
+                    if isinstance(p, str):
+                        yield section, key, p
+
+
+def benchmark_patterns(
+    docs: Sequence[Document],
+    patterns: Dict[str, Any],
+    repeat: int = 3,
+    min_mb_s: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Time every configured regex over the whole corpus text.
+
+    Returns one row per pattern: section, key, pattern, matches, seconds,
+    mb_per_s, slow (below ``min_mb_s``); invalid regexes get an error.
+    """
+    texts = [d.text for d in docs]
+    size = sum(len(t) for t in texts)
+    rows = []
+    for section, key, pattern in _regex_lists(patterns):
+        row: Dict[str, Any] = {"section": section, "key": key, "pattern": pattern}
+        try:
+            rx = re.compile(pattern)
+        except re.error as e:
+            row["error"] = str(e)
+            rows.append(row)
+            continue
+        counts = [0]
+
+        def run(rx=rx, counts=counts):
+            counts[0] = sum(1 for t in texts for _ in rx.finditer(t))
+
+        seconds = _best_of(repeat, run)
+        mb_s = (size / MB) / seconds if seconds else None
+        row.update({
+            "matches": counts[0],
+            "seconds": seconds,
+            "mb_per_s": mb_s,
+            "slow": bool(min_mb_s is not None and mb_s is not None and mb_s < min_mb_s),
+        })
+        rows.append(row)
+    return rows
+
+
+def _fmt(v: Any, spec: str = "") -> str:
+    return "-" if v is None else format(v, spec)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m cldmigrate_analyzer.core.extraction.bench",
+        description="Time the registered extractors and the configured patterns on a corpus.",
+    )
+    parser.add_argument("corpus_dir", help="Directory of sample files")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--max-file-mb", type=int, default=10, help="Skip corpus files above this size")
+    parser.add_argument("--min-mb-s", type=float, default=5.0,
+                        help="Flag patterns slower than this (MB/s); exit status 1 if any")
+    parser.add_argument("--extractors", default="", help="Comma-separated extractor names (default: all)")
+    args = parser.parse_args(argv)
+
+    from ...config.loader import load_patterns
+
+    patterns = load_patterns(Path(__file__).resolve().parents[2])
+    _, docs = load_corpus(args.corpus_dir, max_file_mb=args.max_file_mb)
+    names = [n.strip() for n in args.extractors.split(",") if n.strip()] or None
+    total = sum(int(d.info.get("size_bytes") or 0) for d in docs)
+    print(f"Corpus: {len(docs)} files, {total / MB:.2f} MB")
+
+    print(f"\n{'extractor':<18}{'files':>7}{'MB':>9}{'seconds':>10}{'MB/s':>9}{'cost':>8}{'registered':>12}")
+    for r in benchmark_extractors(docs, patterns, repeat=args.repeat, names=names):
+        print(f"{r['extractor']:<18}{r['files']:>7}{r['bytes'] / MB:>9.2f}{r['seconds']:>10.4f}"
+              f"{_fmt(r['mb_per_s'], '.1f'):>9}{_fmt(r['cost'], '.2f'):>8}{r['registered_cost']:>12.2f}")
+
+    slow = 0
+    print(f"\n{'MB/s':>9}{'matches':>9}  pattern")
+    for r in benchmark_patterns(docs, patterns, repeat=args.repeat, min_mb_s=args.min_mb_s):
+        if "error" in r:
+            print(f"{'invalid':>9}{'':>9}  {r['section']}.{r['key']}: {r['pattern']} ({r['error']})")
+            continue
+        flag = "  SLOW" if r["slow"] else ""
+        slow += r["slow"]
+        print(f"{_fmt(r['mb_per_s'], '.1f'):>9}{r['matches']:>9}  {r['section']}.{r['key']}: {r['pattern']}{flag}")
+
+    if slow:
+        print(f"\n{slow} pattern(s) below {args.min_mb_s} MB/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,12 +7,23 @@ with proper handling of:
 - Hive variables (${hiveconf:var}, ${var})
 - Complex qualified names
 - Multiple database notations
+
+All USE statements and table references come from one scan of the text with
+a combined pattern (``_REFERENCE_RE``), which skips comments and string
+literals and classifies each reference as source or target by the keyword
+before it. Notebooks and Oozie XML embed their SQL in quoted text, so they
+are scanned with ``_EMBEDDED_REFERENCE_RE``, which reads quotes as text. Unqualified tables get the database of the last USE before them.
 """
 
 import re
 from typing import Dict, List, Any, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
-from pathlib import Path
+
+from ..discovery.content_store import ContentStore
+from ..discovery.windows import Window
+from ..pipeline.engine import Document, FileAnalyzer, run_analyzers
+from ..pipeline.parallel import WorkerPool
+from .table_store import TableReferenceStore
 
 
 @dataclass
@@ -67,6 +78,56 @@ class DatabaseContext:
         }
 
 
+# One part of a table name: ${var}, `quoted`, "quoted", [bracketed] or a
+# word; adjacent parts glue together (``${env}_raw``)
+_NAME_PART = r'(?:\$\{[^}\n]*\}|`[^`\n]*`|"[^"\n]*"|\[[^\]\n]*\]|\w+)+'
+_NAME_PART_RE = re.compile(_NAME_PART)
+
+# Table-reference scanner: every keyword sequence that introduces a table
+# name, in one alternation, next to the constructs whose content must not
+# match (comments, string literals, quoted identifiers, ${...}). DELETE FROM
+# is tried before FROM, so a deleted table is not also read as a source.
+_REFERENCE_PATTERN = r"""
+    --[^\n]*
+    | /\*(?:[^*]|\*(?!/))*(?:\*/)?
+    QUOTED
+    | \$\{[^}\n]*\}?
+    | \b(?P<keyword>
+          USE(?:\s+DATABASE)?(?:\s+SCHEMA)?
+        | CREATE\s+(?:EXTERNAL\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?
+        | INSERT\s+(?:INTO|OVERWRITE)(?:\s+TABLE)?
+        | MERGE\s+INTO
+        | DELETE\s+FROM
+        | TRUNCATE(?:\s+TABLE)?
+        | UPDATE
+        | JOIN
+        | FROM
+      )\b
+      (?:\s+(?P<name>NAME(?:\.NAME)*)(?:\s*;)?)?
+    """.replace("NAME", _NAME_PART)
+_QUOTED = r"""
+    | '(?:[^'\\]|\\.|'')*'
+    | "(?:[^"\\]|\\.|"")*"
+    | `[^`]*`
+"""
+_REFERENCE_RE = re.compile(
+    _REFERENCE_PATTERN.replace("QUOTED", _QUOTED),
+    re.IGNORECASE | re.VERBOSE | re.DOTALL
+)
+# Notebooks and Oozie XML keep their SQL inside JSON strings, attributes and
+# markdown fences, so quotes there do not delimit SQL literals
+_EMBEDDED_REFERENCE_RE = re.compile(
+    _REFERENCE_PATTERN.replace("QUOTED", ""),
+    re.IGNORECASE | re.VERBOSE | re.DOTALL
+)
+
+# File types whose whole text is SQL, scanned with _REFERENCE_RE
+_SQL_FILE_TYPES = frozenset({"sql", "hql", "impala_sql"})
+
+_SOURCE_OPERATIONS = ("SELECT", "JOIN")
+_TARGET_OPERATIONS = ("INSERT", "CREATE", "MERGE", "UPDATE", "DELETE", "TRUNCATE")
+
+
 class DatabaseSchemaParser:
     """
     Enhanced parser for database and schema information from SQL text.
@@ -77,57 +138,6 @@ class DatabaseSchemaParser:
     - Parses qualified table names with variables
     """
     
-    # Regex patterns for SQL constructs
-    USE_DB_RE = re.compile(
-        r'(?i)\bUSE\s+(?:DATABASE\s+)?(?:SCHEMA\s+)?([`"\[]?[\w]+[`"\]]?)\s*;?',
-        re.MULTILINE
-    )
-    
-    # FIXED: Updated CREATE TABLE pattern to handle IF NOT EXISTS
-    SQL_CREATE_RE = re.compile(
-        r'(?i)\bCREATE\s+(?:EXTERNAL\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?'
-        r'([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    # Updated patterns for other operations
-    SQL_FROM_RE = re.compile(
-        r'(?i)\bFROM\s+([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    SQL_JOIN_RE = re.compile(
-        r'(?i)\b(?:INNER\s+|LEFT\s+(?:OUTER\s+)?|RIGHT\s+(?:OUTER\s+)?|FULL\s+(?:OUTER\s+)?|CROSS\s+)?JOIN\s+'
-        r'([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    SQL_INSERT_RE = re.compile(
-        r'(?i)\bINSERT\s+(?:INTO|OVERWRITE)\s+(?:TABLE\s+)?'
-        r'([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    SQL_MERGE_RE = re.compile(
-        r'(?i)\bMERGE\s+INTO\s+([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    SQL_UPDATE_RE = re.compile(
-        r'(?i)\bUPDATE\s+([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    SQL_DELETE_RE = re.compile(
-        r'(?i)\bDELETE\s+FROM\s+([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
-    SQL_TRUNCATE_RE = re.compile(
-        r'(?i)\bTRUNCATE\s+(?:TABLE\s+)?([`"\[]?[\w\.\$\{\}:]+[`"\]]?)',
-        re.MULTILINE
-    )
-    
     # Hive variable patterns - ENHANCED
     HIVECONF_VAR_RE = re.compile(r'\$\{hiveconf:(\w+)\}')
     HIVEVAR_VAR_RE = re.compile(r'\$\{hivevar:(\w+)\}')
@@ -210,144 +220,113 @@ class DatabaseSchemaParser:
             return (None, None, full_name)
     
     @staticmethod
-    def extract_use_statements(text: str) -> List[Dict[str, Any]]:
-        """Extract all USE database/schema statements"""
-        use_stmts = []
-        for i, line in enumerate(text.split('\n'), 1):
-            for match in DatabaseSchemaParser.USE_DB_RE.finditer(line):
-                db_name = DatabaseSchemaParser.clean_identifier(match.group(1))
-                use_stmts.append({
-                    "database": db_name,
-                    "line": i,
-                    "statement": match.group(0).strip()
-                })
-        return use_stmts
-    
-    @staticmethod
-    def extract_table_references(
+    def extract_databases_and_schemas(
         text: str,
-        operation: str,
-        regex_pattern: re.Pattern,
-        active_database: Optional[str] = None
-    ) -> List[TableReference]:
-        """
-        Extract table references from SQL using the given pattern.
-        
-        Args:
-            text: SQL text to parse
-            operation: Operation type (SELECT, INSERT, etc.)
-            regex_pattern: Compiled regex to find tables
-            active_database: Current active database from USE statement
-        """
-        refs = []
-        lines = text.split('\n')
-        
-        for i, line in enumerate(lines, 1):
-            for match in regex_pattern.finditer(line):
-                full_name = DatabaseSchemaParser.clean_identifier(match.group(1))
-                
-                # Skip if this looks like a keyword or SQL construct
-                if full_name.upper() in ('IF', 'NOT', 'EXISTS', 'EXTERNAL', 'TABLE'):
-                    continue
-                
-                # Check for variables
-                has_vars = bool(DatabaseSchemaParser.ALL_VAR_RE.search(full_name))
-                
-                # Parse qualified name
-                database, schema, table = DatabaseSchemaParser.parse_qualified_name(full_name)
-                
-                # If no database specified but we have an active database, use it
-                if not database and active_database and not has_vars:
-                    database = active_database
-                    schema = None
-                
-                # Determine confidence
-                if has_vars:
-                    confidence = "low" if database and DatabaseSchemaParser.ALL_VAR_RE.search(database) else "medium"
-                elif database or schema:
-                    confidence = "high"
-                else:
-                    confidence = "medium"
-                
-                ref = TableReference(
-                    full_name=full_name,
-                    database=database,
-                    schema=schema,
-                    table=table,
-                    operation=operation,
-                    line_number=i,
-                    confidence=confidence,
-                    has_variables=has_vars
-                )
-                refs.append(ref)
-        
-        return refs
-    
-    @staticmethod
-    def extract_databases_and_schemas(text: str) -> DatabaseContext:
+        active_database: Optional[str] = None,
+        owned_lines: Optional[int] = None,
+        sql_text: bool = True
+    ) -> DatabaseContext:
         """
         Main extraction function that returns comprehensive database/schema context.
         
+        One scan of ``_REFERENCE_RE`` finds the USE statements and the table
+        references in text order (comments, strings and quoted identifiers
+        are skipped), so each unqualified table gets the database of the last
+        USE before it.
+        
         Args:
             text: SQL text to analyze
+            active_database: Database in effect at the start of ``text``
+            owned_lines: Only report matches starting on the first
+                ``owned_lines`` lines (a window and its overlap tail)
+            sql_text: ``text`` is a SQL script; when False (SQL embedded in
+                notebooks or XML) quoted text is scanned too
             
         Returns:
             DatabaseContext object with all extracted information
         """
-        # Extract USE statements first to establish context
-        use_stmts = DatabaseSchemaParser.extract_use_statements(text)
-        active_database = use_stmts[-1]["database"] if use_stmts else None
-        
-        # Extract all variables
-        all_variables = DatabaseSchemaParser.extract_variables(text)
+        use_stmts: List[Dict[str, Any]] = []
+        source_refs: List[TableReference] = []
+        target_refs: List[TableReference] = []
+        line, counted = 1, 0
         
-        # Extract all table references by operation type
-        source_refs = []
-        target_refs = []
-        
-        # Source tables (reads)
-        source_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "SELECT", DatabaseSchemaParser.SQL_FROM_RE, active_database
-            )
-        )
-        source_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "JOIN", DatabaseSchemaParser.SQL_JOIN_RE, active_database
+        reference_re = _REFERENCE_RE if sql_text else _EMBEDDED_REFERENCE_RE
+        for match in reference_re.finditer(text):
+            keyword = match.group("keyword")
+            if keyword is None:
+                continue
+            start = match.start()
+            line += text.count("\n", counted, start)
+            counted = start
+            if owned_lines is not None and line > owned_lines:
+                break
+            full_name = match.group("name")
+            if full_name is None:
+                continue
+            operation = keyword.split(None, 1)[0].upper()
+            
+            if operation == "USE":
+                db_name = DatabaseSchemaParser.clean_identifier(full_name)
+                use_stmts.append({
+                    "database": db_name,
+                    "line": line,
+                    "statement": match.group(0).strip()
+                })
+                active_database = db_name
+                continue
+            
+            parts = [DatabaseSchemaParser.clean_identifier(p) for p in _NAME_PART_RE.findall(full_name)]
+            full_name = ".".join(parts)
+            # Skip if this looks like a keyword or SQL construct
+            if full_name.upper() in ('IF', 'NOT', 'EXISTS', 'EXTERNAL', 'TABLE'):
+                continue
+            
+            has_vars = bool(DatabaseSchemaParser.ALL_VAR_RE.search(full_name))
+            if len(parts) == 1:
+                database, schema, table = None, None, parts[0]
+            elif len(parts) == 2:
+                database, schema, table = parts[0], None, parts[1]
+            elif len(parts) == 3:
+                database, schema, table = parts
+            else:
+                database, schema, table = None, None, full_name
+            
+            # If no database specified but a USE is in effect, use it
+            if not database and active_database and not has_vars:
+                database = active_database
+                schema = None
+            
+            # Determine confidence
+            if has_vars:
+                confidence = "low" if database and DatabaseSchemaParser.ALL_VAR_RE.search(database) else "medium"
+            elif database or schema:
+                confidence = "high"
+            else:
+                confidence = "medium"
+            
+            if operation == "FROM":
+                operation = "SELECT"
+            ref = TableReference(
+                full_name=full_name,
+                database=database,
+                schema=schema,
+                table=table,
+                operation=operation,
+                line_number=line,
+                confidence=confidence,
+                has_variables=has_vars
             )
-        )
+            if operation in _SOURCE_OPERATIONS:
+                source_refs.append(ref)
+            else:
+                target_refs.append(ref)
         
-        # Target tables (writes)
-        target_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "INSERT", DatabaseSchemaParser.SQL_INSERT_RE, active_database
-            )
-        )
-        target_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "CREATE", DatabaseSchemaParser.SQL_CREATE_RE, active_database
-            )
-        )
-        target_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "MERGE", DatabaseSchemaParser.SQL_MERGE_RE, active_database
-            )
-        )
-        target_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "UPDATE", DatabaseSchemaParser.SQL_UPDATE_RE, active_database
-            )
-        )
-        target_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "DELETE", DatabaseSchemaParser.SQL_DELETE_RE, active_database
-            )
-        )
-        target_refs.extend(
-            DatabaseSchemaParser.extract_table_references(
-                text, "TRUNCATE", DatabaseSchemaParser.SQL_TRUNCATE_RE, active_database
-            )
-        )
+        # References are listed grouped by operation, in text order within each
+        source_refs.sort(key=lambda r: _SOURCE_OPERATIONS.index(r.operation))
+        target_refs.sort(key=lambda r: _TARGET_OPERATIONS.index(r.operation))
+        
+        # Extract all variables (including those inside string literals)
+        all_variables = DatabaseSchemaParser.extract_variables(text)
         
         # Collect unique databases and schemas
         databases: Set[str] = set()
@@ -389,44 +368,112 @@ class DatabaseSchemaParser:
         )
 
 
+class DatabaseContextAnalyzer(FileAnalyzer):
+    """Engine plugin for extract_databases_from_repository."""
+    
+    name = "database_context"
+    # Only process SQL-like files
+    file_types = frozenset({
+        "sql", "hql", "impala_sql", "oozie_workflow_xml",
+        "oozie_coordinator_xml", "notebook_zeppelin", "notebook_jupyter"
+    })
+    
+    def visit(self, doc: Document) -> Optional[DatabaseContext]:
+        try:
+            text = doc.text
+        except Exception:
+            return None
+        
+        return DatabaseSchemaParser.extract_databases_and_schemas(
+            text, sql_text=doc.detected_type in _SQL_FILE_TYPES
+        )
+    
+    windowed = True
+    
+    # USE database in effect at the end of the previous window of the file
+    _window_database: Optional[str] = None
+    
+    def visit_window(self, doc: Document, window: Window) -> Optional[DatabaseContext]:
+        # A reference may continue into the overlap tail; windows of one file
+        # are visited in order, so the USE database carries over
+        if window.start == 0:
+            self._window_database = None
+        ctx = DatabaseSchemaParser.extract_databases_and_schemas(
+            window.span_text, self._window_database, owned_lines=len(window.lines),
+            sql_text=doc.detected_type in _SQL_FILE_TYPES
+        )
+        self._window_database = ctx.active_database
+        shift = window.first_line - 1
+        if shift:
+            for ref in ctx.source_tables + ctx.target_tables:
+                ref.line_number += shift
+            for stmt in ctx.use_statements:
+                stmt["line"] += shift
+        return ctx
+    
+    def merge_windows(self, parts: List[Any]) -> Optional[DatabaseContext]:
+        """Combine window contexts (in file order)."""
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return None
+        return DatabaseContext(
+            databases=sorted({d for p in parts for d in p.databases}),
+            schemas=sorted({s for p in parts for s in p.schemas}),
+            use_statements=[u for p in parts for u in p.use_statements],
+            source_tables=[t for p in parts for t in p.source_tables],
+            target_tables=[t for p in parts for t in p.target_tables],
+            qualified_tables=[q for p in parts for q in p.qualified_tables],
+            unqualified_tables=sorted({t for p in parts for t in p.unqualified_tables}),
+            active_database=next((p.active_database for p in reversed(parts) if p.active_database), None),
+            variables_found=sorted({v for p in parts for v in p.variables_found}),
+        )
+    
+    def from_cache(self, result: Optional[Dict[str, Any]]) -> Optional[DatabaseContext]:
+        if result is None:
+            return None
+        return DatabaseContext(**{
+            **result,
+            "source_tables": [TableReference(**t) for t in result["source_tables"]],
+            "target_tables": [TableReference(**t) for t in result["target_tables"]],
+        })
+    
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> Dict[str, Any]:
+        return _merge_database_contexts(visited)
+
+
 def extract_databases_from_repository(
-    repo_root: Path,
-    files_index: List[Dict[str, Any]]
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    pool: Optional[WorkerPool] = None
 ) -> Dict[str, Any]:
     """
     Repository-level database/schema extraction.
     
     Scans all SQL files and aggregates database/schema information across the entire repo.
     """
+    analyzer = DatabaseContextAnalyzer()
+    return run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
+
+
+def _merge_database_contexts(
+    visited: List[Tuple[Dict[str, Any], Optional[DatabaseContext]]]
+) -> Dict[str, Any]:
+    """
+    Aggregate per-file DatabaseContext results (in files_index order).
+    
+    The references go into one TableReferenceStore; ``source_tables`` and
+    ``target_tables`` are its dict views.
+    """
     all_databases: Set[str] = set()
     all_schemas: Set[str] = set()
-    all_source_tables: List[Dict[str, Any]] = []
-    all_target_tables: List[Dict[str, Any]] = []
     all_variables: Set[str] = set()
     files_by_database: Dict[str, List[str]] = {}
-    tables_by_database: Dict[str, Set[str]] = {}
+    store = TableReferenceStore()
     
-    for file_info in files_index:
-        rel_path = file_info.get("path")
-        if not rel_path:
-            continue
-        
-        # Only process SQL-like files
-        file_type = (file_info.get("detected_type") or "").lower()
-        if file_type not in {
-            "sql", "hql", "impala_sql", "oozie_workflow_xml",
-            "oozie_coordinator_xml", "notebook_zeppelin", "notebook_jupyter"
-        }:
-            continue
-        
-        file_path = repo_root / rel_path
-        try:
-            text = file_path.read_text(encoding="utf-8", errors="replace")
-        except Exception:
+    for file_info, context in visited:
+        if context is None:
             continue
-        
-        # Extract context for this file
-        context = DatabaseSchemaParser.extract_databases_and_schemas(text)
+        rel_path = file_info["path"]
         
         # Aggregate databases and schemas
         all_databases.update(context.databases)
@@ -439,49 +486,32 @@ def extract_databases_from_repository(
                 files_by_database[db] = []
             files_by_database[db].append(rel_path)
         
-        # Add file reference to each table reference
         for src_table in context.source_tables:
-            table_dict = src_table.to_dict()
-            table_dict["file"] = rel_path
-            all_source_tables.append(table_dict)
-            
-            # Track tables by database (only non-variable databases)
-            if src_table.database and not DatabaseSchemaParser.ALL_VAR_RE.search(src_table.database):
-                if src_table.database not in tables_by_database:
-                    tables_by_database[src_table.database] = set()
-                tables_by_database[src_table.database].add(src_table.table)
-        
+            store.add(src_table, rel_path, target=False)
         for tgt_table in context.target_tables:
-            table_dict = tgt_table.to_dict()
-            table_dict["file"] = rel_path
-            all_target_tables.append(table_dict)
-            
-            # Track tables by database (only non-variable databases)
-            if tgt_table.database and not DatabaseSchemaParser.ALL_VAR_RE.search(tgt_table.database):
-                if tgt_table.database not in tables_by_database:
-                    tables_by_database[tgt_table.database] = set()
-                tables_by_database[tgt_table.database].add(tgt_table.table)
+            store.add(tgt_table, rel_path, target=True)
     
-    # Convert sets to sorted lists for JSON serialization
+    # Track tables by database (only non-variable databases)
     tables_by_db_list = {
-        db: sorted(list(tables))
-        for db, tables in tables_by_database.items()
+        db: store.tables_in_database(db)
+        for db in store.databases()
+        if not DatabaseSchemaParser.ALL_VAR_RE.search(db)
     }
     
     return {
         "databases": sorted(list(all_databases)),
         "schemas": sorted(list(all_schemas)),
-        "source_tables": all_source_tables,
-        "target_tables": all_target_tables,
+        "source_tables": store.source_tables,
+        "target_tables": store.target_tables,
         "files_by_database": files_by_database,
         "tables_by_database": tables_by_db_list,
         "variables_found": sorted(list(all_variables)),
         "summary": {
             "total_databases": len(all_databases),
             "total_schemas": len(all_schemas),
-            "total_source_table_refs": len(all_source_tables),
-            "total_target_table_refs": len(all_target_tables),
-            "databases_with_tables": len(tables_by_database),
+            "total_source_table_refs": len(store.source_tables),
+            "total_target_table_refs": len(store.target_tables),
+            "databases_with_tables": len(tables_by_db_list),
             "total_variables": len(all_variables)
         }
     }
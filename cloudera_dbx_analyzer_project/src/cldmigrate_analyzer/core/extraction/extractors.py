@@ -1,6 +1,11 @@
 import re
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from ...utils.redaction import redact_value
+from ..discovery.content_store import ContentStore
+from ..discovery.windows import Window
+from .registry import compile_many, compiled_patterns, finding_patterns, patterns_digest
+from ..pipeline.engine import Document, FileAnalyzer, run_analyzers
+from ..pipeline.parallel import WorkerPool
 
 VAR_RE = re.compile(r"\$\{([^}]+)\}")
 WFCONF_RE = re.compile(r"\$\{\s*wf:conf\('([^']+)'\)\s*\}")
@@ -44,311 +49,301 @@ def has_dynamic_sql(text: str) -> bool:
 
 def find_patterns(text: str, patterns: List[str]) -> List[str]:
     out = []
-    for p in patterns:
-        try:
-            rx = re.compile(p)
-        except re.error:
-            continue
+    for _, rx in compile_many(patterns):
         for m in rx.finditer(text or ""):
             val = m.group(0)
             out.append(val)
     return out
 
-from pathlib import Path
-from typing import Any, Dict, List, Tuple
 
-def scan_repo_patterns(repo_root: Path, files_index: List[Dict[str, Any]], patterns: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Repo-level pattern scan (connections/urls/paths) producing the same structure used in report.
-    patterns is the dict returned by config.loader.load_patterns():
-      {secrets:..., connections:..., paths:..., languages:...}
-    """
-    con = (patterns or {}).get("connections", {}) or {}
-    pth = (patterns or {}).get("paths", {}) or {}
-
-    jdbc_patterns = con.get("jdbc_patterns", []) or []
-    url_patterns = con.get("url_patterns", []) or []
-    kafka_patterns = con.get("kafka_bootstrap_patterns", []) or []
-    storage_patterns = pth.get("storage_path_patterns", []) or []
-
-    # compile regex safely
-    def _compile_many(rx_list: List[str]) -> List[Tuple[str, Any]]:
-        out = []
-        import re
-        for p in rx_list:
-            try:
-                out.append((p, re.compile(p)))
-            except re.error:
-                continue
-        return out
+class PatternFindingsAnalyzer(FileAnalyzer):
+    """Engine plugin for scan_repo_patterns (JDBC, URLs, Kafka, storage paths)."""
 
-    jdbc_rx = _compile_many(jdbc_patterns)
-    url_rx = _compile_many(url_patterns)
-    kafka_rx = _compile_many(kafka_patterns)
-    storage_rx = _compile_many(storage_patterns)
-
-    findings = {
-        "jdbc_strings": [],
-        "urls": [],
-        "kafka_bootstrap_hints": [],
-        "storage_paths": [],
-        "jdbc_count": 0,
-        "url_count": 0,
-        "kafka_bootstrap_count": 0,
-        "storage_path_count": 0,
-    }
-
-    def _scan_lines(rel_path: str, text: str):
-        lines = text.splitlines()
-        for i, line in enumerate(lines, start=1):
-            # JDBC
-            for _, rx in jdbc_rx:
-                for m in rx.finditer(line):
-                    findings["jdbc_strings"].append(
-                        {"value": m.group(0), "file": rel_path, "line": i, "confidence": "high"}
-                    )
-            # URLs
-            for _, rx in url_rx:
-                for m in rx.finditer(line):
-                    findings["urls"].append(
-                        {"value": m.group(0), "file": rel_path, "line": i, "confidence": "high"}
-                    )
-            # Kafka bootstrap (prefer capture group 1 if present)
-            for _, rx in kafka_rx:
-                for m in rx.finditer(line):
-                    v = m.group(1) if m.lastindex and m.lastindex >= 1 else m.group(0)
-                    findings["kafka_bootstrap_hints"].append(
-                        {"value": v, "file": rel_path, "line": i, "confidence": "high"}
-                    )
-            # Storage paths
-            for _, rx in storage_rx:
-                for m in rx.finditer(line):
-                    findings["storage_paths"].append(
-                        {"value": m.group(0), "file": rel_path, "line": i, "confidence": "high"}
-                    )
+    name = "findings"
 
-    for f in files_index or []:
-        rel = f.get("path")
-        if not rel:
-            continue
-        p = repo_root / rel
-        try:
-            text = p.read_text(encoding="utf-8", errors="replace")
-        except Exception:
-            continue
-        _scan_lines(rel, text)
+    def __init__(self, patterns: Dict[str, Any]):
+        # Only the config travels to workers; each compiles it once (registry)
+        self.patterns = finding_patterns(patterns)
+        self.digest = patterns_digest(self.patterns)
 
-    findings["jdbc_count"] = len(findings["jdbc_strings"])
-    findings["url_count"] = len(findings["urls"])
-    findings["kafka_bootstrap_count"] = len(findings["kafka_bootstrap_hints"])
-    findings["storage_path_count"] = len(findings["storage_paths"])
-    return findings
+    @classmethod
+    def from_config(cls, patterns: Dict[str, Any], options: Dict[str, Any]) -> "PatternFindingsAnalyzer":
+        return cls(patterns)
 
+    windowed = True
 
-from pathlib import Path
-from typing import Any, Dict, List, Tuple
-
-def scan_repo_patterns(repo_root: Path, files_index: List[Dict[str, Any]], patterns: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Repo-level pattern scan (connections/urls/paths) producing the same structure used in report.
-    patterns is the dict returned by config.loader.load_patterns():
-      {secrets:..., connections:..., paths:..., languages:...}
-    """
-    con = (patterns or {}).get("connections", {}) or {}
-    pth = (patterns or {}).get("paths", {}) or {}
-
-    jdbc_patterns = con.get("jdbc_patterns", []) or []
-    url_patterns = con.get("url_patterns", []) or []
-    kafka_patterns = con.get("kafka_bootstrap_patterns", []) or []
-    storage_patterns = pth.get("storage_path_patterns", []) or []
-
-    # compile regex safely
-    def _compile_many(rx_list: List[str]) -> List[Tuple[str, Any]]:
-        out = []
-        import re
-        for p in rx_list:
-            try:
-                out.append((p, re.compile(p)))
-            except re.error:
-                continue
+    def visit(self, doc: Document) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        try:
+            text = doc.text
+        except Exception:
+            return None
+        return self._scan_text(doc.rel, text)
+
+    def visit_window(self, doc: Document, window: Window) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        return self._scan_text(doc.rel, window.text, first_line=window.first_line)
+
+    def merge_windows(self, parts: List[Any]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        out: Dict[str, List[Dict[str, Any]]] = {
+            "jdbc_strings": [],
+            "urls": [],
+            "kafka_bootstrap_hints": [],
+            "storage_paths": [],
+        }
+        for part in parts:
+            for k, items in (part or {}).items():
+                out[k].extend(items)
         return out
 
-    jdbc_rx = _compile_many(jdbc_patterns)
-    url_rx = _compile_many(url_patterns)
-    kafka_rx = _compile_many(kafka_patterns)
-    storage_rx = _compile_many(storage_patterns)
-
-    findings = {
-        "jdbc_strings": [],
-        "urls": [],
-        "kafka_bootstrap_hints": [],
-        "storage_paths": [],
-        "jdbc_count": 0,
-        "url_count": 0,
-        "kafka_bootstrap_count": 0,
-        "storage_path_count": 0,
-    }
-
-    def _scan_lines(rel_path: str, text: str):
-        lines = text.splitlines()
-        for i, line in enumerate(lines, start=1):
+    def _scan_text(
+        self, rel: Optional[str], text: str, first_line: int = 1
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        # Only lines holding a required literal of some pattern are matched
+        # line by line; see pattern_set.PatternSet
+        compiled = compiled_patterns(self.patterns, self.digest)
+        (_, jdbc_rx), (_, url_rx), (_, kafka_rx), (_, storage_rx) = compiled.findings
+        out: Dict[str, List[Dict[str, Any]]] = {
+            "jdbc_strings": [],
+            "urls": [],
+            "kafka_bootstrap_hints": [],
+            "storage_paths": [],
+        }
+
+        for i, line in compiled.pattern_set.candidate_lines(text):
+            i += first_line
             # JDBC
             for _, rx in jdbc_rx:
                 for m in rx.finditer(line):
-                    findings["jdbc_strings"].append(
-                        {"value": m.group(0), "file": rel_path, "line": i, "confidence": "high"}
+                    out["jdbc_strings"].append(
+                        {"value": m.group(0), "file": rel, "line": i, "confidence": "high"}
                     )
             # URLs
             for _, rx in url_rx:
                 for m in rx.finditer(line):
-                    findings["urls"].append(
-                        {"value": m.group(0), "file": rel_path, "line": i, "confidence": "high"}
+                    out["urls"].append(
+                        {"value": m.group(0), "file": rel, "line": i, "confidence": "high"}
                     )
             # Kafka bootstrap (prefer capture group 1 if present)
             for _, rx in kafka_rx:
                 for m in rx.finditer(line):
                     v = m.group(1) if m.lastindex and m.lastindex >= 1 else m.group(0)
-                    findings["kafka_bootstrap_hints"].append(
-                        {"value": v, "file": rel_path, "line": i, "confidence": "high"}
+                    out["kafka_bootstrap_hints"].append(
+                        {"value": v, "file": rel, "line": i, "confidence": "high"}
                     )
             # Storage paths
             for _, rx in storage_rx:
                 for m in rx.finditer(line):
-                    findings["storage_paths"].append(
-                        {"value": m.group(0), "file": rel_path, "line": i, "confidence": "high"}
+                    out["storage_paths"].append(
+                        {"value": m.group(0), "file": rel, "line": i, "confidence": "high"}
                     )
+        return out
 
-    for f in files_index or []:
-        rel = f.get("path")
-        if not rel:
-            continue
-        p = repo_root / rel
-        try:
-            text = p.read_text(encoding="utf-8", errors="replace")
-        except Exception:
-            continue
-        _scan_lines(rel, text)
+    def fan_out(self, result: Any, source: Dict[str, Any], target: Dict[str, Any]) -> Any:
+        if not result:
+            return result
+        rel = target["path"]
+        return {k: [dict(item, file=rel) for item in items] for k, items in result.items()}
+
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> Dict[str, Any]:
+        findings = {
+            "jdbc_strings": [],
+            "urls": [],
+            "kafka_bootstrap_hints": [],
+            "storage_paths": [],
+            "jdbc_count": 0,
+            "url_count": 0,
+            "kafka_bootstrap_count": 0,
+            "storage_path_count": 0,
+        }
+
+        for _, res in visited:
+            if not res:
+                continue
+            for k, items in res.items():
+                findings[k].extend(items)
+
+        findings["jdbc_count"] = len(findings["jdbc_strings"])
+        findings["url_count"] = len(findings["urls"])
+        findings["kafka_bootstrap_count"] = len(findings["kafka_bootstrap_hints"])
+        findings["storage_path_count"] = len(findings["storage_paths"])
+        return findings
+
+
+def scan_repo_patterns(
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    patterns: Dict[str, Any],
+    pool: Optional[WorkerPool] = None,
+) -> Dict[str, Any]:
+    """
+    Repo-level pattern scan (connections/urls/paths) producing the same structure used in report.
+    patterns is the dict returned by config.loader.load_patterns():
+      {secrets:..., connections:..., paths:..., languages:...}
+    """
+    analyzer = PatternFindingsAnalyzer(patterns)
+    return run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
 
-    findings["jdbc_count"] = len(findings["jdbc_strings"])
-    findings["url_count"] = len(findings["urls"])
-    findings["kafka_bootstrap_count"] = len(findings["kafka_bootstrap_hints"])
-    findings["storage_path_count"] = len(findings["storage_paths"])
-    return findings
 
+class LineageAnalyzer(FileAnalyzer):
+    """Engine plugin for extract_sql_lineage_repo."""
 
-from pathlib import Path
-from typing import Any, Dict, List
+    name = "lineage"
+    # Only scan likely query/code files; keep it safe and fast
+    file_types = frozenset({
+        "sql", "hql", "impala_sql", "oozie_workflow_xml", "oozie_coordinator_xml",
+        "notebook_zeppelin", "notebook_jupyter", "python", "scala", "java", "shell", "xml_generic"
+    })
 
-def extract_sql_lineage_repo(repo_root: Path, files_index: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Repo-level lineage extraction wrapper.
-    Calls existing extract_sql_lineage(text) per file, and attaches evidence_file.
-    """
-    out: List[Dict[str, Any]] = []
-
-    for f in files_index or []:
-        rel = f.get("path")
-        if not rel:
-            continue
-
-        # Only scan likely query/code files; keep it safe and fast
-        t = (f.get("detected_type") or "").lower()
-        if t not in {
-            "sql", "hql", "impala_sql", "oozie_workflow_xml", "oozie_coordinator_xml",
-            "notebook_zeppelin", "notebook_jupyter", "python", "scala", "java", "shell", "xml_generic"
-        }:
-            continue
-
-        p = repo_root / rel
+    def visit(self, doc: Document) -> Any:
         try:
-            text = p.read_text(encoding="utf-8", errors="replace")
+            text = doc.text
         except Exception:
-            continue
+            return None
 
         try:
-            recs = extract_sql_lineage(text)  # <-- your existing function (takes 1 arg)
+            return extract_sql_lineage(text)  # <-- your existing function (takes 1 arg)
         except Exception:
-            continue
+            return None
+
+    windowed = True
 
-        if not recs:
-            continue
+    def visit_window(self, doc: Document, window: Window) -> Any:
+        try:
+            return extract_sql_lineage(window.span_text)
+        except Exception:
+            return None
+
+    def merge_windows(self, parts: List[Any]) -> Any:
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return None
+        return {
+            "sources": sorted({t for p in parts for t in p["sources"]}),
+            "targets": sorted({t for p in parts for t in p["targets"]}),
+        }
+
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+
+        for f, recs in visited:
+            if not recs:
+                continue
 
-        for r in recs:
-            if isinstance(r, dict):
-                rr = dict(r)
-                rr.setdefault("evidence_file", rel)
-                out.append(rr)
+            rel = f["path"]
+            for r in recs:
+                if isinstance(r, dict):
+                    rr = dict(r)
+                    rr.setdefault("evidence_file", rel)
+                    out.append(rr)
 
-    return out
+        return out
 
-from pathlib import Path
-from typing import Any, Dict, List
 
-def extract_variables_repo(repo_root: Path, files_index: List[Dict[str, Any]]) -> Dict[str, Any]:
+def extract_sql_lineage_repo(
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    pool: Optional[WorkerPool] = None,
+) -> List[Dict[str, Any]]:
     """
-    Repo-level variable extraction wrapper.
-    Calls existing extract_variables(text) per file and merges results.
+    Repo-level lineage extraction wrapper.
+    Calls existing extract_sql_lineage(text) per file, and attaches evidence_file.
     """
-    merged = {
-        "placeholders": {},   # var -> count
-        "examples": {},       # var -> example strings (limited)
-        "by_file": {},        # file -> [vars]
-    }
-
-    def _add_var(var: str, example: str | None, rel: str):
-        merged["placeholders"][var] = merged["placeholders"].get(var, 0) + 1
-        if example and var not in merged["examples"]:
-            merged["examples"][var] = example
-        merged["by_file"].setdefault(rel, [])
-        if var not in merged["by_file"][rel]:
-            merged["by_file"][rel].append(var)
+    analyzer = LineageAnalyzer()
+    return run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
 
-    for f in files_index or []:
-        rel = f.get("path")
-        if not rel:
-            continue
 
-        # Scan broadly; variables appear everywhere (xml, props, py, sql, etc.)
-        p = repo_root / rel
+class VariablesAnalyzer(FileAnalyzer):
+    """Engine plugin for extract_variables_repo."""
+
+    # Scan broadly; variables appear everywhere (xml, props, py, sql, etc.)
+    name = "variables"
+
+    def visit(self, doc: Document) -> Any:
         try:
-            text = p.read_text(encoding="utf-8", errors="replace")
+            text = doc.text
         except Exception:
-            continue
+            return None
 
         try:
-            res = extract_variables(text)  # <-- existing single-text function
+            return extract_variables(text)  # <-- existing single-text function
         except Exception:
-            continue
-
-        # Support a few possible return shapes safely
-        if isinstance(res, dict):
-            # if res already has list/set under common keys
-            vars_list = None
-            for k in ("variables", "placeholders", "vars"):
-                if k in res and isinstance(res[k], (list, set, tuple)):
-                    vars_list = list(res[k])
-                    break
-            if vars_list is None:
-                # if dict is var->count or var->example
-                # treat keys as variable names
-                vars_list = [k for k in res.keys() if isinstance(k, str)]
-
-            for v in vars_list:
-                if isinstance(v, str) and v:
-                    _add_var(v, None, rel)
-
-        elif isinstance(res, (list, set, tuple)):
-            for v in res:
-                if isinstance(v, str) and v:
-                    _add_var(v, None, rel)
+            return None
 
-        elif isinstance(res, str):
-            # single var
-            _add_var(res, None, rel)
+    windowed = True
 
-    merged["total_unique"] = len(merged["placeholders"])
-    merged["total_occurrences"] = sum(merged["placeholders"].values())
-    return merged
+    def visit_window(self, doc: Document, window: Window) -> Any:
+        try:
+            return extract_variables(window.span_text)
+        except Exception:
+            return None
+
+    def merge_windows(self, parts: List[Any]) -> Any:
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return None
+        return sorted({v for p in parts for v in p})
+
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> Dict[str, Any]:
+        merged = {
+            "placeholders": {},   # var -> count
+            "examples": {},       # var -> example strings (limited)
+            "by_file": {},        # file -> [vars]
+        }
+
+        def _add_var(var: str, example: str | None, rel: str):
+            merged["placeholders"][var] = merged["placeholders"].get(var, 0) + 1
+            if example and var not in merged["examples"]:
+                merged["examples"][var] = example
+            merged["by_file"].setdefault(rel, [])
+            if var not in merged["by_file"][rel]:
+                merged["by_file"][rel].append(var)
+
+        for f, res in visited:
+            if res is None:
+                continue
+            rel = f["path"]
+
+            # Support a few possible return shapes safely
+            if isinstance(res, dict):
+                # if res already has list/set under common keys
+                vars_list = None
+                for k in ("variables", "placeholders", "vars"):
+                    if k in res and isinstance(res[k], (list, set, tuple)):
+                        vars_list = list(res[k])
+                        break
+                if vars_list is None:
+                    # if dict is var->count or var->example
+                    # treat keys as variable names
+                    vars_list = [k for k in res.keys() if isinstance(k, str)]
+
+                for v in vars_list:
+                    if isinstance(v, str) and v:
+                        _add_var(v, None, rel)
+
+            elif isinstance(res, (list, set, tuple)):
+                for v in res:
+                    if isinstance(v, str) and v:
+                        _add_var(v, None, rel)
+
+            elif isinstance(res, str):
+                # single var
+                _add_var(res, None, rel)
+
+        merged["total_unique"] = len(merged["placeholders"])
+        merged["total_occurrences"] = sum(merged["placeholders"].values())
+        return merged
+
+
+def extract_variables_repo(
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    pool: Optional[WorkerPool] = None,
+) -> Dict[str, Any]:
+    """
+    Repo-level variable extraction wrapper.
+    Calls existing extract_variables(text) per file and merges results.
+    """
+    analyzer = VariablesAnalyzer()
+    return run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
 
 
 from typing import Any, Dict, List
@@ -388,40 +383,52 @@ def has_streaming_repo(files_index: List[Dict[str, Any]], workflows_blob: Dict[s
 
     return False
 
-from pathlib import Path
-from typing import Any, Dict, List
+class DynamicSqlAnalyzer(FileAnalyzer):
+    """Engine plugin for has_dynamic_sql_repo."""
 
-def has_dynamic_sql_repo(repo_root: Path, files_index: List[Dict[str, Any]]) -> bool:
-    """
-    Repo-level dynamic SQL detector.
-    Uses existing has_dynamic_sql(text) by scanning text content of likely files.
-    """
-    for f in files_index or []:
-        rel = f.get("path")
-        if not rel:
-            continue
-
-        # Limit to likely code/query/config files
-        t = (f.get("detected_type") or "").lower()
-        if t not in {
-            "sql", "hql", "impala_sql", "python", "scala", "java", "shell",
-            "oozie_workflow_xml", "oozie_coordinator_xml", "xml_generic",
-            "properties", "ini_conf", "notebook_zeppelin", "notebook_jupyter"
-        }:
-            continue
-
-        p = repo_root / rel
+    name = "dynamic_sql"
+    # Limit to likely code/query/config files
+    file_types = frozenset({
+        "sql", "hql", "impala_sql", "python", "scala", "java", "shell",
+        "oozie_workflow_xml", "oozie_coordinator_xml", "xml_generic",
+        "properties", "ini_conf", "notebook_zeppelin", "notebook_jupyter"
+    })
+
+    def visit(self, doc: Document) -> bool:
         try:
-            text = p.read_text(encoding="utf-8", errors="replace")
+            text = doc.text
         except Exception:
-            continue
+            return False
 
         try:
-            if has_dynamic_sql(text):
-                return True
+            return has_dynamic_sql(text)
         except Exception:
             # if regex fails for any reason, just keep scanning
-            continue
+            return False
 
-    return False
+    windowed = True
+
+    def visit_window(self, doc: Document, window: Window) -> bool:
+        try:
+            return has_dynamic_sql(window.span_text)
+        except Exception:
+            return False
+
+    def merge_windows(self, parts: List[Any]) -> bool:
+        return any(parts)
 
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> bool:
+        return any(hit for _, hit in visited)
+
+
+def has_dynamic_sql_repo(
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    pool: Optional[WorkerPool] = None,
+) -> bool:
+    """
+    Repo-level dynamic SQL detector.
+    Uses existing has_dynamic_sql(text) by scanning text content of likely files.
+    """
+    analyzer = DynamicSqlAnalyzer()
+    return run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
@@ -0,0 +1,169 @@
+"""
+Multi-pattern line scanning for the repo pattern findings.
+
+Running every configured regex over every line costs O(lines x patterns)
+``finditer`` calls, nearly all of them fruitless. PatternSet narrows the work
+to the lines that can match:
+
+- each pattern's required literal (``jdbc:``, ``http``, ``bootstrap.servers``,
+  ``/user/``, ...) is derived from the regex itself;
+- the literals are searched over the whole text with ``str.find`` (on a
+  case-folded copy for case-insensitive patterns), which beats a single
+  regex alternation of them several times over; the alternation is kept
+  for literals that are not ASCII;
+- hit offsets map to line numbers through a newline-offset index, built only
+  once the text has a hit, with ``bisect``;
+- the original patterns then run on those candidate lines only, in order.
+
+A line without any required literal cannot match any pattern, so results are
+the same as the per-line loop, overlapping matches of different patterns
+included. A pattern without a derivable literal disables the prefilter.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+# Line boundaries of str.splitlines()
+_LINE_BREAK_RE = re.compile(r"\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+_LINE_BREAK_CHARS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+# The only non-ASCII characters re.IGNORECASE matches against ASCII ones
+# (dotted/dotless i, long s, Kelvin sign); folding them first makes
+# ``str.lower()`` agree with the regex on ASCII literals and keeps offsets
+_ASCII_FOLD = {0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+
+
+def required_literal(pattern: str) -> Optional[Tuple[str, bool]]:
+    """
+    Longest literal every match of ``pattern`` must contain, with whether it
+    is matched case-insensitively; None when there is none.
+
+    Only top-level literal runs count: anything inside groups, alternations
+    or repeats may be skipped by a match.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    literal_op = _sre_parse.LITERAL
+    best = ""
+    run: List[str] = []
+    for op, arg in list(parsed) + [(None, None)]:
+        ch = chr(arg) if op is literal_op else None
+        if ch is not None and ch not in _LINE_BREAK_CHARS:
+            run.append(ch)
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    if not best:
+        return None
+    return best, bool(parsed.state.flags & re.IGNORECASE)
+
+
+class LineIndex:
+    """Line numbers of text offsets, consistent with ``text.splitlines()``."""
+
+    __slots__ = ("text", "starts", "_ends")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.starts = [0]
+        self._ends: List[int] = []
+        for m in _LINE_BREAK_RE.finditer(text):
+            self._ends.append(m.start())
+            self.starts.append(m.end())
+        self._ends.append(len(text))
+
+    def line_of(self, pos: int) -> int:
+        """0-based index of the line holding offset ``pos``."""
+        return bisect_right(self.starts, pos) - 1
+
+    def line(self, index: int) -> str:
+        return self.text[self.starts[index]:self._ends[index]]
+
+
+class PatternSet:
+    """
+    Required-literal prefilter over a sequence of regexes.
+
+    Usage:
+        ps = PatternSet(["(?i)jdbc:hive2://[^\\s]+", ...])
+        for i, line in ps.candidate_lines(text):
+            ...  # i is 0-based, as in enumerate(text.splitlines())
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        literals = []
+        for p in patterns:
+            lit = required_literal(p)
+            if lit is None:
+                literals = None
+                break
+            literals.append(lit)
+        self.literals: Optional[List[Tuple[str, bool]]] = literals
+        self.needles: List[Tuple[str, bool]] = []
+        self.prefilter: Optional[re.Pattern] = None
+        if not literals:
+            return
+        # A literal containing another one (same case handling) adds no lines
+        needles = sorted({(s.lower() if icase else s, icase) for s, icase in literals}, key=lambda t: len(t[0]))
+        for s, icase in needles:
+            if not any(icase == k and n in s for n, k in self.needles):
+                self.needles.append((s, icase))
+        if not all(s.isascii() for s, _ in self.needles):
+            self.prefilter = re.compile(
+                "|".join(f"(?i:{re.escape(s)})" if icase else re.escape(s) for s, icase in self.needles)
+            )
+
+    def candidate_lines(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (index, line) for the lines of ``text`` that may match a pattern."""
+        if self.literals is None:
+            yield from enumerate(text.splitlines())
+            return
+        index: Optional[LineIndex] = None
+        hits = set()
+        for hay, needle in self._haystacks(text):
+            pos = hay.find(needle) if isinstance(needle, str) else _search_start(needle, hay, 0)
+            while pos >= 0:
+                if index is None:
+                    index = LineIndex(text)
+                i = index.line_of(pos)
+                hits.add(i)
+                if i + 1 >= len(index.starts):
+                    break
+                nxt = index.starts[i + 1]
+                pos = hay.find(needle, nxt) if isinstance(needle, str) else _search_start(needle, hay, nxt)
+        for i in sorted(hits):
+            yield i, index.line(i)
+
+    def _haystacks(self, text: str) -> Iterator[Tuple[str, Union[str, re.Pattern]]]:
+        """(text to search, literal or alternation) pairs covering every needle."""
+        if self.prefilter is not None:
+            yield text, self.prefilter
+            return
+        folded: Optional[str] = None
+        for needle, icase in self.needles:
+            if not icase:
+                yield text, needle
+                continue
+            if folded is None:
+                folded = text.lower() if text.isascii() else text.translate(_ASCII_FOLD).lower()
+                if len(folded) != len(text):  # not expected; keep offsets exact
+                    folded = ""
+            if folded:
+                yield folded, needle
+            elif text:
+                yield text, re.compile(re.escape(needle), re.IGNORECASE)
+
+
+def _search_start(rx: re.Pattern, text: str, pos: int) -> int:
+    m = rx.search(text, pos)
+    return m.start() if m is not None else -1
@@ -0,0 +1,175 @@
+"""
+Registry of the engine's extractor plugins and their compiled patterns.
+
+- ``compiled_patterns``: the regexes of config/patterns/*.yml, compiled once
+  per process and cached by the content hash of the pattern config. Plugins
+  carry only the config and its digest to worker processes.
+- ``EXTRACTORS``: every plugin analyze_repository runs, registered with its
+  name, a factory taking the pattern config and the run options, the
+  detected types it applies to and a relative cost estimate. The
+  cost weights worker shards (see engine.run_analyzers) and is checked by
+  the benchmark harness (core/extraction/bench.py).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from ..pipeline.engine import FileAnalyzer
+from .pattern_set import PatternSet
+
+# findings key -> (patterns.yml section, list key), in findings order
+FINDING_PATTERNS: Tuple[Tuple[str, str, str], ...] = (
+    ("jdbc_strings", "connections", "jdbc_patterns"),
+    ("urls", "connections", "url_patterns"),
+    ("kafka_bootstrap_hints", "connections", "kafka_bootstrap_patterns"),
+    ("storage_paths", "paths", "storage_path_patterns"),
+)
+
+
+def patterns_digest(patterns: Dict[str, Any]) -> str:
+    """Content hash of a pattern config."""
+    blob = json.dumps(patterns or {}, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def finding_patterns(patterns: Dict[str, Any]) -> Dict[str, Dict[str, List[str]]]:
+    """The part of ``load_patterns()`` output the findings scan uses."""
+    out: Dict[str, Dict[str, List[str]]] = {}
+    for _, section, key in FINDING_PATTERNS:
+        values = ((patterns or {}).get(section, {}) or {}).get(key, []) or []
+        out.setdefault(section, {})[key] = list(values)
+    return out
+
+
+def compile_many(rx_list: Sequence[str]) -> List[Tuple[str, re.Pattern]]:
+    """Compile regexes, skipping invalid ones."""
+    out = []
+    for p in rx_list:
+        try:
+            out.append((p, re.compile(p)))
+        except re.error:
+            continue
+    return out
+
+
+class CompiledPatterns:
+    """Compiled findings regexes of one pattern config."""
+
+    __slots__ = ("digest", "findings", "pattern_set")
+
+    def __init__(self, patterns: Dict[str, Any], digest: str):
+        self.digest = digest
+        # [(findings key, [(source, compiled), ...]), ...] in findings order
+        self.findings: List[Tuple[str, List[Tuple[str, re.Pattern]]]] = [
+            (name, compile_many(((patterns or {}).get(section, {}) or {}).get(key, []) or []))
+            for name, section, key in FINDING_PATTERNS
+        ]
+        self.pattern_set = PatternSet([p for _, rx in self.findings for p, _ in rx])
+
+
+_COMPILED: Dict[str, CompiledPatterns] = {}
+
+
+def compiled_patterns(patterns: Dict[str, Any], digest: Optional[str] = None) -> CompiledPatterns:
+    """
+    Compiled form of ``patterns``, built once per process per content hash.
+    Pass ``digest`` (from ``patterns_digest``) to skip rehashing.
+    """
+    if digest is None:
+        digest = patterns_digest(patterns)
+    compiled = _COMPILED.get(digest)
+    if compiled is None:
+        compiled = _COMPILED[digest] = CompiledPatterns(patterns, digest)
+    return compiled
+
+
+@dataclass(frozen=True)
+class ExtractorSpec:
+    """
+    One registered engine plugin.
+
+    ``cost`` is the visit time per byte relative to the counts plugin,
+    measured with the benchmark harness; ``file_types`` None means the plugin
+    decides per file (``accepts``).
+    """
+
+    name: str
+    factory: Callable[[Dict[str, Any], Dict[str, Any]], FileAnalyzer]
+    file_types: Optional[FrozenSet[str]]
+    cost: float = 1.0
+
+
+EXTRACTORS: Dict[str, ExtractorSpec] = {}
+_builtins_registered = False
+
+
+def register_extractor(
+    name: str,
+    factory: Callable[[Dict[str, Any], Dict[str, Any]], FileAnalyzer],
+    file_types: Optional[FrozenSet[str]] = None,
+    cost: float = 1.0,
+) -> ExtractorSpec:
+    """Register (or replace) a plugin; ``factory(patterns, options)`` builds it."""
+    spec = ExtractorSpec(name, factory, file_types, float(cost))
+    EXTRACTORS[name] = spec
+    return spec
+
+
+def _register_builtins() -> None:
+    # The plugin modules import this one, so they are imported late
+    global _builtins_registered
+    _builtins_registered = True
+    from ..metrics.counts import CountsAnalyzer
+    from ..parsing.oozie.analyzer import OozieAnalyzer
+    from .extractors import DynamicSqlAnalyzer, LineageAnalyzer, PatternFindingsAnalyzer, VariablesAnalyzer
+    from .database_schema_parser import DatabaseContextAnalyzer
+    from .sql_complexity_analyzer import SQLComplexityFileAnalyzer
+    from ..resolution.resolver import DefinitionsAnalyzer
+
+    # Costs measured with bench.py on SQL/XML-heavy sample repositories
+    builtins = (
+        (CountsAnalyzer, 1.0),
+        (OozieAnalyzer, 20.0),
+        (PatternFindingsAnalyzer, 1.5),
+        (LineageAnalyzer, 20.0),
+        (DatabaseContextAnalyzer, 50.0),
+        (SQLComplexityFileAnalyzer, 120.0),
+        (VariablesAnalyzer, 0.5),
+        (DynamicSqlAnalyzer, 3.0),
+        (DefinitionsAnalyzer, 8.0),
+    )
+    for cls, cost in builtins:
+        if cls.name in EXTRACTORS:
+            continue
+        register_extractor(cls.name, cls.from_config, cls.file_types, cost)
+
+
+def extractor_specs(names: Optional[Sequence[str]] = None) -> List[ExtractorSpec]:
+    """Registered plugins in registration order (or in ``names`` order)."""
+    if not _builtins_registered:
+        _register_builtins()
+    if names is None:
+        return list(EXTRACTORS.values())
+    return [EXTRACTORS[n] for n in names]
+
+
+def build_extractors(
+    patterns: Dict[str, Any],
+    names: Optional[Sequence[str]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> List[FileAnalyzer]:
+    """
+    Instantiate the registered plugins, each carrying its registered cost.
+    ``options`` are run options plugins may read (e.g. sql_cache_entries).
+    """
+    out = []
+    for spec in extractor_specs(names):
+        analyzer = spec.factory(patterns, options or {})
+        analyzer.cost = spec.cost
+        out.append(analyzer)
+    return out
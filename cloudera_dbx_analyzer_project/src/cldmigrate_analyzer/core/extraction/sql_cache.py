@@ -0,0 +1,149 @@
+"""
+Memo of SQL statement analyses keyed by normalized statement hash.
+
+Generated ETL repositories repeat the same statement shapes thousands of
+times, differing only in whitespace, comments, ``${hiveconf:...}`` values or
+literals. SQLComplexityAnalyzer hashes each statement's normalized token
+stream (see ``SQLComplexityAnalyzer.normalize_query``) and looks the hash up
+here before analyzing it:
+
+- an in-memory LRU bounded to ``max_entries`` results, one per process
+  (``statement_cache`` hands every plugin instance of a process the same one);
+- optionally a SQLite file shared by all processes and runs. Worker
+  processes write through it, so entries survive ``os._exit``; it needs a
+  local filesystem (SQLite locking does not work on /dbfs).
+
+Persisted entries are dropped when STATEMENT_CACHE_VERSION changes. They are
+stored as JSON (``SQLComplexityResult.to_dict``), never pickled, so a shared
+cache file cannot run code in the processes that load it.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Bump when SQLComplexityAnalyzer results change for the same statement
+STATEMENT_CACHE_VERSION = 2
+
+STATEMENT_CACHE_FILENAME = "sql_statement_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statements (
+    key    TEXT PRIMARY KEY,
+    result TEXT NOT NULL
+);
+"""
+
+
+class StatementCache:
+    """
+    Bounded LRU from statement hash to analysis result, optionally backed by
+    SQLite.
+
+    Usage:
+        cache = StatementCache(max_entries=4096, db_path="sql_statement_cache.sqlite")
+        result = cache.get(key)
+        if result is None:
+            cache.put(key, analyze(...))
+    """
+
+    def __init__(self, max_entries: int = 4096, db_path: Optional[Union[str, Path]] = None):
+        self.max_entries = max(0, int(max_entries))
+        self.db_path = Path(db_path) if db_path else None
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.db_path is not None:
+            self._open()
+
+    def _open(self) -> None:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != str(STATEMENT_CACHE_VERSION):
+                conn.execute("DELETE FROM statements")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (str(STATEMENT_CACHE_VERSION),),
+                )
+        except (OSError, sqlite3.Error):
+            return  # persistence is best effort: keep the in-memory LRU
+        self._conn = conn
+
+    @property
+    def persistent(self) -> bool:
+        return self._conn is not None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached result for ``key``, or None."""
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+        if self._conn is not None:
+            try:
+                row = self._conn.execute("SELECT result FROM statements WHERE key = ?", (key,)).fetchone()
+                result = _from_json(row[0]) if row is not None else None
+            except Exception:
+                result = None
+            if result is not None:
+                self._remember(key, result)
+                self.stats["disk_hits"] += 1
+                return result
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, result: Any) -> None:
+        self._remember(key, result)
+        if self._conn is not None:
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO statements (key, result) VALUES (?, ?)",
+                    (key, json.dumps(result.to_dict(), separators=(",", ":"))),
+                )
+            except (sqlite3.Error, TypeError, ValueError):
+                pass
+
+    def _remember(self, key: str, result: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _from_json(blob: Union[str, bytes]) -> Any:
+    # Imported here: sql_complexity_analyzer imports this module
+    from .sql_complexity_analyzer import SQLComplexityResult
+    return SQLComplexityResult.from_dict(json.loads(blob))
+
+
+_CACHES: Dict[Tuple[int, Optional[str]], StatementCache] = {}
+
+
+def statement_cache(max_entries: int, db_path: Optional[Union[str, Path]] = None) -> StatementCache:
+    """The process-wide cache for one configuration."""
+    key = (int(max_entries), str(db_path) if db_path else None)
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = _CACHES[key] = StatementCache(max_entries, db_path)
+    return cache
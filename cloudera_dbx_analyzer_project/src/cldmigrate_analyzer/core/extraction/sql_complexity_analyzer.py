@@ -14,10 +14,20 @@ This module analyzes SQL queries to determine their complexity across multiple d
 Output is structured for easy reuse and further analysis.
 """
 
+import hashlib
 import re
+import time
+from bisect import bisect_left
 from typing import Dict, List, Any, Optional, Set, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from pathlib import Path
+
+from ..discovery.content_store import ContentStore
+from ..discovery.windows import Window
+from .sql_cache import StatementCache, statement_cache
+from .sql_lexer import OP, PUNCT, STRING, VAR, WORD, TokenStream, iter_statements, skeleton_tokens, tokenize
+from ..pipeline.engine import Document, FileAnalyzer, run_analyzers
+from ..pipeline.parallel import WorkerPool
 from enum import Enum
 
 
@@ -168,6 +178,13 @@ class SQLComplexityResult:
     has_nested_views: bool
     estimated_execution_complexity: str  # low, medium, high, very_high
     
+    # Hash of the normalized statement (equal for repeated shapes)
+    statement_hash: str = ""
+    # Served from the statement cache (not serialized)
+    cached: bool = False
+    # Time budget ran out: some metrics are missing or approximate
+    analysis_degraded: bool = False
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
         return {
@@ -189,40 +206,47 @@ class SQLComplexityResult:
             "risk_flags": self.risk_flags,
             "has_dynamic_sql": self.has_dynamic_sql,
             "has_nested_views": self.has_nested_views,
-            "estimated_execution_complexity": self.estimated_execution_complexity
+            "estimated_execution_complexity": self.estimated_execution_complexity,
+            "statement_hash": self.statement_hash,
+            "analysis_degraded": self.analysis_degraded
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SQLComplexityResult":
+        """Rebuild a result from ``to_dict()`` (or ``asdict``) output."""
+        return cls(**{
+            **data,
+            "join_analysis": JoinAnalysis(**data["join_analysis"]),
+            "subquery_analysis": SubqueryAnalysis(**data["subquery_analysis"]),
+            "cte_analysis": CTEAnalysis(**data["cte_analysis"]),
+            "window_function_analysis": WindowFunctionAnalysis(**data["window_function_analysis"]),
+            "aggregate_analysis": AggregateAnalysis(**data["aggregate_analysis"]),
+            "set_operation_analysis": SetOperationAnalysis(**data["set_operation_analysis"]),
+            "control_structure_analysis": ControlStructureAnalysis(**data["control_structure_analysis"]),
+            "ddl_analysis": DDLAnalysis(**data["ddl_analysis"]),
+        })
 
 
 class SQLComplexityAnalyzer:
     """
     Analyzes SQL queries to determine their complexity.
     
-    Usage:
-        analyzer = SQLComplexityAnalyzer()
-        result = analyzer.analyze_query(sql_text, "path/to/file.sql", line_number=10)
-    """
+    The query is tokenized once (see sql_lexer.py) and every metric is a
+    linear walk over the token stream, so keywords inside comments or string
+    literals do not count and no pattern can backtrack on large files.
     
-    # Regex patterns for SQL constructs
-    JOIN_PATTERN = re.compile(
-        r'\b(INNER\s+JOIN|LEFT\s+(?:OUTER\s+)?JOIN|RIGHT\s+(?:OUTER\s+)?JOIN|'
-        r'FULL\s+(?:OUTER\s+)?JOIN|CROSS\s+JOIN|JOIN)\b',
-        re.IGNORECASE
-    )
+    Scripts are analyzed per statement (``analyze_script``); session
+    commands (SET, USE, ADD JAR, ...) are not queries and are skipped.
     
-    SUBQUERY_PATTERN = re.compile(
-        r'\(\s*SELECT\b',
-        re.IGNORECASE
-    )
-    
-    CTE_PATTERN = re.compile(
-        r'\bWITH\s+(\w+)\s+AS\s*\(',
-        re.IGNORECASE
-    )
+    With a ``cache`` (see sql_cache.py), a statement whose normalized form
+    was analyzed before reuses that result; only the position and raw-text
+    fields are recomputed.
     
-    RECURSIVE_CTE_PATTERN = re.compile(
-        r'\bWITH\s+RECURSIVE\b',
-        re.IGNORECASE
-    )
+    Usage:
+        analyzer = SQLComplexityAnalyzer(cache=StatementCache())
+        result = analyzer.analyze_query(sql_text, "path/to/file.sql", line_number=10)
+        results = analyzer.analyze_script(script_text, "path/to/file.hql")
+    """
     
     WINDOW_FUNCTIONS = [
         'ROW_NUMBER', 'RANK', 'DENSE_RANK', 'NTILE', 'LAG', 'LEAD',
@@ -237,16 +261,65 @@ class SQLComplexityAnalyzer:
     
     SET_OPERATIONS = ['UNION', 'INTERSECT', 'EXCEPT', 'MINUS']
     
-    def __init__(self):
+    SESSION_COMMANDS = ['SET', 'RESET', 'USE', 'ADD', 'SOURCE']
+    
+    def __init__(self, cache: Optional[StatementCache] = None):
         """Initialize the SQL complexity analyzer"""
-        self.window_pattern = re.compile(
-            r'\b(' + '|'.join(self.WINDOW_FUNCTIONS) + r')\s*\(',
-            re.IGNORECASE
-        )
-        self.aggregate_pattern = re.compile(
-            r'\b(' + '|'.join(self.AGGREGATE_FUNCTIONS) + r')\s*\(',
-            re.IGNORECASE
-        )
+        self.cache = cache
+        self.window_functions = frozenset(self.WINDOW_FUNCTIONS)
+        self.aggregate_functions = frozenset(self.AGGREGATE_FUNCTIONS)
+        self.session_commands = frozenset(self.SESSION_COMMANDS)
+    
+    @staticmethod
+    def normalize_query(sql_text: str) -> str:
+        """
+        Canonical form of a query: comments dropped, tokens separated by one
+        space, ``${...}`` placeholders and string literals replaced by
+        ``${}`` and ``''``. Keyword case is kept, as join types and CTE names
+        are reported as written.
+        """
+        return _normalized(tokenize(sql_text))
+    
+    def analyze_script(
+        self,
+        sql_text: str,
+        file_path: str = "unknown",
+        budget_s: Optional[float] = None,
+        statement_budget_s: Optional[float] = None
+    ) -> List[SQLComplexityResult]:
+        """
+        Split a script into statements and analyze each one.
+        
+        Returns one SQLComplexityResult per query statement, in script
+        order, with ``line_number`` set to the line the statement starts on.
+        
+        Time budgets (seconds, None or 0 for none) bound pathological input:
+        once the script has used ``budget_s`` (lexing included), the rest of
+        it is analyzed as one result from its keyword skeleton (see
+        sql_lexer.skeleton_tokens); metrics a statement has not reached
+        within ``statement_budget_s`` are left empty. Such results are
+        flagged ``analysis_degraded``.
+        """
+        start = time.perf_counter()
+        file_deadline = start + budget_s if budget_s else None
+        results = []
+        for stmt in iter_statements(sql_text):
+            if stmt.tokens.keys[0] in self.session_commands:
+                continue
+            now = time.perf_counter()
+            if file_deadline is not None and now > file_deadline:
+                rest = sql_text[stmt.start:]
+                skeleton = skeleton_tokens(rest, _SKELETON_KEYS)
+                results.append(replace(
+                    self._analyze_tokens(skeleton, rest, file_path, stmt.line, use_cache=False),
+                    analysis_degraded=True
+                ))
+                break
+            deadline = file_deadline
+            if statement_budget_s:
+                deadline = min(deadline or float("inf"), now + statement_budget_s)
+            results.append(self._analyze_tokens(stmt.tokens, stmt.text, file_path, stmt.line, deadline))
+        return results
     
     def analyze_query(
         self,
@@ -265,18 +338,66 @@ class SQLComplexityAnalyzer:
         Returns:
             SQLComplexityResult object with all complexity metrics
         """
-        # Clean and normalize SQL
-        sql_clean = self._normalize_sql(sql_text)
-        
-        # Perform individual analyses
-        join_analysis = self._analyze_joins(sql_clean)
-        subquery_analysis = self._analyze_subqueries(sql_clean, sql_text)
-        cte_analysis = self._analyze_ctes(sql_clean)
-        window_analysis = self._analyze_window_functions(sql_clean)
-        aggregate_analysis = self._analyze_aggregates(sql_clean)
-        set_op_analysis = self._analyze_set_operations(sql_clean)
-        control_analysis = self._analyze_control_structures(sql_clean)
-        ddl_analysis = self._analyze_ddl(sql_clean)
+        # Tokenize once; comments and whitespace are dropped
+        return self._analyze_tokens(tokenize(sql_text), sql_text, file_path, line_number)
+    
+    def _analyze_tokens(
+        self,
+        ts: TokenStream,
+        sql_text: str,
+        file_path: str,
+        line_number: int,
+        deadline: Optional[float] = None,
+        use_cache: bool = True
+    ) -> SQLComplexityResult:
+        """
+        analyze_query on an already tokenized query. Analyses not started
+        by ``deadline`` (a time.perf_counter() value) are left empty.
+        """
+        statement_hash = hashlib.sha1(
+            _normalized(ts).encode("utf-8", "surrogatepass")
+        ).hexdigest()
+        use_cache = use_cache and self.cache is not None
+        if use_cache:
+            known = self.cache.get(statement_hash)
+            if known is not None:
+                return replace(
+                    known,
+                    file_path=file_path,
+                    line_number=line_number,
+                    query_snippet=sql_text[:200].replace('\n', ' '),
+                    query_length=len(sql_text),
+                    query_lines=len(sql_text.split('\n')),
+                    has_dynamic_sql=self._has_dynamic_sql(sql_text),
+                    cached=True
+                )
+        
+        # Perform individual analyses, cheapest first
+        parts = {}
+        degraded = False
+        for name, analyze in (
+            ("set_op", self._analyze_set_operations),
+            ("ddl", self._analyze_ddl),
+            ("aggregate", self._analyze_aggregates),
+            ("window", self._analyze_window_functions),
+            ("cte", self._analyze_ctes),
+            ("join", self._analyze_joins),
+            ("control", self._analyze_control_structures),
+            ("subquery", self._analyze_subqueries),
+        ):
+            if deadline is not None and time.perf_counter() > deadline:
+                parts[name] = _EMPTY_ANALYSES[name]()
+                degraded = True
+            else:
+                parts[name] = analyze(ts)
+        join_analysis = parts["join"]
+        subquery_analysis = parts["subquery"]
+        cte_analysis = parts["cte"]
+        window_analysis = parts["window"]
+        aggregate_analysis = parts["aggregate"]
+        set_op_analysis = parts["set_op"]
+        control_analysis = parts["control"]
+        ddl_analysis = parts["ddl"]
         
         # Calculate total complexity score
         total_score = (
@@ -306,10 +427,10 @@ class SQLComplexityAnalyzer:
         
         # Check for special patterns
         has_dynamic_sql = self._has_dynamic_sql(sql_text)
-        has_nested_views = self._has_nested_views(sql_clean)
+        has_nested_views = self._has_nested_views(ts)
         
         # Create result object
-        return SQLComplexityResult(
+        result = SQLComplexityResult(
             file_path=file_path,
             line_number=line_number,
             query_snippet=sql_text[:200].replace('\n', ' '),
@@ -328,22 +449,27 @@ class SQLComplexityAnalyzer:
             risk_flags=risk_flags,
             has_dynamic_sql=has_dynamic_sql,
             has_nested_views=has_nested_views,
-            estimated_execution_complexity=exec_complexity
+            estimated_execution_complexity=exec_complexity,
+            statement_hash=statement_hash,
+            analysis_degraded=degraded
         )
+        if use_cache and not degraded:
+            self.cache.put(statement_hash, result)
+        return result
     
-    def _normalize_sql(self, sql: str) -> str:
-        """Remove comments and normalize whitespace"""
-        # Remove single-line comments
-        sql = re.sub(r'--[^\n]*', '', sql)
-        # Remove multi-line comments
-        sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.DOTALL)
-        # Normalize whitespace
-        sql = ' '.join(sql.split())
-        return sql
-    
-    def _analyze_joins(self, sql: str) -> JoinAnalysis:
+    def _analyze_joins(self, ts: TokenStream) -> JoinAnalysis:
         """Analyze JOIN operations"""
-        joins = self.JOIN_PATTERN.findall(sql)
+        # INNER/CROSS JOIN, LEFT/RIGHT/FULL [OUTER] JOIN or a bare JOIN,
+        # as written (case kept)
+        keys, texts = ts.keys, ts.texts
+        joins = []
+        for j in ts.where("JOIN"):
+            start = j
+            if j >= 1 and keys[j - 1] in ("INNER", "CROSS", "LEFT", "RIGHT", "FULL"):
+                start = j - 1
+            elif j >= 2 and keys[j - 1] == "OUTER" and keys[j - 2] in ("LEFT", "RIGHT", "FULL"):
+                start = j - 2
+            joins.append(" ".join(texts[start:j + 1]))
         total_joins = len(joins)
         
         # Count join types
@@ -356,8 +482,8 @@ class SQLComplexityAnalyzer:
         max_tables = total_joins + 1 if total_joins > 0 else 1
         
         # Check for special join types
-        has_self_join = self._detect_self_join(sql)
-        has_cross_join = 'CROSS JOIN' in sql.upper()
+        has_self_join = self._detect_self_join(ts)
+        has_cross_join = ts.count("CROSS", "JOIN") > 0
         
         # Calculate complexity score
         score = 0
@@ -375,21 +501,35 @@ class SQLComplexityAnalyzer:
             join_complexity_score=score
         )
     
-    def _analyze_subqueries(self, sql_clean: str, sql_original: str) -> SubqueryAnalysis:
+    def _analyze_subqueries(self, ts: TokenStream) -> SubqueryAnalysis:
         """Analyze subquery usage and nesting"""
-        subqueries = self.SUBQUERY_PATTERN.findall(sql_clean)
-        total_subqueries = len(subqueries)
+        total_subqueries = ts.count("(", "SELECT")
         
         # Calculate nesting depth
-        max_depth = self._calculate_subquery_depth(sql_original)
+        max_depth = self._calculate_subquery_depth(ts)
         
-        # Detect correlated subqueries (rough heuristic)
-        correlated = len(re.findall(r'WHERE.*?=.*?\(.*?SELECT', sql_clean, re.IGNORECASE | re.DOTALL))
+        # Detect correlated subqueries (rough heuristic): WHERE, then an
+        # operator containing '=', '(' and SELECT, each the next one after
+        # the previous
+        equals = sorted(
+            i for key in _EQUALS_OPERATORS for i in ts.where(key) if ts.kinds[i] in (OP, PUNCT)
+        )
+        correlated = 0
+        pos = 0
+        while True:
+            w = ts.next("WHERE", pos)
+            e = _next_in(equals, w + 1) if w >= 0 else -1
+            p = ts.next("(", e + 1) if e >= 0 else -1
+            s = ts.next("SELECT", p + 1) if p >= 0 else -1
+            if s < 0:
+                break
+            correlated += 1
+            pos = s + 1
         
         # Count subqueries in different clauses
-        in_select = len(re.findall(r'SELECT[^(]*\([^)]*SELECT', sql_clean, re.IGNORECASE))
-        in_where = len(re.findall(r'WHERE[^(]*\([^)]*SELECT', sql_clean, re.IGNORECASE))
-        in_from = len(re.findall(r'FROM[^(]*\([^)]*SELECT', sql_clean, re.IGNORECASE))
+        in_select = _count_clause_subqueries(ts, "SELECT")
+        in_where = _count_clause_subqueries(ts, "WHERE")
+        in_from = _count_clause_subqueries(ts, "FROM")
         
         # Calculate complexity score
         score = 0
@@ -407,14 +547,19 @@ class SQLComplexityAnalyzer:
             subquery_complexity_score=score
         )
     
-    def _analyze_ctes(self, sql: str) -> CTEAnalysis:
+    def _analyze_ctes(self, ts: TokenStream) -> CTEAnalysis:
         """Analyze Common Table Expressions"""
-        cte_matches = self.CTE_PATTERN.findall(sql)
-        total_ctes = len(cte_matches)
-        cte_names = cte_matches
+        # WITH <name> AS (
+        keys, kinds = ts.keys, ts.kinds
+        cte_names = [
+            ts.texts[i + 1]
+            for i in ts.where("WITH")
+            if kinds[i + 1:i + 2] == [WORD] and keys[i + 2:i + 4] == ["AS", "("]
+        ]
+        total_ctes = len(cte_names)
         
         # Detect recursive CTEs
-        recursive_ctes = len(self.RECURSIVE_CTE_PATTERN.findall(sql))
+        recursive_ctes = ts.count("WITH", "RECURSIVE")
         
         # Estimate CTE chain length (rough heuristic)
         max_chain = min(total_ctes, 5)  # Conservative estimate
@@ -433,14 +578,15 @@ class SQLComplexityAnalyzer:
             cte_complexity_score=score
         )
     
-    def _analyze_window_functions(self, sql: str) -> WindowFunctionAnalysis:
+    def _analyze_window_functions(self, ts: TokenStream) -> WindowFunctionAnalysis:
         """Analyze window/analytic functions"""
-        window_matches = self.window_pattern.findall(sql)
+        window_matches = _function_calls(ts, self.window_functions)
         total_windows = len(window_matches)
-        window_types = list(set(match.upper() for match in window_matches))
+        # dict.fromkeys keeps first-occurrence order; set order varies per process
+        window_types = list(dict.fromkeys(window_matches))
         
-        has_partition = bool(re.search(r'\bPARTITION\s+BY\b', sql, re.IGNORECASE))
-        has_order = bool(re.search(r'\bORDER\s+BY\b', sql, re.IGNORECASE))
+        has_partition = ts.count("PARTITION", "BY") > 0
+        has_order = ts.count("ORDER", "BY") > 0
         
         # Calculate complexity score
         score = 0
@@ -456,20 +602,19 @@ class SQLComplexityAnalyzer:
             window_complexity_score=score
         )
     
-    def _analyze_aggregates(self, sql: str) -> AggregateAnalysis:
+    def _analyze_aggregates(self, ts: TokenStream) -> AggregateAnalysis:
         """Analyze aggregate functions"""
-        agg_matches = self.aggregate_pattern.findall(sql)
+        agg_matches = _function_calls(ts, self.aggregate_functions)
         total_aggs = len(agg_matches)
         
         # Count by type
         agg_types = {}
         for agg in agg_matches:
-            agg_upper = agg.upper()
-            agg_types[agg_upper] = agg_types.get(agg_upper, 0) + 1
+            agg_types[agg] = agg_types.get(agg, 0) + 1
         
-        has_group_by = bool(re.search(r'\bGROUP\s+BY\b', sql, re.IGNORECASE))
-        has_having = bool(re.search(r'\bHAVING\b', sql, re.IGNORECASE))
-        distinct_aggs = len(re.findall(r'\b(COUNT|SUM|AVG)\s*\(\s*DISTINCT', sql, re.IGNORECASE))
+        has_group_by = ts.count("GROUP", "BY") > 0
+        has_having = bool(ts.where("HAVING"))
+        distinct_aggs = sum(ts.count(name, "(", "DISTINCT") for name in ("COUNT", "SUM", "AVG"))
         
         # Calculate complexity score
         score = 0
@@ -487,18 +632,18 @@ class SQLComplexityAnalyzer:
             aggregate_complexity_score=score
         )
     
-    def _analyze_set_operations(self, sql: str) -> SetOperationAnalysis:
+    def _analyze_set_operations(self, ts: TokenStream) -> SetOperationAnalysis:
         """Analyze set operations"""
         set_ops = {}
         total = 0
         
         for op in self.SET_OPERATIONS:
-            count = len(re.findall(rf'\b{op}\b', sql, re.IGNORECASE))
+            count = len(ts.where(op))
             if count > 0:
                 set_ops[op] = count
                 total += count
         
-        has_union_all = bool(re.search(r'\bUNION\s+ALL\b', sql, re.IGNORECASE))
+        has_union_all = ts.count("UNION", "ALL") > 0
         
         # Calculate complexity score
         score = total * 8
@@ -510,20 +655,29 @@ class SQLComplexityAnalyzer:
             set_operation_complexity_score=score
         )
     
-    def _analyze_control_structures(self, sql: str) -> ControlStructureAnalysis:
+    def _analyze_control_structures(self, ts: TokenStream) -> ControlStructureAnalysis:
         """Analyze control structures"""
-        case_statements = len(re.findall(r'\bCASE\b', sql, re.IGNORECASE))
+        case_statements = len(ts.where("CASE"))
         
-        # Find max branches in CASE statements
+        # Find max branches in CASE statements: WHENs from a CASE up to the
+        # next END (a nested CASE adds its WHENs to the enclosing one)
         max_branches = 0
-        case_blocks = re.findall(r'CASE.*?END', sql, re.IGNORECASE | re.DOTALL)
-        for block in case_blocks:
-            when_count = len(re.findall(r'\bWHEN\b', block, re.IGNORECASE))
-            max_branches = max(max_branches, when_count)
+        when_count = None
+        keys = ts.keys
+        for i in sorted(ts.where("CASE") + ts.where("WHEN") + ts.where("END")):
+            k = keys[i]
+            if when_count is None:
+                if k == "CASE":
+                    when_count = 0
+            elif k == "WHEN":
+                when_count += 1
+            elif k == "END":
+                max_branches = max(max_branches, when_count)
+                when_count = None
         
-        has_coalesce = bool(re.search(r'\bCOALESCE\s*\(', sql, re.IGNORECASE))
-        has_nullif = bool(re.search(r'\bNULLIF\s*\(', sql, re.IGNORECASE))
-        has_cast = bool(re.search(r'\bCAST\s*\(', sql, re.IGNORECASE))
+        has_coalesce = ts.count("COALESCE", "(") > 0
+        has_nullif = ts.count("NULLIF", "(") > 0
+        has_cast = ts.count("CAST", "(") > 0
         
         # Calculate complexity score
         score = 0
@@ -542,15 +696,16 @@ class SQLComplexityAnalyzer:
             control_complexity_score=score
         )
     
-    def _analyze_ddl(self, sql: str) -> DDLAnalysis:
+    def _analyze_ddl(self, ts: TokenStream) -> DDLAnalysis:
         """Analyze DDL operations"""
-        has_create = bool(re.search(r'\bCREATE\s+(TABLE|VIEW|INDEX)', sql, re.IGNORECASE))
-        has_alter = bool(re.search(r'\bALTER\s+TABLE', sql, re.IGNORECASE))
-        has_drop = bool(re.search(r'\bDROP\s+(TABLE|VIEW|INDEX)', sql, re.IGNORECASE))
-        has_truncate = bool(re.search(r'\bTRUNCATE\s+TABLE', sql, re.IGNORECASE))
+        objects = ("TABLE", "VIEW", "INDEX")
+        has_create = any(ts.count("CREATE", obj) for obj in objects)
+        has_alter = ts.count("ALTER", "TABLE") > 0
+        has_drop = any(ts.count("DROP", obj) for obj in objects)
+        has_truncate = ts.count("TRUNCATE", "TABLE") > 0
         
-        partition_ops = len(re.findall(r'\bPARTITION(ED)?\s+BY\b', sql, re.IGNORECASE))
-        index_ops = len(re.findall(r'\bINDEX\b', sql, re.IGNORECASE))
+        partition_ops = ts.count("PARTITION", "BY") + ts.count("PARTITIONED", "BY")
+        index_ops = len(ts.where("INDEX"))
         
         # Calculate complexity score
         score = 0
@@ -571,44 +726,59 @@ class SQLComplexityAnalyzer:
             ddl_complexity_score=score
         )
     
-    def _calculate_subquery_depth(self, sql: str) -> int:
+    def _calculate_subquery_depth(self, ts: TokenStream) -> int:
         """Calculate maximum subquery nesting depth"""
         max_depth = 0
         current_depth = 0
         
-        for char in sql:
-            if char == '(':
+        keys = ts.keys
+        for i in sorted(ts.where("(") + ts.where(")")):
+            if keys[i] == '(':
                 current_depth += 1
                 max_depth = max(max_depth, current_depth)
-            elif char == ')':
+            else:
                 current_depth = max(0, current_depth - 1)
         
         # Rough adjustment for SELECT depth
         return min(max_depth // 2, 10)  # Cap at 10
     
-    def _detect_self_join(self, sql: str) -> bool:
+    def _detect_self_join(self, ts: TokenStream) -> bool:
         """Detect if query contains self-joins"""
         # Very rough heuristic - look for same table aliased twice
-        from_matches = re.findall(r'FROM\s+(\w+)\s+(\w+)', sql, re.IGNORECASE)
-        join_matches = re.findall(r'JOIN\s+(\w+)\s+(\w+)', sql, re.IGNORECASE)
-        
-        all_tables = [m[0].upper() for m in from_matches + join_matches]
+        # (FROM/JOIN <table> <alias>; a match consumes its alias)
+        kinds = ts.kinds
+        all_tables = []
+        for keyword in ("FROM", "JOIN"):
+            resume = 0
+            for i in ts.where(keyword):
+                if i >= resume and kinds[i + 1:i + 3] == [WORD, WORD]:
+                    all_tables.append(ts.keys[i + 1])
+                    resume = i + 3
         return len(all_tables) != len(set(all_tables))
     
     def _has_dynamic_sql(self, sql: str) -> bool:
         """Check for dynamic SQL patterns"""
+        # Runs on the raw text: the SELECT being concatenated sits in a string
         patterns = [
             r'EXECUTE\s+IMMEDIATE',
             r'EXEC\s*\(',
             r'sp_executesql',
-            r'\|\|.*SELECT',  # String concatenation with SELECT
-            r'\+.*SELECT',     # String concatenation with SELECT
         ]
-        return any(re.search(p, sql, re.IGNORECASE) for p in patterns)
+        if any(re.search(p, sql, re.IGNORECASE) for p in patterns):
+            return True
+        # String concatenation (|| or +) followed by SELECT on the same line
+        for line in sql.lower().split('\n'):
+            ops = [p for p in (line.find('||'), line.find('+')) if p >= 0]
+            if ops and line.find('select', min(ops) + 1) >= 0:
+                return True
+        return False
     
-    def _has_nested_views(self, sql: str) -> bool:
+    def _has_nested_views(self, ts: TokenStream) -> bool:
         """Check if query references views (rough heuristic)"""
-        return bool(re.search(r'FROM\s+\w*[vV]iew\w*', sql, re.IGNORECASE))
+        return any(
+            ts.kinds[i + 1:i + 2] == [WORD] and "VIEW" in ts.keys[i + 1]
+            for i in ts.where("FROM")
+        )
     
     def _classify_complexity(self, score: int) -> ComplexityLevel:
         """Classify complexity based on total score"""
@@ -690,38 +860,314 @@ class SQLComplexityAnalyzer:
             return "low"
 
 
+# Operators the correlated-subquery heuristic treats as comparisons
+_EQUALS_OPERATORS = ("=", "==", "<=", ">=", "!=", ":=", "<=>")
+
+
+def _next_in(positions: List[int], pos: int) -> int:
+    """First entry of sorted ``positions`` at or after ``pos``, -1 if none."""
+    j = bisect_left(positions, pos)
+    return positions[j] if j < len(positions) else -1
+
+
+# Every key the analyses look at: the degraded stream keeps only these
+_SKELETON_KEYS = frozenset(
+    SQLComplexityAnalyzer.WINDOW_FUNCTIONS + SQLComplexityAnalyzer.AGGREGATE_FUNCTIONS
+    + SQLComplexityAnalyzer.SET_OPERATIONS + [
+        'SELECT', 'FROM', 'WHERE', 'JOIN', 'INNER', 'CROSS', 'LEFT', 'RIGHT', 'FULL', 'OUTER',
+        'WITH', 'RECURSIVE', 'AS', 'ALL', 'CASE', 'WHEN', 'END', 'PARTITION', 'PARTITIONED',
+        'ORDER', 'GROUP', 'BY', 'HAVING', 'DISTINCT', 'CREATE', 'ALTER', 'DROP', 'TRUNCATE',
+        'TABLE', 'VIEW', 'INDEX', 'COALESCE', 'NULLIF', 'CAST', '(', ')', '='
+    ]
+)
+
+# Results of analyses skipped for lack of time
+_EMPTY_ANALYSES = {
+    "join": lambda: JoinAnalysis(0, {}, 1, False, False, 0),
+    "subquery": lambda: SubqueryAnalysis(0, 0, 0, 0, 0, 0, 0),
+    "cte": lambda: CTEAnalysis(0, 0, 0, [], 0),
+    "window": lambda: WindowFunctionAnalysis(0, [], False, False, 0),
+    "aggregate": lambda: AggregateAnalysis(0, {}, False, False, 0, 0),
+    "set_op": lambda: SetOperationAnalysis(0, {}, False, 0),
+    "control": lambda: ControlStructureAnalysis(0, 0, False, False, False, 0),
+    "ddl": lambda: DDLAnalysis(False, False, False, False, 0, 0, 0),
+}
+
+
+def _normalized(ts: TokenStream) -> str:
+    """See SQLComplexityAnalyzer.normalize_query."""
+    return " ".join(
+        "''" if kind == STRING else "${}" if kind == VAR else text
+        for kind, text in zip(ts.kinds, ts.texts)
+    )
+
+
+def _function_calls(ts: TokenStream, names: frozenset) -> List[str]:
+    """Upper-cased names from ``names`` that are followed by '(', in order."""
+    keys = ts.keys
+    return [keys[p - 1] for p in ts.where("(") if p and keys[p - 1] in names]
+
+
+def _count_clause_subqueries(ts: TokenStream, clause: str) -> int:
+    """
+    Subqueries opened right after ``clause``: the clause keyword, the first
+    '(' after it and a SELECT before the next ')'. Matches do not overlap; a
+    match resumes after the last such SELECT.
+    """
+    count = 0
+    resume = 0
+    for i in ts.where(clause):
+        if i < resume:
+            continue
+        p = ts.next("(", i + 1)
+        if p < 0:
+            break
+        close = ts.next(")", p + 1)
+        s = ts.prev("SELECT", close if close >= 0 else len(ts))
+        if s > p:
+            count += 1
+            resume = s + 1
+    return count
+
+
 def analyze_sql_file(
     file_path: Path,
     sql_content: str
 ) -> List[SQLComplexityResult]:
     """
-    Analyze all SQL queries in a file.
-    
-    For simplicity, this function treats the entire file as one query.
-    In production, you might want to split by statement terminators.
+    Analyze all SQL queries in a file, one result per statement.
     """
     analyzer = SQLComplexityAnalyzer()
+    return analyzer.analyze_script(sql_content, str(file_path))
+
+
+@dataclass
+class SQLFileResult:
+    """Statement results of one file and the time they took."""
+    file_path: str
+    statements: List[SQLComplexityResult]
+    analysis_seconds: float
+    # False for results not analyzed in this run (duplicates, cache hits)
+    timed: bool = True
+    # Bytes scanned for files above max_file_mb (analyzed in windows)
+    windowed_bytes: Optional[int] = None
+    # Copy of the result of an identical file (dedup fan-out)
+    duplicate: bool = False
+
+
+class SQLComplexityFileAnalyzer(FileAnalyzer):
+    """Engine plugin for analyze_repository_sql_complexity."""
+    
+    name = "sql_complexity"
+    # Only analyze SQL-like files
+    file_types = frozenset({"sql", "hql", "impala_sql"})
+    windowed = True
+    
+    def __init__(
+        self,
+        cache_entries: int = 4096,
+        cache_path: Optional[str] = None,
+        file_budget_s: float = 60.0,
+        statement_budget_s: float = 5.0,
+        slowest_files: int = 20
+    ):
+        # Statement cache size (0 and no cache_path: off) and optional SQLite
+        # file; each process keeps its own LRU (see sql_cache.py)
+        self.cache_entries = max(0, int(cache_entries))
+        self.cache_path = cache_path
+        # Time budgets per file and per statement (0: unlimited) and the
+        # length of the slowest-files table
+        self.file_budget_s = max(0.0, float(file_budget_s))
+        self.statement_budget_s = max(0.0, float(statement_budget_s))
+        self.slowest_files = max(0, int(slowest_files))
+        self._analyzer: Optional[SQLComplexityAnalyzer] = None
+        # perf_counter() deadline of the large file being scanned in windows
+        self._window_deadline: Optional[float] = None
+    
+    @classmethod
+    def from_config(cls, patterns: Dict[str, Any], options: Dict[str, Any]) -> "SQLComplexityFileAnalyzer":
+        return cls(
+            cache_entries=options.get("sql_cache_entries", 4096),
+            cache_path=options.get("sql_cache_path"),
+            file_budget_s=options.get("sql_file_budget_s", 60.0),
+            statement_budget_s=options.get("sql_statement_budget_s", 5.0),
+            slowest_files=options.get("sql_slowest_files", 20),
+        )
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # The analyzer holds the process-local statement cache
+        return {**self.__dict__, "_analyzer": None}
+    
+    def visit(self, doc: Document) -> Optional[SQLFileResult]:
+        try:
+            sql_content = doc.text
+        except Exception:
+            return None
+        
+        start = time.perf_counter()
+        statements = self._get_analyzer().analyze_script(
+            sql_content, str(doc.rel), budget_s=self.file_budget_s, statement_budget_s=self.statement_budget_s
+        )
+        if not statements:
+            return None
+        return SQLFileResult(str(doc.rel), statements, time.perf_counter() - start)
+    
+    def _get_analyzer(self) -> "SQLComplexityAnalyzer":
+        if self._analyzer is None:
+            cache = None
+            if self.cache_entries or self.cache_path:
+                cache = statement_cache(self.cache_entries, self.cache_path)
+            self._analyzer = SQLComplexityAnalyzer(cache=cache)
+        return self._analyzer
+    
+    def visit_window(self, doc: Document, window: Window) -> SQLFileResult:
+        # Windows of one file are visited in order and share its time budget;
+        # once it is spent, each remaining window gets one degraded skeleton
+        # result. A statement crossing a window end is scored in two parts.
+        start = time.perf_counter()
+        if window.start == 0:
+            self._window_deadline = start + self.file_budget_s if self.file_budget_s else None
+        budget = None
+        if self._window_deadline is not None:
+            budget = max(self._window_deadline - start, 1e-9)
+        statements = self._get_analyzer().analyze_script(
+            window.text, str(doc.rel), budget_s=budget, statement_budget_s=self.statement_budget_s
+        )
+        shift = window.first_line - 1
+        if shift:
+            statements = [replace(r, line_number=r.line_number + shift) for r in statements]
+        return SQLFileResult(
+            str(doc.rel), statements, time.perf_counter() - start,
+            windowed_bytes=window.end - window.start
+        )
+    
+    def merge_windows(self, parts: List[Any]) -> Optional[SQLFileResult]:
+        parts = [p for p in parts if p is not None]
+        statements = [r for p in parts for r in p.statements]
+        if not statements:
+            return None
+        return SQLFileResult(
+            parts[0].file_path, statements, sum(p.analysis_seconds for p in parts),
+            windowed_bytes=sum(p.windowed_bytes or 0 for p in parts)
+        )
     
-    # For now, analyze the entire file as one query
-    # In production, you'd split by semicolons or statement boundaries
-    if sql_content.strip():
-        result = analyzer.analyze_query(sql_content, str(file_path), line_number=1)
-        return [result]
+    def fan_out(self, result: Optional[SQLFileResult], source: Dict[str, Any],
+                target: Dict[str, Any]) -> Optional[SQLFileResult]:
+        if result is None:
+            return None
+        path = str(target["path"])
+        # The copy was not analyzed, so it took no time; its statements
+        # reuse the source's analysis and count as statement cache hits
+        return replace(
+            result, file_path=path,
+            statements=[replace(r, file_path=path, cached=True) for r in result.statements],
+            analysis_seconds=0.0, timed=False, duplicate=True
+        )
     
-    return []
+    def cacheable(self, result: Optional[SQLFileResult]) -> bool:
+        # A statement over its time budget may have been degraded only
+        # because the machine was busy: analyze the file again next run
+        return result is None or not any(r.analysis_degraded for r in result.statements)
+    
+    def from_cache(self, result: Optional[Dict[str, Any]]) -> Optional[SQLFileResult]:
+        # The timing is from the run that stored it
+        if result is None:
+            return None
+        return SQLFileResult(**{
+            **result,
+            "statements": [SQLComplexityResult.from_dict(r) for r in result["statements"]],
+            "analysis_seconds": 0.0,
+            "timed": False,
+        })
+    
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> Dict[str, Any]:
+        summary = _summarize_sql_complexity([result.statements if result else None for _, result in visited])
+        statements = [r for _, result in visited if result for r in result.statements]
+        hits = sum(1 for r in statements if r.cached)
+        # "hits" includes the statements of duplicate files (reused whole)
+        summary["statement_cache"] = {
+            "enabled": bool(self.cache_entries or self.cache_path),
+            "max_entries": self.cache_entries,
+            "persistent": bool(self.cache_path),
+            "statements": len(statements),
+            "unique_statements": len({r.statement_hash for r in statements}),
+            "hits": hits,
+            "duplicate_file_hits": sum(len(result.statements) for _, result in visited if result and result.duplicate),
+            "hit_rate": round(hits / len(statements), 4) if statements else 0.0,
+        }
+        # Files above max_file_mb, scored from their windows; "sampled" ones
+        # were only partly scanned, so their statements are a sample
+        summary["windowed_files"] = [
+            {
+                "file_path": result.file_path,
+                "size_bytes": info.get("size_bytes"),
+                "scanned_bytes": result.windowed_bytes,
+                "sampled": result.windowed_bytes < (info.get("size_bytes") or 0),
+            }
+            for info, result in visited if result and result.windowed_bytes is not None
+        ]
+        summary["budgets"] = {
+            "file_budget_s": self.file_budget_s,
+            "statement_budget_s": self.statement_budget_s,
+        }
+        # Files analyzed in this run only
+        timed = sorted(
+            ((info, result) for info, result in visited if result and result.timed),
+            key=lambda t: (-t[1].analysis_seconds, t[1].file_path)
+        )
+        summary["slowest_files"] = [
+            {
+                "file_path": result.file_path,
+                "analysis_seconds": round(result.analysis_seconds, 4),
+                "size_bytes": info.get("size_bytes"),
+                "statements": len(result.statements),
+                "analysis_degraded": any(r.analysis_degraded for r in result.statements),
+            }
+            for info, result in timed[:self.slowest_files]
+        ]
+        return summary
 
 
 def analyze_repository_sql_complexity(
-    repo_root: Path,
-    files_index: List[Dict[str, Any]]
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    pool: Optional[WorkerPool] = None
 ) -> Dict[str, Any]:
     """
     Analyze SQL complexity across an entire repository.
     
     Returns aggregated complexity metrics for the repository.
     """
-    analyzer = SQLComplexityAnalyzer()
+    analyzer = SQLComplexityFileAnalyzer()
+    return run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
+
+
+def _file_rollup(results: List[SQLComplexityResult]) -> Dict[str, Any]:
+    """File-level figures from the statement results of one file."""
+    worst = max(results, key=lambda r: r.total_complexity_score)
+    total = sum(r.total_complexity_score for r in results)
+    return {
+        "file_path": worst.file_path,
+        "statements": len(results),
+        "total_complexity_score": total,
+        "average_complexity_score": round(total / len(results), 2),
+        "max_complexity_score": worst.total_complexity_score,
+        "complexity_level": worst.complexity_level,
+        "most_complex_line": worst.line_number,
+        "total_joins": sum(r.join_analysis.total_joins for r in results),
+        "total_subqueries": sum(r.subquery_analysis.total_subqueries for r in results),
+        "risk_flags": list(dict.fromkeys(f for r in results for f in r.risk_flags)),
+        "analysis_degraded": any(r.analysis_degraded for r in results),
+    }
+
+
+def _summarize_sql_complexity(
+    results: List[Optional[List[SQLComplexityResult]]]
+) -> Dict[str, Any]:
+    """Aggregate per-file statement results (in files_index order)."""
     all_results = []
+    file_rollups = []
+    degraded = 0
     
     complexity_distribution = {
         "simple": 0,
@@ -737,25 +1183,11 @@ def analyze_repository_sql_complexity(
     
     risk_flag_counts = {}
     
-    for file_info in files_index:
-        rel_path = file_info.get("path")
-        if not rel_path:
+    for statements in results:
+        if not statements:
             continue
-        
-        # Only analyze SQL-like files
-        file_type = (file_info.get("detected_type") or "").lower()
-        if file_type not in {"sql", "hql", "impala_sql"}:
-            continue
-        
-        file_path = repo_root / rel_path
-        try:
-            sql_content = file_path.read_text(encoding="utf-8", errors="replace")
-        except Exception:
-            continue
-        
-        # Analyze the file
-        if sql_content.strip():
-            result = analyzer.analyze_query(sql_content, str(rel_path), line_number=1)
+        file_rollups.append(_file_rollup(statements))
+        for result in statements:
             all_results.append(result.to_dict())
             
             # Update aggregated metrics
@@ -764,6 +1196,7 @@ def analyze_repository_sql_complexity(
             total_subqueries += result.subquery_analysis.total_subqueries
             total_ctes += result.cte_analysis.total_ctes
             total_window_functions += result.window_function_analysis.total_window_functions
+            degraded += result.analysis_degraded
             
             # Count risk flags
             for flag in result.risk_flags:
@@ -777,6 +1210,8 @@ def analyze_repository_sql_complexity(
     
     return {
         "queries_analyzed": len(all_results),
+        "files_analyzed": len(file_rollups),
+        "degraded_statements": degraded,
         "complexity_distribution": complexity_distribution,
         "average_complexity_score": round(avg_complexity_score, 2),
         "aggregated_metrics": {
@@ -786,6 +1221,7 @@ def analyze_repository_sql_complexity(
             "total_window_functions": total_window_functions
         },
         "risk_flag_summary": risk_flag_counts,
+        "file_rollups": file_rollups,
         "detailed_results": all_results,
         "top_10_most_complex": sorted(
             all_results,
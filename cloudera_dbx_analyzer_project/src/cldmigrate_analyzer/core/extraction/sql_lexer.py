@@ -0,0 +1,218 @@
+"""
+Single-pass SQL lexer.
+
+Turns SQL/HQL text into a token stream in linear time, so analyses can walk
+tokens instead of running backtracking regexes over the raw text:
+
+- ``-- ...`` and ``/* ... */`` comments are dropped (an unterminated block
+  comment runs to the end of the text);
+- ``'...'`` and ``"..."`` strings (``''``/``\\'`` escapes) are STRING tokens;
+  a quote without a closing one is plain punctuation;
+- ```...``` quoted identifiers are QUOTED, ``${...}`` placeholders VAR;
+- runs of word characters (``\\w+``: identifiers, keywords, digits) are
+  WORD; multi-character operators (``||``, ``>=``, ``<>``, ...) are OP and
+  any other character is PUNCT.
+
+``iter_statements`` cuts a script into statements at ``;`` tokens, lexing
+each one only when the caller reaches it, so a semicolon inside a string,
+quoted identifier or comment never splits. A Hive ``SET key=value``
+statement ends at its first ``;``, or at the end of its line when it has
+none. ``skeleton_tokens`` is a much cheaper, lossy stream for input that ran
+out of time budget.
+
+Tokens are kept as parallel lists (building a tuple per token costs more
+than lexing it). ``keys`` holds the upper-cased text of WORD tokens and the
+verbatim text of the others; strings keep their quotes, so a string never
+equals a keyword.
+
+Usage:
+    ts = tokenize(sql)
+    ts.count("GROUP", "BY")         # keyword sequences
+    for i in ts.where("JOIN"): ...  # positions of one key
+
+    for stmt in iter_statements(script):
+        stmt.line, stmt.text, stmt.tokens
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterator, List, Optional
+
+WORD = "word"
+STRING = "string"
+QUOTED = "quoted"
+VAR = "var"
+OP = "op"
+PUNCT = "punct"
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    | (?P<comment>--[^\n]*|/\*(?:[^*]|\*(?!/))*(?:\*/)?)
+    | (?P<var>\$\{[^}\n]*\}?)
+    | (?P<word>\w+)
+    | (?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+    | (?P<quoted>`[^`]*`)
+    | (?P<op>\|\||<=>|[<>!=:]=|<>|::|->)
+    | (?P<punct>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_QUICK_RE = re.compile(r"\w+|[()=]")
+_QUICK_PUNCT = frozenset("()=")
+
+
+class TokenStream:
+    """Tokens of one SQL text; see the module docstring."""
+
+    __slots__ = ("text", "kinds", "texts", "starts", "keys", "_where")
+
+    def __init__(
+        self,
+        text: str,
+        kinds: List[str],
+        texts: List[str],
+        starts: List[int],
+        keys: Optional[List[str]] = None,
+    ):
+        self.text = text
+        self.kinds = kinds
+        self.texts = texts
+        self.starts = starts
+        if keys is None:
+            keys = [t.upper() if k == WORD else t for k, t in zip(kinds, texts)]
+        self.keys = keys
+        self._where: Optional[Dict[str, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def where(self, key: str) -> List[int]:
+        """Ascending positions of ``key`` (do not mutate)."""
+        if self._where is None:
+            index: Dict[str, List[int]] = {}
+            for i, k in enumerate(self.keys):
+                positions = index.get(k)
+                if positions is None:
+                    index[k] = [i]
+                else:
+                    positions.append(i)
+            self._where = index
+        return self._where.get(key, [])
+
+    def count(self, first: str, *rest: str) -> int:
+        """Occurrences of ``first`` immediately followed by ``rest``."""
+        keys = self.keys
+        want = list(rest)
+        n = len(want)
+        return sum(1 for i in self.where(first) if keys[i + 1:i + 1 + n] == want)
+
+    def next(self, key: str, pos: int) -> int:
+        """Position of the first ``key`` at or after ``pos``, -1 if none."""
+        positions = self.where(key)
+        j = bisect_left(positions, pos)
+        return positions[j] if j < len(positions) else -1
+
+    def prev(self, key: str, pos: int) -> int:
+        """Position of the last ``key`` before ``pos``, -1 if none."""
+        positions = self.where(key)
+        j = bisect_right(positions, pos - 1)
+        return positions[j - 1] if j else -1
+
+
+def skeleton_tokens(sql: str, keep: FrozenSet[str]) -> TokenStream:
+    """
+    Degraded token stream: the upper-cased words of ``sql`` that are in
+    ``keep``, and the ``(``, ``)`` and ``=`` characters it lists, found by
+    one C-level regex scan. Comments and strings are not recognized and
+    offsets are not kept (``starts`` are all 0).
+    """
+    texts = [t for t in _QUICK_RE.findall((sql or "").upper()) if t in keep]
+    kinds = [PUNCT if t in _QUICK_PUNCT else WORD for t in texts]
+    return TokenStream(sql or "", kinds, texts, [0] * len(texts), texts)
+
+
+def tokenize(sql: str) -> TokenStream:
+    """Token stream of ``sql``, comments and whitespace dropped."""
+    kinds: List[str] = []
+    texts: List[str] = []
+    starts: List[int] = []
+    for m in _TOKEN_RE.finditer(sql or ""):
+        kind = m.lastgroup
+        if kind == "ws" or kind == "comment":
+            continue
+        kinds.append(kind)
+        texts.append(m.group())
+        starts.append(m.start())
+    return TokenStream(sql or "", kinds, texts, starts)
+
+
+@dataclass
+class Statement:
+    """One statement of a script (without its ``;``) and where it starts."""
+
+    text: str
+    line: int  # 1-based line of the first token
+    start: int  # offset of the first token in the script
+    tokens: TokenStream
+
+
+def iter_statements(sql: str) -> Iterator[Statement]:
+    """
+    Statements of ``sql`` in order, each lexed only when it is reached, so a
+    caller may stop early; empty and comment-only statements are skipped.
+    """
+    sql = sql or ""
+    kinds: List[str] = []
+    texts: List[str] = []
+    starts: List[int] = []
+    base = 0
+    line, counted = 1, 0
+    eol = -1  # end of the current SET statement's line
+
+    def statement() -> Statement:
+        nonlocal line, counted
+        line += sql.count("\n", counted, base)
+        counted = base
+        stop = base + starts[-1] + len(texts[-1])
+        text = sql[base:stop]
+        return Statement(text, line, base, TokenStream(text, kinds, texts, starts))
+
+    for m in _TOKEN_RE.finditer(sql):
+        kind = m.lastgroup
+        if kind == "ws" or kind == "comment":
+            continue
+        start = m.start()
+        text = m.group()
+        if texts and 0 <= eol < start:
+            # Hive session setting without ';': the value runs to the end of
+            # the line
+            yield statement()
+            kinds, texts, starts = [], [], []
+            eol = -1
+        if text == ";":
+            if texts:
+                yield statement()
+                kinds, texts, starts = [], [], []
+            eol = -1
+            continue
+        if not texts:
+            base = start
+            if kind == WORD and text.upper() == "SET":
+                eol = sql.find("\n", start)
+                if eol < 0:
+                    eol = len(sql)
+        kinds.append(kind)
+        texts.append(text)
+        starts.append(start - base)
+    if texts:
+        yield statement()
+
+
+def split_statements(sql: str) -> List[Statement]:
+    """Statements of ``sql`` in order; empty and comment-only ones are skipped."""
+    return list(iter_statements(sql))
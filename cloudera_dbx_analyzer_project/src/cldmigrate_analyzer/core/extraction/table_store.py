@@ -0,0 +1,160 @@
+"""
+Compact store of the table references of a repository.
+
+database_context used to keep every source/target reference as a dict, the
+same database, schema, table and file strings repeated across hundreds of
+thousands of references. TableReferenceStore interns each string once and
+keeps one reference per row of parallel integer arrays (file, line, names,
+operation, confidence, flags), with indexes by table and by database built
+on first use.
+
+``source_tables``/``target_tables`` and the index lookups return read-only
+sequence views that build the usual reference dict (TableReference.to_dict
+plus ``file``) only for the rows accessed, so csv_export and the report read
+them like the old lists.
+
+Usage:
+    store = TableReferenceStore()
+    store.add(ref, "etl/load.hql", target=False)
+    len(store.source_tables), store.source_tables[:200]
+    for row in store.rows_for_table("customers"):
+        row["file"], row["line_number"]
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:
+    from .database_schema_parser import TableReference
+
+_TARGET = 1
+_HAS_VARIABLES = 2
+
+
+class TableReferenceView(Sequence):
+    """Read-only sequence of reference dicts over rows of a store."""
+
+    __slots__ = ("store", "_rows")
+
+    def __init__(self, store: "TableReferenceStore", rows: "array[int]"):
+        self.store = store
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self.store.row(r) for r in self._rows[index]]
+        return self.store.row(self._rows[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        row = self.store.row
+        for r in self._rows:
+            yield row(r)
+
+
+class TableReferenceStore:
+    """Interned, columnar table references; see the module docstring."""
+
+    def __init__(self) -> None:
+        self._strings: List[Optional[str]] = [None]
+        self._ids: Dict[Optional[str], int] = {None: 0}
+        self._file = array("i")
+        self._line = array("i")
+        self._full_name = array("i")
+        self._database = array("i")
+        self._schema = array("i")
+        self._table = array("i")
+        self._operation = array("i")
+        self._confidence = array("i")
+        self._flags = array("b")
+        self._source_rows = array("i")
+        self._target_rows = array("i")
+        self._indexes: Dict[str, Dict[int, "array[int]"]] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        """ID of ``value`` (0 is None)."""
+        i = self._ids.get(value)
+        if i is None:
+            i = self._ids[value] = len(self._strings)
+            self._strings.append(value)
+        return i
+
+    def add(self, ref: TableReference, file: str, target: bool) -> None:
+        intern = self.intern
+        row = len(self._line)
+        self._file.append(intern(file))
+        self._line.append(ref.line_number)
+        self._full_name.append(intern(ref.full_name))
+        self._database.append(intern(ref.database))
+        self._schema.append(intern(ref.schema))
+        self._table.append(intern(ref.table))
+        self._operation.append(intern(ref.operation))
+        self._confidence.append(intern(ref.confidence))
+        self._flags.append((_TARGET if target else 0) | (_HAS_VARIABLES if ref.has_variables else 0))
+        (self._target_rows if target else self._source_rows).append(row)
+        self._indexes.clear()
+
+    def __len__(self) -> int:
+        return len(self._line)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Reference dict of row ``i`` (a new dict on every call)."""
+        s = self._strings
+        return {
+            "full_name": s[self._full_name[i]],
+            "database": s[self._database[i]],
+            "schema": s[self._schema[i]],
+            "table": s[self._table[i]],
+            "operation": s[self._operation[i]],
+            "line_number": self._line[i],
+            "confidence": s[self._confidence[i]],
+            "has_variables": bool(self._flags[i] & _HAS_VARIABLES),
+            "file": s[self._file[i]],
+        }
+
+    @property
+    def source_tables(self) -> TableReferenceView:
+        return TableReferenceView(self, self._source_rows)
+
+    @property
+    def target_tables(self) -> TableReferenceView:
+        return TableReferenceView(self, self._target_rows)
+
+    def _index(self, column: str) -> Dict[int, "array[int]"]:
+        # Rows of each value of ``column``, in row order; keys in order of
+        # first appearance
+        index = self._indexes.get(column)
+        if index is None:
+            index = {}
+            for row, value in enumerate(getattr(self, column)):
+                rows = index.get(value)
+                if rows is None:
+                    rows = index[value] = array("i")
+                rows.append(row)
+            self._indexes[column] = index
+        return index
+
+    def rows_for_table(self, table: str) -> TableReferenceView:
+        """References to table ``table`` (any database)."""
+        rows = self._index("_table").get(self._ids.get(table, -1))
+        return TableReferenceView(self, rows if rows is not None else array("i"))
+
+    def rows_for_database(self, database: str) -> TableReferenceView:
+        """References resolved to ``database``."""
+        rows = self._index("_database").get(self._ids.get(database, -1))
+        return TableReferenceView(self, rows if rows is not None else array("i"))
+
+    def databases(self) -> List[str]:
+        """Databases of the references, in order of first appearance."""
+        return [self._strings[d] for d in self._index("_database") if d]
+
+    def tables_in_database(self, database: str) -> List[str]:
+        """Sorted distinct table names referenced in ``database``."""
+        rows = self._index("_database").get(self._ids.get(database, -1), ())
+        table = self._table
+        return sorted({self._strings[table[r]] for r in rows})
@@ -1,67 +1,249 @@
+"""
+Line and word counts for files_index entries.
+
+Counting works on raw bytes, in fixed-size chunks, without decoding or
+building per-line lists. Results equal ``len(text.splitlines())`` and
+``len(text.split())`` of the text decoded like ``Path.read_text`` (utf-8 with
+replacement, universal newlines):
+
+- lines: ``bytes.count`` of the line-break bytes, with ``\\r\\n`` counted once
+- words: whitespace -> word-byte transitions on a 0/1 map built with
+  ``bytes.translate``, counted with NumPy when it is installed
+
+The few non-ASCII characters Python treats as whitespace or line breaks
+(NBSP, U+2028, ...) are rewritten to ASCII first, only in chunks that are not
+pure ASCII. Files above ``max_file_mb`` are memory-mapped and streamed instead
+of being loaded through the ContentStore.
+"""
+
 from __future__ import annotations
 
+import mmap
+import os
+import re
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional speedup
+    np = None
+
+from ..discovery.content_store import ContentStore
+from ..discovery.windows import SampledFile
+from ..pipeline.engine import Document, FileAnalyzer, run_analyzers
+from ..pipeline.parallel import WorkerPool
+
+COUNT_CHUNK_BYTES = 4 * 1024 * 1024
+
+_ASCII_WHITESPACE = b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+# UTF-8 forms of U+0085, U+2028, U+2029 (line breaks) and the other
+# non-ASCII whitespace characters
+_UNICODE_LINE_BREAK = re.compile(rb"\xc2\x85|\xe2\x80[\xa8\xa9]")
+_UNICODE_SPACE = re.compile(rb"\xc2\xa0|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xaf]|\xe2\x81\x9f|\xe3\x80\x80")
+# \v \f \x1c-\x1e also end a line for str.splitlines(); folded onto \x1e
+# (not \n, which could pair with a preceding \r)
+_LINE_BREAK = b"\x1e"
+_TO_LINE_BREAK = bytes.maketrans(b"\x0b\x0c\x1c\x1d", _LINE_BREAK * 4)
+# 0 = whitespace, 1 = word byte
+_WORD_MAP = bytes(0 if b in _ASCII_WHITESPACE else 1 for b in range(256))
 
 
 def count_lines_words(text: str) -> tuple[int, int]:
     if text is None:
         return 0, 0
-    lines = text.splitlines()
-    words = 0
-    for ln in lines:
-        words += len([w for w in ln.strip().split() if w])
-    return len(lines), words
+    # every splitlines() separator is also whitespace for split()
+    return len(text.splitlines()), len(text.split())
+
+
+def _chunks(buf: Union[bytes, mmap.mmap], size: int, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    # Never start a chunk on a UTF-8 continuation byte, so multi-byte
+    # whitespace sequences are not split
+    n = len(buf) if end is None else end
+    while start < n:
+        stop = min(n, start + size)
+        for _ in range(3):
+            if stop < n and 0x80 <= buf[stop] < 0xC0:
+                stop += 1
+        yield buf[start:stop]
+        start = stop
+
+
+class _ByteCounter:
+    __slots__ = ("lines", "words", "_prev_ws", "_prev_cr", "_last")
+
+    def __init__(self):
+        self.lines = 0
+        self.words = 0
+        self._prev_ws = True
+        self._prev_cr = False
+        self._last = b""
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if not chunk.isascii():
+            chunk = _UNICODE_LINE_BREAK.sub(_LINE_BREAK, chunk)
+            chunk = _UNICODE_SPACE.sub(b" ", chunk)
 
+        nl = chunk.translate(_TO_LINE_BREAK)
+        self.lines += (nl.count(b"\n") + nl.count(b"\r") - nl.count(b"\r\n")
+                       + nl.count(_LINE_BREAK))
+        if self._prev_cr and nl[:1] == b"\n":
+            self.lines -= 1
+        self._prev_cr = nl[-1:] == b"\r"
+        self._last = nl[-1:]
 
-def compute_counts(repo_root: Path, files_index: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        mapped = chunk.translate(_WORD_MAP)
+        if np is not None:
+            word = np.frombuffer(mapped, dtype=np.bool_)
+            starts = int(np.count_nonzero(word[1:] > word[:-1]))
+        else:
+            starts = mapped.count(b"\x00\x01")
+        first_is_word = mapped[0] == 1
+        self._prev_ws, prev_ws = mapped[-1] == 0, self._prev_ws
+        if prev_ws and first_is_word:
+            starts += 1
+        self.words += starts
+
+    def result(self) -> tuple[int, int]:
+        lines = self.lines
+        if self._last and self._last not in (b"\n", b"\r", _LINE_BREAK):
+            lines += 1  # last line has no terminator
+        return lines, self.words
+
+
+def count_bytes(data: Union[bytes, mmap.mmap], chunk_bytes: int = COUNT_CHUNK_BYTES) -> tuple[int, int]:
+    """(lines, words) of raw file content, equal to count_lines_words(decoded text)."""
+    counter = _ByteCounter()
+    for chunk in _chunks(data, chunk_bytes):
+        counter.feed(chunk)
+    return counter.result()
+
+
+def count_file(path: Union[str, Path], chunk_bytes: int = COUNT_CHUNK_BYTES) -> tuple[int, int]:
+    """(lines, words) of a file on disk, memory-mapped or read chunk by chunk."""
+    with open(path, "rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # empty file, or a filesystem without mmap support
+            counter = _ByteCounter()
+            for chunk in iter(lambda: fh.read(chunk_bytes), b""):
+                counter.feed(chunk)
+            return counter.result()
+        with mm:
+            return count_bytes(mm, chunk_bytes)
+
+
+def count_line_breaks(
+    buf: Union[bytes, mmap.mmap],
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_bytes: int = COUNT_CHUNK_BYTES,
+) -> int:
+    """Number of ``str.splitlines()`` line breaks in ``buf[start:end]``, read chunk by chunk."""
+    counter = _ByteCounter()
+    for chunk in _chunks(buf, chunk_bytes, start, end):
+        counter.feed(chunk)
+    return counter.lines
+
+
+BINARY_EXTENSIONS = {".jar", ".class", ".zip", ".tar", ".gz", ".7z", ".parquet", ".orc", ".avro",
+                     ".png", ".jpg", ".jpeg", ".gif", ".pdf", ".docx", ".pptx", ".xlsx"}
+
+
+class CountsAnalyzer(FileAnalyzer):
     """
-    Adds line/word counts to each files_index entry in a cross-platform way.
+    Line/word counts for every files_index entry (engine plugin).
 
-    Expected input shape (minimum):
-      - entry["path"] relative to repo_root
-      - entry["detected_type"]
+    visit() returns the fields to set; reduce() applies them to the entries in
+    place. A ``parse_status`` given as ``("default", value)`` only fills in a
+    missing status, mirroring setdefault.
 
-    Adds/updates:
-      - lines_count
-      - words_count
-      - parse_status (sets to 'skipped_large' or 'read_error' when needed)
+    Files above ``max_file_mb`` (see ``visit_large``) are streamed from disk
+    so they never enter the store; their entries also get ``sampled_ranges``
+    and, when only part of them was scanned, ``parse_status`` "sampled".
     """
-    for f in files_index:
-        rel = f.get("path")
-        if not rel:
-            f["lines_count"] = 0
-            f["words_count"] = 0
-            continue
 
-        p = repo_root / rel
+    name = "counts"
+
+    def accepts(self, info: dict[str, Any]) -> bool:
+        return True
+
+    def dedup_key(self, info: dict[str, Any]) -> Any:
+        # The binary-extension shortcut depends on the name, not the content
+        digest = info.get("content_hash")
+        if digest is None:
+            return None
+        return digest, os.path.splitext(info["path"])[1].lower() in BINARY_EXTENSIONS
+
+    def visit(self, doc: Document) -> dict[str, Any]:
+        rel = doc.rel
+        if not rel:
+            return {"lines_count": 0, "words_count": 0}
 
         # Skip binary-ish types quickly (best-effort)
-        ext = p.suffix.lower()
-        if ext in {".jar", ".class", ".zip", ".tar", ".gz", ".7z", ".parquet", ".orc", ".avro",
-                   ".png", ".jpg", ".jpeg", ".gif", ".pdf", ".docx", ".pptx", ".xlsx"}:
-            f["lines_count"] = 0
-            f["words_count"] = 0
-            f.setdefault("parse_status", "skipped_binary")
-            continue
-
-        # If size_bytes exists and is too big, don't fully read
-        size_bytes = f.get("size_bytes")
-        if isinstance(size_bytes, int) and size_bytes > 10 * 1024 * 1024:  # 10 MB default cap
-            f["lines_count"] = 0
-            f["words_count"] = 0
-            f["parse_status"] = "skipped_large"
-            continue
+        ext = os.path.splitext(rel)[1].lower()
+        if ext in BINARY_EXTENSIONS:
+            return {"lines_count": 0, "words_count": 0, "parse_status": ("default", "skipped_binary")}
+
+        try:
+            lines, words = count_bytes(doc.store.read_bytes(rel))
+        except Exception:
+            return {"lines_count": 0, "words_count": 0, "parse_status": "read_error"}
+        return {"lines_count": lines, "words_count": words, "parse_status": ("default", "ok")}
 
+    def visit_large(self, doc: Document, sampled: SampledFile) -> dict[str, Any]:
+        ext = os.path.splitext(doc.rel)[1].lower()
+        if ext in BINARY_EXTENSIONS:
+            return self.visit(doc)
         try:
-            text = p.read_text(encoding="utf-8", errors="replace")
-            lc, wc = count_lines_words(text)
-            f["lines_count"] = lc
-            f["words_count"] = wc
-            f.setdefault("parse_status", "ok")
+            lines, words = count_file(doc.path)
         except Exception:
-            f["lines_count"] = 0
-            f["words_count"] = 0
-            f["parse_status"] = "read_error"
+            return {"lines_count": 0, "words_count": 0, "parse_status": "read_error"}
+        return {
+            "lines_count": lines,
+            "words_count": words,
+            "parse_status": "sampled" if sampled.sampled else ("default", "ok"),
+            "sampled_ranges": sampled.ranges,
+        }
 
+    def from_cache(self, result: dict[str, Any]) -> dict[str, Any]:
+        # JSON turned the ("default", value) parse_status into a list
+        status = result.get("parse_status")
+        if isinstance(status, list):
+            return {**result, "parse_status": tuple(status)}
+        return result
+
+    def reduce(self, visited: list[tuple[dict[str, Any], Any]]) -> list[dict[str, Any]]:
+        for f, upd in visited:
+            for k, v in upd.items():
+                if isinstance(v, tuple):
+                    f.setdefault(k, v[1])
+                else:
+                    f[k] = v
+        return [f for f, _ in visited]
+
+
+def compute_counts(
+    store: ContentStore,
+    files_index: list[dict[str, Any]],
+    pool: WorkerPool | None = None,
+    max_file_mb: int = 10,
+) -> list[dict[str, Any]]:
+    """
+    Adds line/word counts to each files_index entry in a cross-platform way.
+
+    Expected input shape (minimum):
+      - entry["path"] relative to the store root
+      - entry["detected_type"]
+
+    Adds/updates:
+      - lines_count
+      - words_count
+      - parse_status (sets to 'sampled' or 'read_error' when needed)
+      - sampled_ranges (files above max_file_mb)
+    """
+    run_analyzers(store, files_index, [CountsAnalyzer()], pool=pool, max_file_mb=max_file_mb)
     return files_index
@@ -0,0 +1,52 @@
+import copy
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Tuple
+
+from ...pipeline.engine import Document, FileAnalyzer
+from .workflow_parser import parse_workflow_xml
+from .coordinator_parser import parse_coordinator_xml
+from .bundle_parser import parse_bundle_xml
+
+
+class OozieAnalyzer(FileAnalyzer):
+    """
+    Engine plugin parsing Oozie workflow, coordinator and bundle XML.
+
+    Reduces to the workflows.json blob:
+      {"workflows": [...], "coordinators": [...], "bundles": [...]}
+    """
+
+    name = "oozie"
+    file_types = frozenset({"oozie_workflow_xml", "oozie_coordinator_xml", "oozie_bundle_xml"})
+
+    def visit(self, doc: Document) -> Tuple[str, Dict[str, Any]]:
+        # The parsers read through the store, which already holds this file
+        if doc.detected_type == "oozie_workflow_xml":
+            return "workflows", parse_workflow_xml(doc.path, doc.store)
+        if doc.detected_type == "oozie_coordinator_xml":
+            return "coordinators", parse_coordinator_xml(doc.path, doc.store)
+        return "bundles", parse_bundle_xml(doc.path, doc.store)
+
+    def fan_out(self, result: Tuple[str, Dict[str, Any]], source: Dict[str, Any],
+                target: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        # Same XML under another path: only source_file differs
+        kind, parsed = result
+        parsed = copy.deepcopy(parsed)
+        src = Path(parsed["source_file"])
+        root = src.parents[len(PurePosixPath(source["path"]).parts) - 1]
+        parsed["source_file"] = str(root / target["path"])
+        return kind, parsed
+
+    def from_cache(self, result: List[Any]) -> Tuple[str, Dict[str, Any]]:
+        kind, parsed = result
+        return kind, parsed
+
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        blob: Dict[str, List[Dict[str, Any]]] = {
+            "workflows": [],
+            "coordinators": [],
+            "bundles": [],
+        }
+        for _, (kind, parsed) in visited:
+            blob[kind].append(parsed)
+        return blob
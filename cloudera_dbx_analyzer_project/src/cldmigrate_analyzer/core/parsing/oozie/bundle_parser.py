@@ -28,10 +28,15 @@ from dataclasses import asdict
 from pathlib import Path
 from typing import Any, Dict
 
-def parse_bundle_xml(path: Path) -> Dict[str, Any]:
+from ...discovery.content_store import ContentStore
+
+def parse_bundle_xml(path: Path, store: Optional[ContentStore] = None) -> Dict[str, Any]:
     """Pipeline entrypoint: read bundle XML and return JSON-serializable dict."""
     try:
-        xml_text = Path(path).read_text(encoding="utf-8", errors="replace")
+        if store is not None:
+            xml_text = store.read_text(path)
+        else:
+            xml_text = Path(path).read_text(encoding="utf-8", errors="replace")
     except Exception as e:
         return {"source_file": str(path), "parse_status": f"read_error:{e}", "name": None}
 
@@ -0,0 +1,284 @@
+"""
+Persistent per-file result cache for incremental re-analysis.
+
+Nightly runs over large repositories usually see <1% of files change. The
+cache stores every file's engine plugin results (counts, Oozie parse,
+findings, lineage, DB context, SQL complexity, variables, dynamic SQL,
+variable definitions) in a SQLite database under the output root, keyed by
+repo-relative path and validated by size + mtime, falling back to the content hash when only the
+mtime moved (e.g. after a fresh checkout). With ``--source git`` the blob SHA
+from the index is compared directly, without touching the file. Size and
+mtime are the ones seen when the file was read for analysis, so a file
+edited during the run is re-hashed on the next one.
+
+Results are stored as JSON (dataclasses through ``asdict``), never pickled:
+the output root is often a shared location, and loading the cache must not
+run code. Plugins rebuild their results in ``FileAnalyzer.from_cache``.
+
+The whole cache is dropped when its fingerprint changes: the loaded pattern
+YAMLs, the rubric, the repository root, the plugin set, plugin options
+(max_file_mb, sample_budget_mb) or CACHE_VERSION.
+
+Results that depend on the run rather than the content are not stored
+(FileAnalyzer.cacheable): a file whose SQL analysis ran past its time
+budget is analyzed again on the next run.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from ..discovery.content_store import ContentStore, blob_sha1, blob_sha1_file
+
+# Bump when a plugin's visit() output changes shape or meaning
+CACHE_VERSION = 10
+
+CACHE_FILENAME = "analysis_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path          TEXT PRIMARY KEY,
+    size          INTEGER,
+    mtime_ns      INTEGER,
+    content_hash  TEXT NOT NULL,
+    detected_type TEXT,
+    results       TEXT NOT NULL
+);
+"""
+
+
+def cache_fingerprint(
+    patterns: Dict[str, Any],
+    rubric: Dict[str, Any],
+    repo_root: Union[str, Path],
+    analyzer_names: Iterable[str],
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Hash of everything besides file content that per-file results depend on."""
+    payload = {
+        "version": CACHE_VERSION,
+        "patterns": patterns,
+        "rubric": rubric,
+        "repo_root": str(repo_root),
+        "analyzers": sorted(analyzer_names),
+        "options": options or {},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _json_default(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _needs_local_copy(path: Path) -> bool:
+    # SQLite locking and journaling do not work reliably on FUSE mounts like /dbfs
+    return str(path).replace("\\", "/").startswith("/dbfs/")
+
+
+class AnalysisCache:
+    """
+    SQLite-backed store of per-file engine results.
+
+    Only the driver process touches the database; workers never see it.
+
+    Usage:
+        with AnalysisCache(output_root / CACHE_FILENAME, fingerprint) as cache:
+            artifacts = run_analyzers(store, files_index, analyzers, cache=cache)
+    """
+
+    def __init__(self, db_path: Union[str, Path], fingerprint: str):
+        self.db_path = Path(db_path)
+        self.fingerprint = fingerprint
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "hash_hits": 0,
+            "misses": 0,
+            "invalidated": 0,
+            "pruned": 0,
+        }
+
+        self._local_dir: Optional[str] = None
+        work_path = self.db_path
+        if _needs_local_copy(self.db_path):
+            self._local_dir = tempfile.mkdtemp(prefix="cldmigrate_cache_")
+            work_path = Path(self._local_dir) / self.db_path.name
+            if self.db_path.exists():
+                shutil.copyfile(self.db_path, work_path)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(work_path))
+        self._conn.executescript(_SCHEMA)
+        self._work_path = work_path
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            if row is not None:
+                self.stats["invalidated"] = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,)
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+
+    def lookup(
+        self,
+        store: ContentStore,
+        info: Dict[str, Any],
+        names: Sequence[str],
+        stream_above: Optional[int] = None,
+    ) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        ``(results, content_hash)`` for ``info`` if the file is unchanged and
+        the entry holds exactly the analyzers in ``names``; otherwise None.
+        Files above ``stream_above`` bytes are re-hashed from disk, bypassing
+        the store.
+        """
+        rel = info["path"]
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, content_hash, detected_type, results FROM files WHERE path = ?",
+            (rel,),
+        ).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        size, mtime_ns, content_hash, detected_type, blob = row
+
+        if detected_type != info.get("detected_type"):
+            self.stats["misses"] += 1
+            return None
+
+        known_hash = info.get("content_hash")
+        if known_hash is not None:
+            # Hash already known from the scan (git index): no stat or read needed
+            if known_hash != content_hash:
+                self.stats["misses"] += 1
+                return None
+            results = self._load(blob, names)
+            if results is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return results, content_hash
+
+        try:
+            st = os.stat(store.path(rel))
+        except OSError:
+            self.stats["misses"] += 1
+            return None
+
+        if size is not None and st.st_size != size:
+            self.stats["misses"] += 1
+            return None
+
+        touched = st.st_mtime_ns != mtime_ns
+        if touched:
+            # Touched but maybe not changed (checkout, copy): compare content
+            try:
+                if stream_above is not None and st.st_size > stream_above:
+                    current = blob_sha1_file(store.path(rel))
+                else:
+                    current = blob_sha1(store.read_bytes(rel))
+            except OSError:
+                self.stats["misses"] += 1
+                return None
+            if current != content_hash:
+                self.stats["misses"] += 1
+                return None
+
+        results = self._load(blob, names)
+        if results is None:
+            self.stats["misses"] += 1
+            return None
+
+        if touched:
+            self._conn.execute(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (st.st_size, st.st_mtime_ns, rel)
+            )
+            self.stats["hash_hits"] += 1
+        else:
+            self.stats["hits"] += 1
+        return results, content_hash
+
+    @staticmethod
+    def _load(blob: Union[str, bytes], names: Sequence[str]) -> Optional[Dict[str, Any]]:
+        try:
+            results = json.loads(blob)
+        except ValueError:
+            return None
+        if not isinstance(results, dict) or set(results) != set(names):
+            return None
+        return results
+
+    def put(
+        self,
+        info: Dict[str, Any],
+        content_hash: Optional[str],
+        results: Dict[str, Any],
+        stat: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """
+        Record fresh results for ``info`` (skipped when the file could not be
+        read). ``stat`` is ``(st_size, st_mtime_ns)`` taken before the file was
+        read; without it the next lookup re-hashes the file.
+        """
+        if content_hash is None:
+            return
+        try:
+            blob = json.dumps(results, default=_json_default, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        size, mtime_ns = stat if stat is not None else (None, None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, detected_type, results) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (info["path"], size, mtime_ns, content_hash, info.get("detected_type"), blob),
+        )
+
+    def prune(self, keep_paths: Iterable[str]) -> None:
+        """Drop entries for files no longer in the repository."""
+        keep = set(keep_paths)
+        stale = [
+            (p,) for (p,) in self._conn.execute("SELECT path FROM files").fetchall()
+            if p not in keep
+        ]
+        if stale:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", stale)
+        self.stats["pruned"] += len(stale)
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        if self._local_dir is not None:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self._work_path, self.db_path)
+            finally:
+                shutil.rmtree(self._local_dir, ignore_errors=True)
+                self._local_dir = None
+
+    def __enter__(self) -> "AnalysisCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,37 +1,25 @@
 from __future__ import annotations
 
-import json
 import time
 from pathlib import Path
 from typing import Any, Dict, List
 
 from ..discovery.repo_scanner import scan_repository
-from ..metrics.counts import compute_counts
-from ..parsing.oozie.workflow_parser import parse_workflow_xml
-from ..parsing.oozie.coordinator_parser import parse_coordinator_xml
-from ..parsing.oozie.bundle_parser import parse_bundle_xml
-from ..extraction.extractors import (
-    scan_repo_patterns,
-    extract_sql_lineage_repo,
-    extract_variables_repo,
-    has_streaming_repo,
-    has_dynamic_sql_repo,
-)
-# Database/Schema Parser
-from ..extraction.database_schema_parser import extract_databases_from_repository
-# SQL Complexity Analyzer
-from ..extraction.sql_complexity_analyzer import analyze_repository_sql_complexity
+from ..discovery.git_index import GitIndexError
+from ..discovery.content_store import ContentStore
+from .analysis_cache import AnalysisCache, _needs_local_copy, cache_fingerprint
+from .artifacts import ARTIFACT_FORMATS, artifact_filename, write_artifact, write_json
+from .dedup import mark_duplicates
+from .engine import run_analyzers
+from .parallel import WorkerPool, resolve_jobs
+from ..extraction.extractors import has_streaming_repo
+from ..extraction.registry import build_extractors
 from ..dependency.graph import build_dependency_graph
 from ..metrics.complexity import score_repository
 from ..resolution.resolver import resolve_repository
-from ...reporting.render import render_html_report
+from ...reporting.render import REPORT_MODES, render_html_report
 # CSV Export
-from ...reporting.csv_export import export_all_to_csv
-
-
-def _write_json(path: Path, obj: Any) -> None:
-    """Write object to JSON file with pretty formatting"""
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+from ...reporting.csv_export import export_results_to_csv
 
 
 def analyze_repository(
@@ -43,6 +31,20 @@ def analyze_repository(
     include_globs: List[str] | None = None,
     exclude_globs: List[str] | None = None,
     log: Any | None = None,
+    content_cache_mb: int = 256,
+    jobs: int = 1,
+    cache_path: str | None = None,
+    scan_threads: int = 1,
+    source: str = "walk",
+    git_untracked: bool = False,
+    dedup: bool = True,
+    sample_budget_mb: int = 64,
+    sql_cache_entries: int = 4096,
+    sql_cache_path: str | None = None,
+    sql_file_budget_s: float = 60.0,
+    sql_statement_budget_s: float = 5.0,
+    artifact_format: str = "json",
+    report_mode: str = "inline",
 ) -> None:
     """
     Comprehensive repository analysis with all analyzers.
@@ -62,14 +64,67 @@ def analyze_repository(
     10. HTML report generation
     11. CSV exports generation (NEW)
     
-    All intermediate results are saved as JSON artifacts for:
+    All intermediate results are saved as artifacts for:
     - Future analysis
     - External tool integration
     - Historical comparison
     - Custom reporting
+
+    Every stage reads file content through one shared ContentStore, so each
+    file is read from the repository at most once per run (content_cache_mb
+    bounds the in-memory cache; evicted files spill to local temp storage).
+
+    Steps 2-8 run as plugins of one fused engine (engine.run_analyzers): each
+    file is visited once by every analyzer that accepts its type. With
+    jobs > 1 those visits run on a pool of worker processes (jobs=0 uses every
+    CPU). Files are sharded by size and results are merged in files_index
+    order, so artifacts are identical to a serial run.
+
+    scan_threads > 1 lists directories concurrently during the scan, which
+    helps on network filesystems (/dbfs, NFS) with high per-directory latency.
+
+    source="git" enumerates files from .git/index instead of walking the tree
+    (plus untracked, non-ignored files with git_untracked); it falls back to
+    the walk when the input is not a git checkout.
+
+    With cache_path set (--incremental), per-file plugin results are kept in
+    a SQLite cache between runs and only new or changed files are analyzed;
+    the repo-level reductions always run over the full file set.
+
+    With dedup, byte-identical files are analyzed once per plugin and the
+    results are fanned out to every copy; files_index.json records
+    content_hash/duplicate_of and repo_summary.json the duplicate counts.
+
+    Files above max_file_mb are memory-mapped and scanned in line-aligned
+    windows instead of being read whole: streamed completely up to
+    sample_budget_mb, sampled head-to-tail beyond it. Their files_index
+    entries record sampled_ranges (and parse_status "sampled" when partial).
+
+    SQL statements with the same normalized shape are analyzed once per
+    worker process (an LRU of sql_cache_entries results); with sql_cache_path
+    the results also persist in a SQLite file across processes and runs.
+    SQL analysis gets sql_file_budget_s per file and sql_statement_budget_s
+    per statement (0 = unlimited); input past a budget gets a cheaper analysis
+    flagged analysis_degraded, and sql_complexity_analysis.json lists the
+    slowest files analyzed in the run. Files with degraded statements are
+    not kept in the incremental cache.
+
+    artifact_format picks how artifacts are written (see artifacts.py):
+    pretty "json" documents, or "ndjson"/"ndjson.gz" streams written one
+    record at a time. MANIFEST.json is always JSON and names the files.
+
+    report_mode "paged" writes report.html as a summary shell whose large
+    tables are paged in the browser from chunked, compressed data files under
+    report_data/ (see render.py); "inline" puts every table in report.html.
     """
+    if artifact_format not in ARTIFACT_FORMATS:
+        raise ValueError(f"Unknown artifact format: {artifact_format!r} "
+                         f"(expected one of {', '.join(ARTIFACT_FORMATS)})")
+    if report_mode not in REPORT_MODES:
+        raise ValueError(f"Unknown report mode: {report_mode!r} "
+                         f"(expected one of {', '.join(REPORT_MODES)})")
     t0 = time.time()
-    repo_root = Path(input_dir)
+    repo_root = Path(input_dir).resolve()
 
     out_dir = Path(output_run_dir)
     artifacts_dir = out_dir / "artifacts"
@@ -79,9 +134,14 @@ def analyze_repository(
     artifacts_dir.mkdir(parents=True, exist_ok=True)
     logs_dir.mkdir(parents=True, exist_ok=True)
 
+    store = ContentStore(repo_root, memory_budget_mb=content_cache_mb)
+    jobs = resolve_jobs(jobs)
+
     if log:
         log.info("=" * 80)
         log.info("Starting Comprehensive Repository Analysis")
+        if jobs > 1:
+            log.info(f"Parallel mode: {jobs} worker processes")
         log.info("=" * 80)
 
     # ============================================
@@ -90,52 +150,102 @@ def analyze_repository(
     if log:
         log.info("Step 1/11: Scanning repository and classifying files...")
     
-    files_index = scan_repository(
+    scan_kwargs = dict(
         repo_root=repo_root,
         max_file_mb=max_file_mb,
         include_globs=include_globs or [],
         exclude_globs=exclude_globs or [],
         patterns=patterns,
+        scan_threads=scan_threads,
     )
+    try:
+        files_index = scan_repository(source=source, git_untracked=git_untracked, **scan_kwargs)
+    except GitIndexError as e:
+        if log:
+            log.warning(f"  Git index unavailable ({e}); falling back to directory walk")
+        files_index = scan_repository(source="walk", **scan_kwargs)
     
     if log:
         log.info(f"  Found {len(files_index)} files")
 
     # ============================================
-    # STEP 2: File Metrics
+    # STEP 2: Single-pass File Analysis
     # ============================================
+    # Every analyzer below is a plugin of the fused engine: each file is read
+    # and decoded once, visited by all plugins that accept its type, and the
+    # per-file results are reduced into the artifacts written in steps 2-8.
     if log:
-        log.info("Step 2/11: Computing file metrics...")
+        log.info("Step 2/11: Analyzing files (metrics, Oozie, patterns, lineage, "
+                 "databases, SQL complexity, variables, definitions) in a single pass...")
     
-    files_index = compute_counts(repo_root, files_index)
-    _write_json(artifacts_dir / "files_index.json", files_index)
+    # Counts, Oozie, findings, lineage, database context, SQL complexity,
+    # variables, dynamic SQL and variable definitions (see extraction/registry.py)
+    if sql_cache_path and _needs_local_copy(Path(sql_cache_path)):
+        if log:
+            log.warning(f"  SQL statement cache not persisted: {sql_cache_path} is not on a local filesystem")
+        sql_cache_path = None
+    analyzers = build_extractors(
+        patterns,
+        options={
+            "sql_cache_entries": sql_cache_entries,
+            "sql_cache_path": sql_cache_path,
+            "sql_file_budget_s": sql_file_budget_s,
+            "sql_statement_budget_s": sql_statement_budget_s,
+        },
+    )
+    cache = None
+    if cache_path:
+        cache = AnalysisCache(
+            cache_path,
+            cache_fingerprint(patterns, rubric, repo_root, [a.name for a in analyzers],
+                              options={"max_file_mb": max_file_mb,
+                                       "sample_budget_mb": sample_budget_mb,
+                                       "sql_file_budget_s": sql_file_budget_s,
+                                       "sql_statement_budget_s": sql_statement_budget_s}),
+        )
+    
+    # Worker processes are stopped even when the analysis fails
+    pool = WorkerPool(repo_root, jobs=jobs, content_cache_mb=content_cache_mb) if jobs > 1 else None
+    try:
+        analysis = run_analyzers(
+            store, files_index, analyzers, pool=pool, cache=cache, dedup=dedup,
+            max_file_mb=max_file_mb, sample_budget_mb=sample_budget_mb,
+        )
+    finally:
+        if pool:
+            pool.close()
+    duplicates = mark_duplicates(files_index)
+    if cache:
+        cache.prune(f["path"] for f in files_index if f.get("path"))
+        cache.close()
+        if log:
+            cs = cache.stats
+            log.info(f"  Incremental cache: {cs['hits'] + cs['hash_hits']} unchanged, "
+                     f"{cs['misses']} analyzed, {cs['pruned']} removed"
+                     + (f", {cs['invalidated']} invalidated (config changed)" if cs['invalidated'] else ""))
+    if log:
+        large = [f for f in files_index if "sampled_ranges" in f]
+        if large:
+            partial = sum(1 for f in large if f.get("parse_status") == "sampled")
+            log.info(f"  Large files (> {max_file_mb} MB): {len(large)} scanned in windows, "
+                     f"{partial} sampled")
+    if log and duplicates["duplicate_files"]:
+        log.info(f"  Duplicates: {duplicates['duplicate_files']} files in "
+                 f"{duplicates['duplicate_groups']} groups analyzed once")
+    
+    write_artifact(artifacts_dir, "files_index", files_index, artifact_format)
 
     # ============================================
     # STEP 3: Oozie Workflow Parsing
     # ============================================
     if log:
-        log.info("Step 3/11: Parsing Oozie workflows...")
+        log.info("Step 3/11: Oozie workflows...")
     
-    workflows: List[Dict[str, Any]] = []
-    coordinators: List[Dict[str, Any]] = []
-    bundles: List[Dict[str, Any]] = []
-
-    for f in files_index:
-        p = repo_root / f["path"]
-        ftype = f.get("detected_type")
-        if ftype == "oozie_workflow_xml":
-            workflows.append(parse_workflow_xml(p))
-        elif ftype == "oozie_coordinator_xml":
-            coordinators.append(parse_coordinator_xml(p))
-        elif ftype == "oozie_bundle_xml":
-            bundles.append(parse_bundle_xml(p))
-
-    workflows_blob = {
-        "workflows": workflows,
-        "coordinators": coordinators,
-        "bundles": bundles
-    }
-    _write_json(artifacts_dir / "workflows.json", workflows_blob)
+    workflows_blob = analysis["oozie"]
+    workflows: List[Dict[str, Any]] = workflows_blob["workflows"]
+    coordinators: List[Dict[str, Any]] = workflows_blob["coordinators"]
+    bundles: List[Dict[str, Any]] = workflows_blob["bundles"]
+    write_artifact(artifacts_dir, "workflows", workflows_blob, artifact_format)
     
     if log:
         log.info(f"  Workflows: {len(workflows)}, Coordinators: {len(coordinators)}, Bundles: {len(bundles)}")
@@ -144,10 +254,10 @@ def analyze_repository(
     # STEP 4: Pattern Detection
     # ============================================
     if log:
-        log.info("Step 4/11: Detecting patterns (JDBC, URLs, Kafka, paths)...")
+        log.info("Step 4/11: Patterns (JDBC, URLs, Kafka, paths)...")
     
-    findings = scan_repo_patterns(repo_root, files_index, patterns)
-    _write_json(artifacts_dir / "findings.json", findings)
+    findings = analysis["findings"]
+    write_artifact(artifacts_dir, "findings", findings, artifact_format)
     
     if log:
         log.info(f"  JDBC: {findings.get('jdbc_count', 0)}, URLs: {findings.get('url_count', 0)}, "
@@ -157,10 +267,10 @@ def analyze_repository(
     # STEP 5: Basic SQL Lineage
     # ============================================
     if log:
-        log.info("Step 5/11: Extracting SQL lineage...")
+        log.info("Step 5/11: SQL lineage...")
     
-    lineage = extract_sql_lineage_repo(repo_root, files_index)
-    _write_json(artifacts_dir / "lineage.json", lineage)
+    lineage = analysis["lineage"]
+    write_artifact(artifacts_dir, "lineage", lineage, artifact_format)
     
     if log:
         log.info(f"  Lineage entries: {len(lineage)}")
@@ -169,10 +279,10 @@ def analyze_repository(
     # STEP 6: Database & Schema Extraction
     # ============================================
     if log:
-        log.info("Step 6/11: Extracting database and schema information...")
+        log.info("Step 6/11: Database and schema information...")
     
-    database_context = extract_databases_from_repository(repo_root, files_index)
-    _write_json(artifacts_dir / "database_context.json", database_context)
+    database_context = analysis["database_context"]
+    write_artifact(artifacts_dir, "database_context", database_context, artifact_format)
     
     if log:
         db_summary = database_context.get("summary", {})
@@ -185,28 +295,40 @@ def analyze_repository(
     # STEP 7: SQL Complexity Analysis
     # ============================================
     if log:
-        log.info("Step 7/11: Analyzing SQL complexity...")
+        log.info("Step 7/11: SQL complexity...")
     
-    sql_complexity_summary = analyze_repository_sql_complexity(repo_root, files_index)
-    _write_json(artifacts_dir / "sql_complexity_analysis.json", sql_complexity_summary)
+    sql_complexity_summary = analysis["sql_complexity"]
+    write_artifact(artifacts_dir, "sql_complexity_analysis", sql_complexity_summary, artifact_format)
     
     if log:
-        log.info(f"  Queries analyzed: {sql_complexity_summary.get('queries_analyzed', 0)}")
+        log.info(f"  Queries analyzed: {sql_complexity_summary.get('queries_analyzed', 0)} "
+                 f"in {sql_complexity_summary.get('files_analyzed', 0)} files")
         log.info(f"  Avg complexity score: {sql_complexity_summary.get('average_complexity_score', 0):.1f}")
         dist = sql_complexity_summary.get('complexity_distribution', {})
         log.info(f"  Distribution - Simple: {dist.get('simple', 0)}, "
                 f"Moderate: {dist.get('moderate', 0)}, "
                 f"Complex: {dist.get('complex', 0)}, "
                 f"Very Complex: {dist.get('very_complex', 0)}")
+        sc = sql_complexity_summary.get('statement_cache', {})
+        if sc.get('enabled') and sc.get('statements'):
+            log.info(f"  Statement cache: {sc['hits']} of {sc['statements']} statements reused "
+                     f"({sc['hit_rate']:.1%}; {sc.get('duplicate_file_hits', 0)} in duplicate files), "
+                     f"{sc['unique_statements']} distinct shapes")
+        if sql_complexity_summary.get('degraded_statements'):
+            log.warning(f"  {sql_complexity_summary['degraded_statements']} statements exceeded the SQL "
+                        f"analysis time budget (analysis_degraded)")
+        slowest = sql_complexity_summary.get('slowest_files') or []
+        if slowest:
+            log.info(f"  Slowest SQL file: {slowest[0]['file_path']} ({slowest[0]['analysis_seconds']:.2f}s)")
 
     # ============================================
     # STEP 8: Variable Extraction
     # ============================================
     if log:
-        log.info("Step 8/11: Extracting variables...")
+        log.info("Step 8/11: Variables...")
     
-    variables = extract_variables_repo(repo_root, files_index)
-    _write_json(artifacts_dir / "variables.json", variables)
+    variables = analysis["variables"]
+    write_artifact(artifacts_dir, "variables", variables, artifact_format)
 
     # ============================================
     # STEP 9: Dependency Graph
@@ -215,7 +337,7 @@ def analyze_repository(
         log.info("Step 9/11: Building dependency graph...")
     
     dep_graph = build_dependency_graph(repo_root, files_index, workflows_blob)
-    _write_json(artifacts_dir / "dependency_graph.json", dep_graph)
+    write_artifact(artifacts_dir, "dependency_graph", dep_graph, artifact_format)
 
     # ============================================
     # STEP 10: Complexity Scoring (Enhanced)
@@ -232,7 +354,7 @@ def analyze_repository(
         database_context=database_context,
         sql_complexity_summary=sql_complexity_summary
     )
-    _write_json(artifacts_dir / "complexity.json", complexity)
+    write_artifact(artifacts_dir, "complexity", complexity, artifact_format)
 
     # ============================================
     # STEP 11: Enhanced Repository Summary
@@ -244,6 +366,8 @@ def analyze_repository(
         "repo_root": str(repo_root),
         "generated_at_epoch": int(time.time()),
         "file_count": len(files_index),
+        "duplicate_file_count": duplicates["duplicate_files"],
+        "duplicate_group_count": duplicates["duplicate_groups"],
         
         # Workflow stats
         "workflow_count": len(workflows),
@@ -252,7 +376,7 @@ def analyze_repository(
         
         # Feature flags
         "has_streaming": has_streaming_repo(files_index, workflows_blob),
-        "has_dynamic_sql": has_dynamic_sql_repo(repo_root, files_index),
+        "has_dynamic_sql": analysis["dynamic_sql"],
         
         # Database stats
         "database_count": database_context.get("summary", {}).get("total_databases", 0),
@@ -270,7 +394,7 @@ def analyze_repository(
         # Performance metrics
         "elapsed_seconds": round(time.time() - t0, 2),
     }
-    _write_json(artifacts_dir / "repo_summary.json", repo_summary)
+    write_artifact(artifacts_dir, "repo_summary", repo_summary, artifact_format)
 
     # ============================================
     # STEP 12: Variable Resolution
@@ -280,19 +404,21 @@ def analyze_repository(
     
     resolved = resolve_repository(
         files_index=files_index,
-        repo_root=repo_root,
+        store=store,
         raw_findings=findings,
         raw_workflows=workflows_blob,
         raw_lineage=lineage,
+        definitions=analysis["definitions"],
     )
-    _write_json(artifacts_dir / "resolved.json", resolved.get("resolved_variables", []))
-    _write_json(artifacts_dir / "partially_resolved.json", resolved.get("partially_resolved_variables", []))
-    _write_json(artifacts_dir / "unresolved.json", resolved.get("still_unresolved_variables", []))
+    write_artifact(artifacts_dir, "definitions", analysis["definitions"], artifact_format)
+    write_artifact(artifacts_dir, "resolved", resolved.get("resolved_variables", []), artifact_format)
+    write_artifact(artifacts_dir, "partially_resolved", resolved.get("partially_resolved_variables", []), artifact_format)
+    write_artifact(artifacts_dir, "unresolved", resolved.get("still_unresolved_variables", []), artifact_format)
 
     # Write resolved versions
-    _write_json(artifacts_dir / "findings_resolved.json", resolved.get("resolved_findings", findings))
-    _write_json(artifacts_dir / "workflows_resolved.json", resolved.get("resolved_workflows", workflows_blob))
-    _write_json(artifacts_dir / "lineage_resolved.json", resolved.get("resolved_lineage", lineage))
+    write_artifact(artifacts_dir, "findings_resolved", resolved.get("resolved_findings", findings), artifact_format)
+    write_artifact(artifacts_dir, "workflows_resolved", resolved.get("resolved_workflows", workflows_blob), artifact_format)
+    write_artifact(artifacts_dir, "lineage_resolved", resolved.get("resolved_lineage", lineage), artifact_format)
 
     # ============================================
     # STEP 13: Master Manifest
@@ -325,6 +451,7 @@ def analyze_repository(
             },
             "variables": {
                 "variables.json": "Extracted variables",
+                "definitions.json": "Variable definitions (properties, Oozie configuration, Maven properties)",
                 "resolved.json": "Fully resolved variables",
                 "partially_resolved.json": "Partially resolved variables",
                 "unresolved.json": "Unresolved variables",
@@ -335,7 +462,12 @@ def analyze_repository(
         },
         "summary": repo_summary,
     }
-    _write_json(artifacts_dir / "MANIFEST.json", manifest)
+    # Artifact file names in the format they were written in
+    manifest["artifacts"] = {
+        group: {artifact_filename(fn[:-len(".json")], artifact_format): desc for fn, desc in files.items()}
+        for group, files in manifest["artifacts"].items()
+    }
+    write_json(artifacts_dir / "MANIFEST.json", manifest)
 
     # ============================================
     # STEP 14: CSV Exports Generation (NEW)
@@ -346,7 +478,21 @@ def analyze_repository(
     
     csv_results = {}
     try:
-        csv_results = export_all_to_csv(artifacts_dir, csv_dir)
+        # Straight from memory: the artifacts just written are not re-read
+        csv_results = export_results_to_csv(
+            {
+                "files_index": files_index,
+                "database_context": database_context,
+                "sql_complexity_analysis": sql_complexity_summary,
+                "findings": findings,
+                "repo_summary": repo_summary,
+                "complexity": complexity,
+                "unresolved": resolved.get("still_unresolved_variables", []),
+                "partially_resolved": resolved.get("partially_resolved_variables", []),
+                "variables": variables,
+            },
+            csv_dir,
+        )
         
         # Create README (explicit UTF-8 to support Unicode like →)
         readme_path = csv_dir / "README.txt"
@@ -399,8 +545,16 @@ def analyze_repository(
         database_context=database_context,
         sql_complexity_summary=sql_complexity_summary,
         csv_dir=csv_dir,  # Pass CSV directory for download links
+        report_mode=report_mode,
     )
 
+    if log:
+        st = store.stats
+        log.info(f"Content store: {st['source_reads']} source reads ({st['source_bytes']} bytes), "
+                 f"{st['memory_hits']} cache hits, {st['spill_writes']} spilled, "
+                 f"{st['spill_reads']} spill reads")
+    store.close()
+
     if log:
         log.info("=" * 80)
         log.info("Analysis Complete!")
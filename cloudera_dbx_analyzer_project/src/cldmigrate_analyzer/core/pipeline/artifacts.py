@@ -0,0 +1,243 @@
+"""
+Artifact files of a run, as pretty JSON or streamed NDJSON.
+
+- ``json`` (default): one ``json.dumps(obj, indent=2)`` document per
+  artifact, written in chunks; lazy sequences (TableReferenceView, the
+  resolved-artifact views) are encoded item by item.
+- ``ndjson``: one JSON value per line, each written as soon as it is
+  encoded, so no artifact is ever held as one string. The first line is a
+  header giving the artifact's shape. A list artifact then has one line per
+  item. An object artifact has one ``{"key": k, "value": v}`` line per
+  entry, except that a list value becomes one ``{"key": k, "item": x}``
+  line per element (an empty list stays a ``value`` line).
+- ``ndjson.gz``: the same stream, gzip-compressed (zstd is not in the
+  standard library).
+
+``load_artifact`` finds an artifact in whichever format it was written.
+NDJSON is read lazily: list artifacts and the list entries of object
+artifacts come back as NdjsonList sequences that re-read their lines from
+the file on each iteration.
+
+Usage:
+    write_artifact(artifacts_dir, "files_index", files_index, "ndjson.gz")
+    files_index = load_artifact(artifacts_dir, "files_index", default=[])
+    for f in files_index:
+        f["path"]
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from collections.abc import Sequence
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, Optional, Union
+
+ARTIFACT_FORMATS = ("json", "ndjson", "ndjson.gz")
+
+_HEADER_FORMAT = "cldmigrate-ndjson"
+_KEY_PREFIX = '{"key": '
+_ITEM_INFIX = ', "item": '
+
+
+def is_lazy_sequence(value: Any) -> bool:
+    """A non-list sequence to be streamed item by item (not str/bytes/tuple)."""
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes, list, tuple))
+
+
+def _is_items(value: Any) -> bool:
+    return isinstance(value, (list, tuple)) or is_lazy_sequence(value)
+
+
+# ----------------------------------------------------------------------
+# JSON
+# ----------------------------------------------------------------------
+
+def iter_json(obj: Any) -> Iterator[str]:
+    """
+    Chunks of ``json.dumps(obj, indent=2)``. Lazy sequences, at the top level
+    or as top-level values, are encoded item by item instead of being
+    materialized.
+    """
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+    if is_lazy_sequence(obj):
+        yield from _iter_json_items(encoder, obj, "")
+        return
+    if not (isinstance(obj, dict) and any(is_lazy_sequence(v) for v in obj.values())):
+        yield from encoder.iterencode(obj)
+        return
+    sep = "\n  "
+    yield "{"
+    for key, value in obj.items():
+        yield sep + json.dumps(str(key), ensure_ascii=False) + ": "
+        sep = ",\n  "
+        if is_lazy_sequence(value):
+            yield from _iter_json_items(encoder, value, "  ")
+        else:
+            yield encoder.encode(value).replace("\n", "\n  ")
+    yield "\n}"
+
+
+def _iter_json_items(encoder: json.JSONEncoder, items: Sequence, indent: str) -> Iterator[str]:
+    if not len(items):
+        yield "[]"
+        return
+    item_indent = "\n" + indent + "  "
+    sep = "[" + item_indent
+    for item in items:
+        yield sep + encoder.encode(item).replace("\n", item_indent)
+        sep = "," + item_indent
+    yield "\n" + indent + "]"
+
+
+def write_json(path: Path, obj: Any) -> None:
+    """Write object to JSON file with pretty formatting, streamed in chunks"""
+    with path.open("w", encoding="utf-8") as f:
+        for chunk in iter_json(obj):
+            f.write(chunk)
+
+
+# ----------------------------------------------------------------------
+# NDJSON
+# ----------------------------------------------------------------------
+
+def _open_binary(path: Path, mode: str) -> IO[bytes]:
+    if path.name.endswith(".gz"):
+        return gzip.open(path, mode + "b", compresslevel=6)
+    return path.open(mode + "b")
+
+
+def iter_ndjson(obj: Any) -> Iterator[str]:
+    """Lines (newline included) of the NDJSON form of ``obj``."""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    if isinstance(obj, dict):
+        yield encode({"format": _HEADER_FORMAT, "shape": "object"}) + "\n"
+        for key, value in obj.items():
+            prefix = _KEY_PREFIX + encode(str(key))
+            if _is_items(value) and len(value):
+                for item in value:
+                    yield prefix + _ITEM_INFIX + encode(item) + "}\n"
+            else:
+                yield prefix + ', "value": ' + encode(list(value) if _is_items(value) else value) + "}\n"
+    elif _is_items(obj):
+        yield encode({"format": _HEADER_FORMAT, "shape": "list"}) + "\n"
+        for item in obj:
+            yield encode(item) + "\n"
+    else:
+        yield encode({"format": _HEADER_FORMAT, "shape": "value"}) + "\n"
+        yield encode(obj) + "\n"
+
+
+def write_ndjson(path: Path, obj: Any) -> None:
+    """Write ``obj`` as NDJSON, gzip-compressed when ``path`` ends in .gz."""
+    with _open_binary(path, "w") as f:
+        for line in iter_ndjson(obj):
+            f.write(line.encode("utf-8"))
+
+
+class NdjsonList(Sequence):
+    """
+    Lazily read list of an NDJSON artifact: ``count`` lines from byte
+    ``offset`` (of the uncompressed stream), items of object entry ``key``
+    (or plain items when ``key`` is None). Indexing reads up to the item, so
+    iterate rather than index.
+    """
+
+    __slots__ = ("path", "offset", "count", "key")
+
+    def __init__(self, path: Path, offset: int, count: int, key: Optional[str] = None):
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.key = key
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Any]:
+        if not self.count:
+            return
+        with _open_binary(self.path, "r") as f:
+            f.seek(self.offset)
+            for line in islice(f, self.count):
+                value = json.loads(line)
+                yield value if self.key is None else value["item"]
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return list(islice(self, *index.indices(self.count)))
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return next(islice(self, index, None))
+
+
+def read_ndjson(path: Path) -> Any:
+    """
+    Load an NDJSON artifact. Lists stay on disk as NdjsonList; object
+    entries that are not lists are decoded during the one indexing pass.
+    """
+    decoder = json.JSONDecoder()
+    with _open_binary(path, "r") as f:
+        header = json.loads(f.readline() or b"{}")
+        if header.get("format") != _HEADER_FORMAT:
+            raise ValueError(f"{path}: not an NDJSON artifact")
+        shape = header.get("shape")
+        start = f.tell()
+        if shape == "value":
+            return json.loads(f.readline())
+        if shape == "list":
+            return NdjsonList(path, start, sum(1 for _ in f))
+
+        out: Dict[str, Any] = {}
+        offset = start
+        for raw in f:
+            line = raw.decode("utf-8")
+            key, end = decoder.raw_decode(line, len(_KEY_PREFIX))
+            if line.startswith(_ITEM_INFIX, end):
+                items = out.get(key)
+                if not isinstance(items, NdjsonList):
+                    items = out[key] = NdjsonList(path, offset, 0, key)
+                items.count += 1
+            else:
+                out[key] = json.loads(line)["value"]
+            offset += len(raw)
+        return out
+
+
+# ----------------------------------------------------------------------
+# Artifacts
+# ----------------------------------------------------------------------
+
+def artifact_filename(name: str, fmt: str = "json") -> str:
+    if fmt not in ARTIFACT_FORMATS:
+        raise ValueError(f"Unknown artifact format: {fmt!r} (expected one of {', '.join(ARTIFACT_FORMATS)})")
+    return f"{name}.{fmt}"
+
+
+def write_artifact(artifacts_dir: Path, name: str, obj: Any, fmt: str = "json") -> Path:
+    """Write artifact ``name`` in format ``fmt``; returns its path."""
+    path = Path(artifacts_dir) / artifact_filename(name, fmt)
+    if fmt == "json":
+        write_json(path, obj)
+    else:
+        write_ndjson(path, obj)
+    return path
+
+
+def load_artifact(artifacts_dir: Path, name: str, default: Any = None) -> Any:
+    """Artifact ``name`` in any format (NDJSON lazily), or ``default`` if missing or unreadable."""
+    for fmt in ARTIFACT_FORMATS:
+        path = Path(artifacts_dir) / artifact_filename(name, fmt)
+        if not path.exists():
+            continue
+        try:
+            if fmt == "json":
+                with path.open(encoding="utf-8") as f:
+                    return json.load(f)
+            return read_ndjson(path)
+        except (OSError, ValueError, KeyError):
+            return default
+    return default
@@ -0,0 +1,84 @@
+"""
+Content-hash deduplication of identical files.
+
+Large repositories carry many byte-identical copies of the same workflow XML
+or HQL script (per-environment folders, vendored copies). The engine parses
+each distinct blob once per plugin and fans the result out to every path
+that shares it.
+
+Only files whose size collides with another file's are hashed up front; a
+file with a unique size cannot have a duplicate. Hashes use the git blob
+format (``blob_sha1``), so SHAs read from ``.git/index`` are reused as-is.
+
+files_index entries gain ``content_hash`` (whenever the content was hashed)
+and ``duplicate_of`` (path of the first file with the same content).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..discovery.content_store import ContentStore, blob_sha1, blob_sha1_file
+from .parallel import WorkerPool, map_files
+
+
+def _hash_file(store: ContentStore, info: Dict[str, Any], stream_above: Optional[int]) -> Optional[str]:
+    try:
+        if stream_above is not None and int(info.get("size_bytes") or 0) > stream_above:
+            return blob_sha1_file(store.path(info["path"]))
+        return blob_sha1(store.read_bytes(info["path"]))
+    except OSError:
+        return None
+
+
+def hash_size_collisions(
+    store: ContentStore,
+    files: Sequence[Dict[str, Any]],
+    candidates: Sequence[Dict[str, Any]],
+    pool: Optional[WorkerPool] = None,
+    stream_above: Optional[int] = None,
+) -> int:
+    """
+    Set ``content_hash`` on each entry of ``candidates`` whose size is shared
+    by another entry of ``files`` and whose hash is not known yet. Files
+    above ``stream_above`` bytes are hashed from disk, bypassing the store.
+
+    Returns the number of files hashed.
+    """
+    sizes = Counter(f.get("size_bytes") for f in files if f.get("path"))
+    todo = [
+        f for f in candidates
+        if f.get("path") and f.get("content_hash") is None and sizes[f.get("size_bytes")] > 1
+    ]
+    for f, digest in zip(todo, map_files(_hash_file, store, todo, stream_above, pool=pool)):
+        if digest is not None:
+            f["content_hash"] = digest
+    return len(todo)
+
+
+def mark_duplicates(files_index: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Set ``duplicate_of`` on every entry whose content matches an earlier one.
+
+    Returns {"duplicate_files", "duplicate_groups", "duplicate_bytes"}.
+    """
+    first: Dict[str, str] = {}
+    groups = set()
+    dup_files = 0
+    dup_bytes = 0
+    for f in files_index:
+        digest = f.get("content_hash")
+        if digest is None or not f.get("path"):
+            continue
+        owner = first.setdefault(digest, f["path"])
+        if owner != f["path"]:
+            f["duplicate_of"] = owner
+            groups.add(digest)
+            dup_files += 1
+            dup_bytes += int(f.get("size_bytes") or 0)
+    return {
+        "duplicate_files": dup_files,
+        "duplicate_groups": len(groups),
+        "duplicate_bytes": dup_bytes,
+    }
@@ -0,0 +1,365 @@
+"""
+Fused single-pass file analysis engine.
+
+Each analysis stage registers as a ``FileAnalyzer`` plugin. The engine walks
+``files_index`` once: every file is opened as one in-memory ``Document`` and
+handed to all plugins that accept its type, then each plugin reduces its
+per-file results into the artifact shape the rest of the pipeline expects.
+
+Per-file visits run serially or on a ``WorkerPool`` (see parallel.py); the
+reduce step always runs in the calling process, in files_index order.
+
+With ``dedup`` on, files with identical content (see dedup.py) are visited
+once per plugin and the result is fanned out to the other paths through
+``FileAnalyzer.fan_out``.
+
+Files above ``max_file_mb`` are not read whole: they are memory-mapped and
+scanned in windows (discovery/windows.py). ``windowed`` plugins visit each
+window and merge the parts; the others get ``visit_large``.
+
+Usage:
+    artifacts = run_analyzers(store, files_index, [CountsAnalyzer(), ...], pool=pool)
+    findings = artifacts["findings"]
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from ..discovery.content_store import ContentStore, blob_sha1, blob_sha1_file, decode_text
+from ..discovery.windows import SampledFile, Window
+from .analysis_cache import AnalysisCache
+from .dedup import hash_size_collisions
+from .parallel import WorkerPool, map_files
+
+
+class Document:
+    """
+    One file as seen by analyzer plugins.
+
+    Content is read lazily through the ContentStore and memoized, so all
+    plugins visiting the file share a single read and decode. Read errors
+    propagate from ``text``/``lines``; plugins handle them as they always have.
+    """
+
+    __slots__ = ("info", "rel", "detected_type", "store", "_text", "_lines")
+
+    def __init__(self, store: ContentStore, info: Dict[str, Any]):
+        self.store = store
+        self.info = info
+        self.rel: Optional[str] = info.get("path")
+        self.detected_type = (info.get("detected_type") or "").lower()
+        self._text: Optional[str] = None
+        self._lines: Optional[List[str]] = None
+
+    @property
+    def path(self) -> Path:
+        """Absolute path of the file (repo_root joined)."""
+        return self.store.path(self.rel)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.store.read_text(self.rel)
+        return self._text
+
+    def head(self, size: int) -> str:
+        """
+        Roughly the first ``size`` characters, for signature sniffing: a slice
+        of ``text`` when it was already read, else only the first ``size``
+        bytes of the file, decoded.
+        """
+        if self._text is not None:
+            return self._text[:size]
+        with open(self.path, "rb") as f:
+            return decode_text(f.read(size))
+
+    @property
+    def lines(self) -> List[str]:
+        """``text.splitlines()``, shared by the line-oriented plugins."""
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+
+class FileAnalyzer:
+    """
+    Base class for engine plugins.
+
+    Subclasses set ``name`` (the key of their artifact in the engine output)
+    and ``file_types`` (detected types they want; None means every file with
+    a path), and implement ``visit`` and ``reduce``.
+
+    ``visit`` may run in a worker process: it must not mutate ``doc.info`` and
+    its result must be picklable. Plugins themselves are pickled to workers,
+    so keep their state small (patterns, options).
+
+    For duplicate files one visit result is shared: ``reduce`` must not
+    mutate results in place, and plugins whose result embeds the file path
+    override ``fan_out``.
+
+    Plugins that can work on parts of a file set ``windowed`` and implement
+    ``visit_window``/``merge_windows``; the merged result must have the same
+    shape as a ``visit`` result.
+
+    With an incremental cache, a file's results are stored only when every
+    plugin's ``cacheable`` agrees. They are stored as JSON (dataclasses as
+    dicts, tuples as lists), and ``from_cache`` rebuilds the visit result from
+    that form (and may drop what belongs to the earlier run, e.g. timings).
+
+    ``cost`` is the visit time per byte relative to the counts plugin; it
+    weights files when sharding them over workers (see
+    extraction/registry.py), which builds plugins through ``from_config``.
+    """
+
+    name: str = ""
+    file_types: Optional[FrozenSet[str]] = None
+    windowed: bool = False
+    cost: float = 1.0
+
+    @classmethod
+    def from_config(cls, patterns: Dict[str, Any], options: Dict[str, Any]) -> "FileAnalyzer":
+        """Build the plugin from the pattern config and the run options."""
+        return cls()
+
+    def accepts(self, info: Dict[str, Any]) -> bool:
+        if not info.get("path"):
+            return False
+        if self.file_types is None:
+            return True
+        return (info.get("detected_type") or "").lower() in self.file_types
+
+    def dedup_key(self, info: Dict[str, Any]) -> Optional[Hashable]:
+        """
+        Files with equal keys share one visit; None means always visit.
+        The default covers plugins whose result depends only on the content
+        and the detected type.
+        """
+        digest = info.get("content_hash")
+        if digest is None:
+            return None
+        return digest, (info.get("detected_type") or "").lower()
+
+    def fan_out(self, result: Any, source: Dict[str, Any], target: Dict[str, Any]) -> Any:
+        """Adapt the visit result of ``source`` to its duplicate ``target``."""
+        return result
+
+    def cacheable(self, result: Any) -> bool:
+        """Whether ``result`` may be kept in the incremental cache."""
+        return True
+
+    def from_cache(self, result: Any) -> Any:
+        """Rebuild a result stored by an earlier run from its JSON form."""
+        return result
+
+    def visit(self, doc: Document) -> Any:
+        raise NotImplementedError
+
+    def visit_window(self, doc: Document, window: Window) -> Any:
+        raise NotImplementedError
+
+    def merge_windows(self, parts: List[Any]) -> Any:
+        raise NotImplementedError
+
+    def visit_large(self, doc: Document, sampled: SampledFile) -> Any:
+        """Visit a file above max_file_mb without windows (default: a full visit)."""
+        return self.visit(doc)
+
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> Any:
+        """Merge ``(file_info, visit_result)`` pairs, in files_index order."""
+        raise NotImplementedError
+
+
+def _visit_large(doc: Document, analyzers: Sequence[FileAnalyzer], budget_bytes: int) -> Dict[str, Any]:
+    windowed = [a for a in analyzers if a.windowed]
+    parts: Dict[str, List[Any]] = {a.name: [] for a in windowed}
+    with SampledFile(doc.path, budget_bytes) as sampled:
+        if windowed:
+            for window in sampled.windows():
+                for a in windowed:
+                    parts[a.name].append(a.visit_window(doc, window))
+        return {
+            a.name: a.merge_windows(parts[a.name]) if a.windowed else a.visit_large(doc, sampled)
+            for a in analyzers
+        }
+
+
+def _visit_file(
+    store: ContentStore,
+    info: Dict[str, Any],
+    analyzers: Sequence[FileAnalyzer],
+    with_hash: bool = False,
+    shared: Optional[Dict[str, FrozenSet[str]]] = None,
+    large: Optional[Tuple[int, int]] = None,
+) -> Any:
+    doc = Document(store, info)
+    skip = shared.get(info.get("path"), ()) if shared else ()
+    active = [a for a in analyzers if a.accepts(info) and a.name not in skip]
+
+    size = info.get("size_bytes")
+    is_large = large is not None and bool(doc.rel) and isinstance(size, int) and size > large[0]
+    # For the incremental cache, size/mtime are taken before the content is
+    # read and hashed: a file edited during the run then looks modified on
+    # the next run instead of matching results of its old content. Large
+    # files bypass the store, so they are stat'ed and hashed before the visit.
+    digest = stat = None
+    if with_hash and is_large:
+        digest = info.get("content_hash")
+        try:
+            st = os.stat(doc.path)
+            stat = (st.st_size, st.st_mtime_ns)
+            if digest is None:
+                digest = blob_sha1_file(doc.path)
+        except OSError:
+            digest = stat = None
+    results = None
+    if is_large:
+        try:
+            results = _visit_large(doc, active, large[1])
+        except OSError:
+            pass  # unreadable: the plain visit reports it like any read error
+    if results is None:
+        results = {a.name: a.visit(doc) for a in active}
+    if not with_hash:
+        return results
+    if not is_large and doc.rel:
+        # Hashed while the bytes are in memory, unless the scan already had
+        # the git blob SHA; the store keeps the stat of its read
+        digest = info.get("content_hash")
+        try:
+            if digest is None:
+                digest = blob_sha1(store.read_bytes(doc.rel))
+            stat = store.read_stat(doc.rel)
+        except OSError:
+            digest = None
+    return results, digest, stat
+
+
+def _visit_weight(
+    info: Dict[str, Any],
+    analyzers: Sequence[FileAnalyzer],
+    skip: Iterable[str],
+    large: Optional[Tuple[int, int]],
+) -> int:
+    """Estimated visit cost of a file: its bytes times the plugin costs."""
+    size = int(info.get("size_bytes") or 0)
+    if large is not None and size > large[0]:
+        size = min(size, large[1])  # windowed scans stop at the sample budget
+    cost = sum(a.cost for a in analyzers if a.name not in skip and a.accepts(info))
+    return int(size * cost)
+
+
+def run_analyzers(
+    store: ContentStore,
+    files_index: List[Dict[str, Any]],
+    analyzers: Sequence[FileAnalyzer],
+    pool: Optional[WorkerPool] = None,
+    cache: Optional[AnalysisCache] = None,
+    dedup: bool = False,
+    max_file_mb: Optional[int] = None,
+    sample_budget_mb: int = 64,
+) -> Dict[str, Any]:
+    """
+    Visit every file once with all ``analyzers`` and reduce their results.
+
+    With a ``cache``, unchanged files reuse their stored per-file results and
+    only new or modified files are visited; fresh results are written back.
+
+    With ``dedup``, files that share their size with another file are hashed
+    first (``content_hash`` is set on their entries) and each plugin visits
+    one file per ``dedup_key``; cached results also serve as sources.
+
+    With ``max_file_mb``, larger files are scanned in windows, sampling at
+    most ``sample_budget_mb`` of each (see discovery/windows.py).
+
+    Returns ``{analyzer.name: reduced_artifact}``.
+    """
+    analyzers = list(analyzers)
+    large = None
+    if max_file_mb is not None:
+        large = (int(max_file_mb) * 1024 * 1024, int(sample_budget_mb) * 1024 * 1024)
+    stream_above = large[0] if large else None
+    todo = [f for f in files_index or [] if any(a.accepts(f) for a in analyzers)]
+
+    by_name = {a.name: a for a in analyzers}
+    per_file: List[Any] = [None] * len(todo)
+    pending = list(range(len(todo)))
+    if cache is not None:
+        pending = []
+        for i, f in enumerate(todo):
+            if f.get("path"):
+                hit = cache.lookup(
+                    store, f, [a.name for a in analyzers if a.accepts(f)], stream_above=stream_above
+                )
+                if hit is not None:
+                    results, digest = hit
+                    per_file[i] = {name: by_name[name].from_cache(r) for name, r in results.items()}
+                    f.setdefault("content_hash", digest)
+                    continue
+            pending.append(i)
+
+    # (analyzer, key) -> index of the file whose result is shared;
+    # (pending index, analyzer) -> source index for fanned-out results
+    sources: Dict[Tuple[str, Hashable], int] = {}
+    fanned: Dict[Tuple[int, str], int] = {}
+    if dedup:
+        hash_size_collisions(
+            store, todo, [todo[i] for i in pending], pool=pool, stream_above=stream_above
+        )
+        is_pending = set(pending)
+        order = [i for i in range(len(todo)) if i not in is_pending] + pending
+        for i in order:
+            f = todo[i]
+            for a in analyzers:
+                if not a.accepts(f):
+                    continue
+                key = a.dedup_key(f)
+                if key is None:
+                    continue
+                src = sources.setdefault((a.name, key), i)
+                if src != i:
+                    fanned[(i, a.name)] = src
+
+    shared: Dict[str, FrozenSet[str]] = {}
+    for (i, name) in fanned:
+        shared[todo[i]["path"]] = shared.get(todo[i]["path"], frozenset()) | {name}
+    visit = [
+        i for i in pending
+        if len(shared.get(todo[i].get("path"), ())) < sum(1 for a in analyzers if a.accepts(todo[i]))
+    ]
+
+    weights = [
+        _visit_weight(todo[i], analyzers, shared.get(todo[i].get("path"), ()), large) for i in visit
+    ]
+    digests: Dict[int, Optional[str]] = {}
+    stats: Dict[int, Optional[Tuple[int, int]]] = {}
+    fresh = map_files(
+        _visit_file, store, [todo[i] for i in visit], analyzers, cache is not None, shared, large,
+        pool=pool, weights=weights,
+    )
+    for i, res in zip(visit, fresh):
+        if cache is not None:
+            res, digests[i], stats[i] = res
+            if digests[i] is not None:
+                todo[i].setdefault("content_hash", digests[i])
+        per_file[i] = res
+
+    for i in pending:
+        if per_file[i] is None:
+            per_file[i] = {}
+    for (i, name), src in sorted(fanned.items()):
+        per_file[i][name] = by_name[name].fan_out(per_file[src][name], todo[src], todo[i])
+
+    if cache is not None:
+        for i in pending:
+            f = todo[i]
+            if f.get("path") and all(by_name[name].cacheable(r) for name, r in per_file[i].items()):
+                cache.put(f, digests.get(i) or f.get("content_hash"), per_file[i], stats.get(i))
+
+    out: Dict[str, Any] = {}
+    for a in analyzers:
+        visited = [(f, res[a.name]) for f, res in zip(todo, per_file) if a.name in res]
+        out[a.name] = a.reduce(visited)
+    return out
@@ -0,0 +1,166 @@
+"""
+Process-pool execution of per-file analysis stages.
+
+Repo-level stages are split into a per-file function (top-level, so it can be
+pickled) and a serial merge loop. ``map_files`` runs the per-file function
+either in-process or on a ``WorkerPool``; results always come back in
+``files`` order, so the merge - and therefore every artifact - is identical
+to a serial run regardless of how files were sharded.
+
+Per-file functions have the signature ``fn(store, file_info, *args)``. Each
+worker process owns its own ContentStore over the same repository root.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..discovery.content_store import ContentStore
+
+# Shards per worker; more shards smooth out files whose cost is not
+# proportional to their size, at the price of more task round-trips.
+SHARDS_PER_JOB = 4
+
+_worker_store: Optional[ContentStore] = None
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """Normalize a --jobs value: 0 or negative means one worker per CPU."""
+    if jobs is None:
+        return 1
+    jobs = int(jobs)
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def shard_by_size(sizes: Sequence[int], shard_count: int) -> List[List[int]]:
+    """
+    Size-balanced sharding (longest-processing-time first). ``sizes`` may be
+    any per-item cost estimate.
+
+    Returns lists of indexes into ``sizes``; each index list is sorted so a
+    shard walks its files in index order.
+    """
+    shard_count = max(1, min(shard_count, len(sizes)))
+    shards: List[List[int]] = [[] for _ in range(shard_count)]
+    heap = [(0, s) for s in range(shard_count)]
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i], i))
+    for i in order:
+        load, target = heapq.heappop(heap)
+        shards[target].append(i)
+        heapq.heappush(heap, (load + max(1, sizes[i]), target))
+    for s in shards:
+        s.sort()
+    return [s for s in shards if s]
+
+
+def _init_worker(repo_root: str, memory_budget_mb: int, spill_dir: str) -> None:
+    global _worker_store
+    _worker_store = ContentStore(repo_root, memory_budget_mb=memory_budget_mb, spill_dir=spill_dir)
+
+
+def _run_shard(
+    fn: Callable[..., Any],
+    items: List[Tuple[int, Dict]],
+    args: Tuple[Any, ...],
+) -> List[Tuple[int, Any]]:
+    store = _worker_store
+    return [(i, fn(store, f, *args)) for i, f in items]
+
+
+class WorkerPool:
+    """
+    Pool of analysis worker processes sharing nothing but the repository root.
+
+    Usage:
+        with WorkerPool(repo_root, jobs=8) as pool:
+            results = map_files(_per_file, store, files, pool=pool)
+    """
+
+    def __init__(
+        self,
+        repo_root: Union[str, Path],
+        jobs: int,
+        content_cache_mb: int = 256,
+    ):
+        self.jobs = max(1, int(jobs))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._spill_dir: Optional[str] = None
+        if self.jobs > 1:
+            # Workers exit via os._exit, which skips their own cleanup hooks,
+            # so their spill files live under a directory owned by this process.
+            self._spill_dir = tempfile.mkdtemp(prefix="cldmigrate_workers_")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_init_worker,
+                initargs=(
+                    str(repo_root),
+                    max(0, int(content_cache_mb)) // self.jobs,
+                    self._spill_dir,
+                ),
+            )
+
+    def map_files(
+        self,
+        fn: Callable[..., Any],
+        files: Sequence[Dict],
+        *args: Any,
+        weights: Optional[Sequence[int]] = None,
+    ) -> List[Any]:
+        """
+        Run ``fn`` over ``files`` on the workers; results are in ``files`` order.
+        Shards are balanced on ``weights`` (default: file sizes).
+        """
+        if self._executor is None:
+            raise RuntimeError("WorkerPool has no worker processes (jobs <= 1)")
+        sizes = list(weights) if weights is not None else [int(f.get("size_bytes") or 0) for f in files]
+        shards = shard_by_size(sizes, self.jobs * SHARDS_PER_JOB)
+        futures = [
+            self._executor.submit(_run_shard, fn, [(i, files[i]) for i in shard], args)
+            for shard in shards
+        ]
+        results: List[Any] = [None] * len(files)
+        for fut in futures:
+            for i, res in fut.result():
+                results[i] = res
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def map_files(
+    fn: Callable[..., Any],
+    store: ContentStore,
+    files: Sequence[Dict],
+    *args: Any,
+    pool: Optional[WorkerPool] = None,
+    weights: Optional[Sequence[int]] = None,
+) -> List[Any]:
+    """
+    Apply a per-file function to ``files``, serially or on ``pool``.
+
+    Results are aligned with ``files`` either way. ``weights`` (estimated
+    cost per file, default its size) balance the worker shards.
+    """
+    if pool is None or pool.jobs <= 1 or len(files) < 2:
+        return [fn(store, f, *args) for f in files]
+    return pool.map_files(fn, files, *args, weights=weights)
@@ -0,0 +1,91 @@
+"""
+Sparse overlay of resolved values over raw, immutable artifacts.
+
+resolve_repository used to resolve findings, workflows and lineage by
+rewriting records of shallow copies, which also rewrote the raw artifacts
+shared with the rest of the pipeline, and kept a second full copy of the
+lineage. The raw artifacts are now never modified: ResolutionOverlay keeps
+only ``(record id, field) -> resolved value`` for the fields that actually
+changed, and the resolved artifacts are read-only views that merge one record
+at a time when accessed (and when streamed to ``*_resolved.json``).
+
+A record id is the path of the record in its artifact, list keys and
+indexes alternating: ``("urls", 3)``, ``("workflows", 0, "actions", 2)``,
+``("lineage", 17)``.
+
+Usage:
+    overlay = ResolutionOverlay()
+    overlay.set(("urls", 3), "value", "jdbc:hive2://prod:10000")
+    urls = overlay.records(findings["urls"], ("urls",))
+    urls[3]["value"], findings["urls"][3]["value"]   # resolved, raw
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Set, Tuple, Union
+
+RecordId = Tuple[Any, ...]
+
+
+class ResolvedRecords(Sequence):
+    """Read-only sequence of the records of a raw list with the overlay applied."""
+
+    __slots__ = ("overlay", "_records", "_prefix")
+
+    def __init__(self, overlay: "ResolutionOverlay", records: List[Any], prefix: RecordId):
+        self.overlay = overlay
+        self._records = records
+        self._prefix = prefix
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._records)))]
+        if index < 0:
+            index += len(self._records)
+        return self.overlay.record(self._records[index], self._prefix + (index,))
+
+    def __iter__(self) -> Iterator[Any]:
+        record = self.overlay.record
+        prefix = self._prefix
+        for i, rec in enumerate(self._records):
+            yield record(rec, prefix + (i,))
+
+
+class ResolutionOverlay:
+    """Resolved field values by record id; see the module docstring."""
+
+    def __init__(self) -> None:
+        self._fields: Dict[RecordId, Dict[str, Any]] = {}
+        # record id -> keys of its nested lists holding overridden records
+        self._nested: Dict[RecordId, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(f) for f in self._fields.values())
+
+    def set(self, rid: RecordId, field: str, value: Any) -> None:
+        self._fields.setdefault(rid, {})[field] = value
+        for depth in range(2, len(rid), 2):
+            self._nested.setdefault(rid[:depth], set()).add(rid[depth])
+
+    def record(self, record: Any, rid: RecordId) -> Any:
+        """
+        ``record`` with its overrides: the raw record itself when nothing in
+        it changed, else a new dict (nested lists merged the same way).
+        """
+        fields = self._fields.get(rid)
+        nested = self._nested.get(rid)
+        if not fields and not nested:
+            return record
+        out = dict(record)
+        if fields:
+            out.update(fields)
+        for key in nested or ():
+            out[key] = [self.record(child, rid + (key, i)) for i, child in enumerate(record[key])]
+        return out
+
+    def records(self, records: List[Any], prefix: RecordId) -> ResolvedRecords:
+        return ResolvedRecords(self, records, prefix)
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import io
 import re
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Dict, Iterable, List, Tuple, Any, Optional
+from xml.etree import ElementTree
+
+from ..discovery.content_store import ContentStore
+from ..discovery.windows import SampledFile
+from ..pipeline.engine import Document, FileAnalyzer, run_analyzers
+from ..pipeline.parallel import WorkerPool
+from .overlay import RecordId, ResolutionOverlay
 
 
 _VAR_RE = re.compile(r"\$\{([^}]+)\}")
@@ -113,99 +120,338 @@ def resolve_string(s: str, lookup: Dict[str, str], max_depth: int = 10) -> Tuple
     return cur, unresolved
 
 
-def build_definitions_from_repo(files_index: List[Dict[str, Any]], repo_root: Path) -> List[VarDef]:
-    defs: List[VarDef] = []
-    for f in files_index:
-        p = repo_root / f["path"]
-        ftype = f.get("detected_type", "")
+class VariableResolver:
+    """
+    Resolves every variable of ``lookup`` once and memoizes resolved strings.
+
+    The definitions form a graph (``a=${b}/x`` depends on ``b``). Its
+    strongly connected components come out of Tarjan's algorithm with
+    dependencies first, so each variable is expanded once, from values that
+    are already final. Variables on a true cycle (``a=${b}``, ``b=${a}``, or
+    ``a=${a}/x``) get no value: ``cycles`` maps each of them to the members of
+    its cycle, and placeholders naming them are left as they are and
+    reported unresolved.
+
+    ``resolve`` gives the same result as ``resolve_string`` without its
+    depth limit, and resolves each distinct string only once.
+
+    Usage:
+        resolver = VariableResolver({"env": "prod", "db": "${env}_raw"})
+        resolver.resolve("${db}.orders")   # ("prod_raw.orders", [])
+        resolver.values["db"], resolver.unresolved.get("db", [])
+    """
+
+    def __init__(self, lookup: Dict[str, str]):
+        self.lookup = lookup
+        self.values: Dict[str, str] = {}
+        self.unresolved: Dict[str, List[str]] = {}
+        self.cycles: Dict[str, List[str]] = {}
+        self._cache: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        for component in self._components():
+            if len(component) > 1 or component[0] in self._dependencies(component[0]):
+                members = sorted(component)
+                for name in component:
+                    self.cycles[name] = members
+                continue
+            name = component[0]
+            value, un = self._substitute(lookup[name])
+            self.values[name] = value
+            if un:
+                self.unresolved[name] = un
+
+    def _dependencies(self, name: str) -> List[str]:
+        lookup = self.lookup
+        return [k for k in _VAR_RE.findall(lookup[name]) if k in lookup]
+
+    def _components(self) -> List[List[str]]:
+        # Iterative Tarjan; components are emitted dependencies first
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        on_stack: set = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+
+        for root in self.lookup:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._dependencies(root)))]
+            while work:
+                name, deps = work[-1]
+                for dep in deps:
+                    if dep not in index:
+                        index[dep] = low[dep] = len(index)
+                        stack.append(dep)
+                        on_stack.add(dep)
+                        work.append((dep, iter(self._dependencies(dep))))
+                        break
+                    if dep in on_stack:
+                        low[name] = min(low[name], index[dep])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[name])
+                    if low[name] == index[name]:
+                        component: List[str] = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == name:
+                                break
+                        components.append(component)
+        return components
+
+    def _substitute(self, s: str) -> Tuple[str, List[str]]:
+        unresolved: List[str] = []
+        values = self.values
+
+        def repl(m: re.Match) -> str:
+            key = m.group(1)
+            if key in values:
+                for u in self.unresolved.get(key, ()):
+                    if u not in unresolved:
+                        unresolved.append(u)
+                return values[key]
+            if key not in unresolved:
+                unresolved.append(key)
+            return m.group(0)
+
+        return _VAR_RE.sub(repl, s), unresolved
+
+    def resolve(self, s: str) -> Tuple[str, List[str]]:
+        """Resolved ``s`` and the variables left unresolved in it."""
+        if "${" not in s:
+            return s, []
+        hit = self._cache.get(s)
+        if hit is None:
+            value, un = self._substitute(s)
+            hit = self._cache[s] = (value, tuple(un))
+        return hit[0], list(hit[1])
+
+
+# Generic XML files are only parsed when their head looks like a Hadoop-style
+# <configuration> or a list of <property> elements
+_XML_HEAD_BYTES = 16 * 1024
+_XML_CONF_SNIFF_RE = re.compile(r"<\s*(?:configuration|property)\b", re.IGNORECASE)
+
+
+def _strip_namespace(tag: Any) -> str:
+    """Element name without its ``{namespace}``, case kept (Maven property names)."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _local_name(tag: Any) -> str:
+    """Lowercased element name, for matching tags."""
+    return _strip_namespace(tag).lower()
+
+
+def _xml_text(elem: Any) -> str:
+    return re.sub(r"\s+", " ", "".join(elem.itertext()).strip())
+
+
+def stream_xml_definitions(source: Any, maven: bool = False) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    ``parse_oozie_configuration`` and (with ``maven``) ``parse_maven_properties``
+    in one streaming pass over the XML in ``source`` (a path or a binary file
+    object). Parsed elements are cleared as soon as they are read. Raises
+    ElementTree.ParseError on malformed XML.
+    """
+    conf: Dict[str, str] = {}
+    props: Dict[str, str] = {}
+    in_properties = False
+    for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+        tag = _local_name(elem.tag)
+        if event == "start":
+            if maven and tag == "properties":
+                in_properties = True
+            continue
+        if tag == "property":
+            name = value = None
+            for child in elem:
+                child_tag = _local_name(child.tag)
+                if child_tag == "name" and name is None:
+                    name = _xml_text(child)
+                elif child_tag == "value" and value is None:
+                    value = _xml_text(child)
+            if name and value is not None:
+                conf[name] = value
+            elem.clear()
+        elif in_properties and tag == "properties":
+            for child in elem:
+                name = _strip_namespace(child.tag)
+                value = _xml_text(child)
+                if name and value:
+                    props[name] = value
+            in_properties = False
+            maven = False
+            elem.clear()
+    return conf, props
+
+
+class DefinitionsAnalyzer(FileAnalyzer):
+    """
+    Engine plugin harvesting variable definitions for resolve_repository.
+
+    Only candidate files are visited: properties/ini files, Oozie XML and
+    Maven POMs, plus other XML whose head sniffs like a configuration.
+    XML is parsed with a streaming parser (regexes as fallback for malformed
+    XML). Per-file results land in the incremental cache like every other
+    plugin's; the reduced definition table is written to definitions.json.
+    """
+
+    name = "definitions"
+
+    def accepts(self, info: Dict[str, Any]) -> bool:
+        rel = info.get("path")
+        if not rel:
+            return False
+        ftype = (info.get("detected_type") or "").lower()
+        lower = rel.lower()
+        return (
+            ftype in ("properties", "ini_conf", "build_maven")
+            or ftype.startswith("oozie_")
+            or lower.endswith(".properties")
+            or lower.endswith(".xml")
+        )
+
+    def visit(self, doc: Document) -> Optional[List[Tuple[str, str, str]]]:
+        return self._visit(doc, large=False)
+
+    def visit_large(self, doc: Document, sampled: SampledFile) -> Optional[List[Tuple[str, str, str]]]:
+        return self._visit(doc, large=True)
+
+    def _visit(self, doc: Document, large: bool) -> Optional[List[Tuple[str, str, str]]]:
+        """[(kind, name, value), ...] in the order build_definitions_from_repo used."""
+        ftype = doc.detected_type
+        name = doc.rel.rsplit("/", 1)[-1].lower()
+        is_properties = ftype in ("properties", "ini_conf") or name.endswith(".properties")
+        is_maven = name == "pom.xml" or ftype == "build_maven"
+        is_xml = ftype.startswith("oozie_") or name.endswith(".xml")
+        out: List[Tuple[str, str, str]] = []
         try:
-            text = p.read_text(encoding="utf-8", errors="replace")
+            if is_properties:
+                for k, v in parse_properties_text(doc.text).items():
+                    out.append(("properties", k, v))
+            if is_xml or is_maven:
+                sniff = not (is_maven or ftype.startswith("oozie_"))
+                if sniff and not _XML_CONF_SNIFF_RE.search(doc.head(_XML_HEAD_BYTES)):
+                    return out or None
+                try:
+                    source = str(doc.path) if large else io.BytesIO(doc.store.read_bytes(doc.rel))
+                    conf, props = stream_xml_definitions(source, maven=is_maven)
+                except ElementTree.ParseError:
+                    text = doc.text
+                    conf = parse_oozie_configuration(text)
+                    props = parse_maven_properties(text) if is_maven else {}
+                if is_xml:
+                    out.extend(("oozie_conf", k, v) for k, v in conf.items())
+                out.extend(("maven_props", k, v) for k, v in props.items())
         except Exception:
-            continue
+            return out or None
+        return out or None
+
+    def reduce(self, visited: List[Tuple[Dict[str, Any], Any]]) -> List[Dict[str, str]]:
+        out: List[Dict[str, str]] = []
+        for f, defs in visited:
+            for kind, k, v in defs or ():
+                out.append({"name": k, "value": v, "kind": kind, "file": f["path"]})
+        return out
 
-        if ftype in ("properties", "ini_conf") or p.name.endswith(".properties"):
-            d = parse_properties_text(text)
-            for k, v in d.items():
-                defs.append(VarDef(name=k, value=v, defined_in=str(p), kind="properties"))
 
-        # pick up oozie configs inside workflow/coordinator xml too
-        if ftype.startswith("oozie_") or (p.suffix.lower() == ".xml"):
-            d = parse_oozie_configuration(text)
-            for k, v in d.items():
-                defs.append(VarDef(name=k, value=v, defined_in=str(p), kind="oozie_conf"))
+def definitions_from_table(table: List[Dict[str, str]], store: ContentStore) -> List[VarDef]:
+    """VarDefs of a DefinitionsAnalyzer table (``defined_in`` is the absolute path)."""
+    return [
+        VarDef(name=d["name"], value=d["value"], defined_in=str(store.path(d["file"])), kind=d["kind"])
+        for d in table
+    ]
 
-        if p.name.lower() == "pom.xml" or ftype == "build_maven":
-            d = parse_maven_properties(text)
-            for k, v in d.items():
-                defs.append(VarDef(name=k, value=v, defined_in=str(p), kind="maven_props"))
 
-    return defs
+def build_definitions_from_repo(
+    files_index: List[Dict[str, Any]],
+    store: ContentStore,
+    pool: Optional[WorkerPool] = None,
+) -> List[VarDef]:
+    analyzer = DefinitionsAnalyzer()
+    table = run_analyzers(store, files_index, [analyzer], pool=pool)[analyzer.name]
+    return definitions_from_table(table, store)
 
 
 def resolve_repository(
     files_index: List[Dict[str, Any]],
-    repo_root: Path,
+    store: ContentStore,
     raw_findings: Dict[str, Any],
     raw_workflows: Dict[str, Any],
     raw_lineage: List[Dict[str, Any]],
+    definitions: Optional[List[Dict[str, str]]] = None,
 ) -> Dict[str, Any]:
-    # 1) build definitions
-    defs = build_definitions_from_repo(files_index, repo_root)
+    # 1) build definitions (the engine's DefinitionsAnalyzer table when given)
+    if definitions is None:
+        defs = build_definitions_from_repo(files_index, store)
+    else:
+        defs = definitions_from_table(definitions, store)
     chosen, all_defs = merge_definitions([defs])
     lookup = {k: v.value for k, v in chosen.items()}
+    resolver = VariableResolver(lookup)
+    resolve = resolver.resolve
 
     # 2) resolve selected data blobs
-    # resolve in findings evidence values
-    resolved_findings = raw_findings.copy()
+    # The raw artifacts are left as they are: changed fields go to a sparse
+    # overlay and the resolved artifacts are views over raw + overlay
+    overlay = ResolutionOverlay()
     unresolved_hits: List[Dict[str, Any]] = []
 
-    def _resolve_evidence_list(lst: List[Dict[str, Any]], field: str) -> None:
-        for item in lst:
+    def _resolve_fields(rid: RecordId, item: Dict[str, Any], fields: Iterable[str]) -> Iterable[Tuple[str, List[str]]]:
+        for field in fields:
             val = item.get(field)
             if isinstance(val, str):
-                new_val, un = resolve_string(val, lookup)
-                item[field] = new_val
+                new_val, un = resolve(val)
+                if new_val != val:
+                    overlay.set(rid, field, new_val)
                 if un:
-                    unresolved_hits.append(
-                        {"kind": "finding", "what": field, "unresolved": un, "file": item.get("file"), "line": item.get("line")}
-                    )
+                    yield field, un
 
-    for k in ("jdbc_strings", "urls", "storage_paths", "kafka_bootstrap_hints"):
-        if k in resolved_findings and isinstance(resolved_findings[k], list):
-            _resolve_evidence_list(resolved_findings[k], "value")
+    # resolve in findings evidence values
+    finding_keys = [
+        k for k in ("jdbc_strings", "urls", "storage_paths", "kafka_bootstrap_hints")
+        if isinstance(raw_findings.get(k), list)
+    ]
+    for k in finding_keys:
+        for i, item in enumerate(raw_findings[k]):
+            for field, un in _resolve_fields((k, i), item, ("value",)):
+                unresolved_hits.append(
+                    {"kind": "finding", "what": field, "unresolved": un, "file": item.get("file"), "line": item.get("line")}
+                )
 
     # resolve in workflows/coordinators
-    resolved_workflows = raw_workflows.copy()
-    for wf in resolved_workflows.get("workflows", []):
-        for field in ("app_path", "workflow_path"):
-            if isinstance(wf.get(field), str):
-                wf[field], un = resolve_string(wf[field], lookup)
-                if un:
-                    unresolved_hits.append({"kind": "workflow", "what": field, "unresolved": un, "file": wf.get("source_file")})
-        for act in wf.get("actions", []):
-            for field in ("main", "script", "class", "args"):
-                if isinstance(act.get(field), str):
-                    act[field], un = resolve_string(act[field], lookup)
-                    if un:
-                        unresolved_hits.append({"kind": "action", "what": field, "unresolved": un, "file": wf.get("source_file")})
-
-    for coord in resolved_workflows.get("coordinators", []):
-        for field in ("frequency", "start", "end", "timezone", "workflow_app_path"):
-            if isinstance(coord.get(field), str):
-                coord[field], un = resolve_string(coord[field], lookup)
-                if un:
-                    unresolved_hits.append({"kind": "coordinator", "what": field, "unresolved": un, "file": coord.get("source_file")})
+    for i, wf in enumerate(raw_workflows.get("workflows", [])):
+        for field, un in _resolve_fields(("workflows", i), wf, ("app_path", "workflow_path")):
+            unresolved_hits.append({"kind": "workflow", "what": field, "unresolved": un, "file": wf.get("source_file")})
+        for j, act in enumerate(wf.get("actions", [])):
+            for field, un in _resolve_fields(("workflows", i, "actions", j), act, ("main", "script", "class", "args")):
+                unresolved_hits.append({"kind": "action", "what": field, "unresolved": un, "file": wf.get("source_file")})
+
+    for i, coord in enumerate(raw_workflows.get("coordinators", [])):
+        fields = ("frequency", "start", "end", "timezone", "workflow_app_path")
+        for field, un in _resolve_fields(("coordinators", i), coord, fields):
+            unresolved_hits.append({"kind": "coordinator", "what": field, "unresolved": un, "file": coord.get("source_file")})
 
     # resolve lineage strings
-    resolved_lineage: List[Dict[str, Any]] = []
-    for rec in raw_lineage:
-        r = rec.copy()
-        for field in ("source_name", "target_name"):
-            if isinstance(r.get(field), str):
-                r[field], un = resolve_string(r[field], lookup)
-                if un:
-                    unresolved_hits.append({"kind": "lineage", "what": field, "unresolved": un, "file": r.get("evidence_file")})
-        resolved_lineage.append(r)
+    for i, rec in enumerate(raw_lineage):
+        for field, un in _resolve_fields(("lineage", i), rec, ("source_name", "target_name")):
+            unresolved_hits.append({"kind": "lineage", "what": field, "unresolved": un, "file": rec.get("evidence_file")})
+
+    resolved_findings = dict(raw_findings)
+    for k in finding_keys:
+        resolved_findings[k] = overlay.records(raw_findings[k], (k,))
+    resolved_workflows = dict(raw_workflows)
+    for k in ("workflows", "coordinators"):
+        if isinstance(raw_workflows.get(k), list):
+            resolved_workflows[k] = overlay.records(raw_workflows[k], (k,))
+    resolved_lineage = overlay.records(raw_lineage, ("lineage",))
 
     # 3) compute resolved/partial/unresolved variable sets
     resolved_vars: List[Dict[str, Any]] = []
@@ -256,15 +502,17 @@ def resolve_repository(
     for k in lookup.keys():
         seen.add(k)
 
-    # Resolve variables themselves (including nested definitions)
+    # Variables themselves were resolved (including nested definitions) by
+    # the resolver; variables on a definition cycle have no value
     final_lookup: Dict[str, str] = {}
     unresolved_vars: Dict[str, List[str]] = {}
     for k in sorted(seen):
-        if k in lookup:
-            v, un = resolve_string(lookup[k], lookup)
-            final_lookup[k] = v
-            if un:
-                unresolved_vars[k] = un
+        if k in resolver.values:
+            final_lookup[k] = resolver.values[k]
+            if k in resolver.unresolved:
+                unresolved_vars[k] = resolver.unresolved[k]
+        elif k in resolver.cycles:
+            unresolved_vars[k] = ["<cyclic_definition>"]
         else:
             unresolved_vars[k] = ["<no_definition_found>"]
 
@@ -298,16 +546,17 @@ def resolve_repository(
     for k, why in unresolved_vars.items():
         if k in final_lookup:
             continue  # partial already tracked
-        unresolved_list.append(
-            {
-                "name": k,
-                "reason": why,
-                "definitions_found": [
-                    {"value": d.value, "defined_in": d.defined_in, "kind": d.kind}
-                    for d in all_defs.get(k, [])
-                ],
-            }
-        )
+        entry: Dict[str, Any] = {
+            "name": k,
+            "reason": why,
+            "definitions_found": [
+                {"value": d.value, "defined_in": d.defined_in, "kind": d.kind}
+                for d in all_defs.get(k, [])
+            ],
+        }
+        if k in resolver.cycles:
+            entry["cycle"] = resolver.cycles[k]
+        unresolved_list.append(entry)
 
     return {
         "resolved_variables": resolved_vars,
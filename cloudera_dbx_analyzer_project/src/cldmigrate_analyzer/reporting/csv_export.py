@@ -14,11 +14,20 @@ Generates multiple CSV files:
 """
 
 import csv
-import json
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime
 
+from ..core.pipeline.artifacts import load_artifact
+from .gap_index import UnresolvedVariableMatcher, files_by_variable
+
+
+def _is_list(value: Any) -> bool:
+    """A list, or a list-like artifact view (NdjsonList, TableReferenceView)"""
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
 
 def format_size(bytes_val: int) -> str:
     """Format bytes into human-readable size"""
@@ -165,8 +174,11 @@ def export_sql_complexity(sql_complexity: Dict, output_path: Path) -> int:
     """
     Export SQL complexity analysis to CSV.
     
+    One row per SQL statement.
+    
     Columns:
     - File
+    - Line
     - Complexity Level
     - Total Score
     - Query Lines
@@ -196,6 +208,7 @@ def export_sql_complexity(sql_complexity: Dict, output_path: Path) -> int:
         # Header
         writer.writerow([
             'File',
+            'Line',
             'Complexity Level',
             'Total Score',
             'Query Lines',
@@ -229,6 +242,7 @@ def export_sql_complexity(sql_complexity: Dict, output_path: Path) -> int:
             
             writer.writerow([
                 query.get('file_path', ''),
+                query.get('line_number', ''),
                 query.get('complexity_level', ''),
                 query.get('total_complexity_score', ''),
                 query.get('query_lines', ''),
@@ -421,6 +435,7 @@ def export_master_summary(
         # SQL Complexity Statistics
         if sql_complexity:
             writer.writerow(['SQL Queries Analyzed', sql_complexity.get('queries_analyzed', 0)])
+            writer.writerow(['SQL Files Analyzed', sql_complexity.get('files_analyzed', 0)])
             writer.writerow(['Average SQL Complexity', f"{sql_complexity.get('average_complexity_score', 0):.1f}"])
             
             dist = sql_complexity.get('complexity_distribution', {})
@@ -491,12 +506,12 @@ def export_gaps(
         
         # Debug: Log what we're working with (for troubleshooting)
         # Note: This won't show in production but helps identify issues
-        files_count = len(files_index) if isinstance(files_index, list) else 0
-        unresolved_count = len(unresolved_vars) if isinstance(unresolved_vars, list) else 0
-        partial_count = len(partial_vars) if isinstance(partial_vars, list) else 0
+        files_count = len(files_index) if _is_list(files_index) else 0
+        unresolved_count = len(unresolved_vars) if _is_list(unresolved_vars) else 0
+        partial_count = len(partial_vars) if _is_list(partial_vars) else 0
         
         # Ensure files_index is a list
-        if not isinstance(files_index, list):
+        if not _is_list(files_index):
             files_index = []
         
         # Create a file index for quick lookup (normalize paths)
@@ -517,42 +532,69 @@ def export_gaps(
                 return ''
             return p.replace('\\', '/')
         
+        # definitions_found holds absolute paths (defined_in) while files are
+        # keyed repo-relative: use the longest suffix that is an indexed file
+        def repo_relative(p):
+            p = normalize_path(p)
+            if p in file_lookup:
+                return p
+            parts = p.split('/')
+            for i in range(1, len(parts)):
+                candidate = '/'.join(parts[i:])
+                if candidate in file_lookup:
+                    return candidate
+            return p
+        
         # Ensure unresolved_vars and partial_vars are lists
-        if not isinstance(unresolved_vars, list):
+        if not _is_list(unresolved_vars):
             unresolved_vars = []
-        if not isinstance(partial_vars, list):
+        if not _is_list(partial_vars):
             partial_vars = []
         
         # 1. Unresolved variables per file
         file_unresolved = {}
+        # Names already listed per file, to skip duplicates
+        unresolved_names = {}
+        
+        def add_gap(gaps, seen, path, entry):
+            names = seen.setdefault(path, set())
+            if entry['name'] not in names:
+                names.add(entry['name'])
+                gaps.setdefault(path, []).append(entry)
+        
+        # Indexed lookups (gap_index.py): unresolved_vars is scanned once per
+        # distinct variable name instead of once per (file, variable)
+        unresolved_vars = list(unresolved_vars)
+        by_file = None
+        if variables_data and 'by_file' in variables_data:
+            by_file = variables_data['by_file']
         
         # First, try to get file associations from variables.json if available
-        if variables_data and isinstance(variables_data, dict) and 'by_file' in variables_data:
-            for file_path, vars_list in variables_data['by_file'].items():
+        if by_file is not None and isinstance(variables_data, dict):
+            # Variables on a definition cycle only match by exact name
+            matcher = UnresolvedVariableMatcher(
+                [var.get('name', '') for var in unresolved_vars],
+                (var_name for vars_list in by_file.values() if vars_list for var_name in vars_list),
+                exact_only=[i for i, var in enumerate(unresolved_vars) if var.get('cycle')],
+            )
+            for file_path, vars_list in by_file.items():
                 norm_file_path = normalize_path(file_path)
                 if not vars_list:
                     continue
                 for var_name in vars_list:
                     if not var_name:
                         continue
-                    # Check if this variable is unresolved
-                    for var in unresolved_vars:
-                        var_name_from_unresolved = var.get('name', '')
-                        # Handle different variable name formats
-                        if (var_name == var_name_from_unresolved or 
-                            var_name in var_name_from_unresolved or 
-                            var_name_from_unresolved in var_name):
-                            if norm_file_path not in file_unresolved:
-                                file_unresolved[norm_file_path] = []
-                            # Avoid duplicates
-                            if not any(v['name'] == var_name for v in file_unresolved[norm_file_path]):
-                                file_unresolved[norm_file_path].append({
-                                    'name': var_name,
-                                    'reason': var.get('reason', 'Cannot be resolved')
-                                })
-                            break
+                    # First unresolved variable with the same name, or one
+                    # containing / contained in it (different name formats)
+                    match = matcher.first_match(var_name)
+                    if match is not None:
+                        add_gap(file_unresolved, unresolved_names, norm_file_path, {
+                            'name': var_name,
+                            'reason': unresolved_vars[match].get('reason', 'Cannot be resolved')
+                        })
         
         # Also check definitions_found to get source files where variables are defined
+        files_using = files_by_variable(by_file) if by_file is not None else {}
         for var in unresolved_vars:
             var_name = var.get('name', '')
             if not var_name:
@@ -563,29 +605,18 @@ def export_gaps(
                 for defn in definitions:
                     source_file = defn.get('defined_in', '')
                     if source_file:
-                        norm_source_file = normalize_path(source_file)
-                        if norm_source_file not in file_unresolved:
-                            file_unresolved[norm_source_file] = []
-                        # Avoid duplicates
-                        if not any(v['name'] == var_name for v in file_unresolved[norm_source_file]):
-                            file_unresolved[norm_source_file].append({
-                                'name': var_name,
-                                'reason': var.get('reason', 'Cannot be resolved')
-                            })
+                        add_gap(file_unresolved, unresolved_names, repo_relative(source_file), {
+                            'name': var_name,
+                            'reason': var.get('reason', 'Cannot be resolved')
+                        })
             else:
                 # Variable has no definitions - completely missing
                 # Try to find usage from variables.json
-                if variables_data and 'by_file' in variables_data:
-                    for file_path, vars_list in variables_data['by_file'].items():
-                        if vars_list and var_name in vars_list:
-                            norm_file_path = normalize_path(file_path)
-                            if norm_file_path not in file_unresolved:
-                                file_unresolved[norm_file_path] = []
-                            if not any(v['name'] == var_name for v in file_unresolved[norm_file_path]):
-                                file_unresolved[norm_file_path].append({
-                                    'name': var_name,
-                                    'reason': 'Variable used but never defined'
-                                })
+                for file_path in files_using.get(var_name, ()):
+                    add_gap(file_unresolved, unresolved_names, normalize_path(file_path), {
+                        'name': var_name,
+                        'reason': 'Variable used but never defined'
+                    })
         
         # Fallback: if we have unresolved vars but no file associations, create entries anyway
         if not file_unresolved and unresolved_vars:
@@ -629,6 +660,7 @@ def export_gaps(
         
         # 2. Partially resolved variables
         file_partial = {}
+        partial_names = {}
         for var in partial_vars:
             var_name = var.get('name', '')
             if not var_name:
@@ -638,20 +670,14 @@ def export_gaps(
                 for defn in definitions:
                     source_file = defn.get('defined_in', '')
                     if source_file:
-                        norm_source_file = normalize_path(source_file)
-                        if norm_source_file not in file_partial:
-                            file_partial[norm_source_file] = []
-                        # Avoid duplicates
-                        if not any(v['name'] == var_name for v in file_partial[norm_source_file]):
-                            file_partial[norm_source_file].append({
-                                'name': var_name,
-                                'unresolved_parts': var.get('unresolved_parts', [])
-                            })
+                        add_gap(file_partial, partial_names, normalize_path(source_file), {
+                            'name': var_name,
+                            'unresolved_parts': var.get('unresolved_parts', [])
+                        })
             else:
                 # No definitions but marked as partial - add to unknown
-                if 'unknown' not in file_partial:
-                    file_partial['unknown'] = []
-                file_partial['unknown'].append({
+                partial_names.setdefault('unknown', set()).add(var_name)
+                file_partial.setdefault('unknown', []).append({
                     'name': var_name,
                     'unresolved_parts': var.get('unresolved_parts', [])
                 })
@@ -701,7 +727,7 @@ def export_gaps(
         # 4. High complexity SQL queries
         if sql_complexity and isinstance(sql_complexity, dict):
             detailed_results = sql_complexity.get('detailed_results', [])
-            if not isinstance(detailed_results, list):
+            if not _is_list(detailed_results):
                 detailed_results = []
             for query in detailed_results:
                 if not isinstance(query, dict):
@@ -722,7 +748,7 @@ def export_gaps(
                         'High SQL Complexity',
                         f"SQL query has {complexity_level} complexity (score: {total_score})",
                         f"Risk flags: {risk_flags_str}",
-                        str(query.get('line_start', '')) if query.get('line_start') else '',
+                        str(query.get('line_number', '')) if query.get('line_number') else '',
                         'High' if complexity_level.lower() == 'very_complex' else 'Medium'
                     ])
                     count += 1
@@ -730,7 +756,7 @@ def export_gaps(
         # 5. High complexity files (from complexity.json)
         if complexity and isinstance(complexity, dict):
             items = complexity.get('items', [])
-            if not isinstance(items, list):
+            if not _is_list(items):
                 items = []
             for item in items:
                 if not isinstance(item, dict):
@@ -895,19 +921,14 @@ def export_gaps(
         
         # 10. All unresolved variables (even without file context)
         # This ensures we capture all unresolved vars shown in HTML
+        added_names = {v['name'] for vars_list in file_unresolved.values() for v in vars_list}
         for var in unresolved_vars:
             var_name = var.get('name', '')
             if not var_name:
                 continue
             
             # Check if we already added this variable
-            already_added = False
-            for file_path, vars_list in file_unresolved.items():
-                if any(v['name'] == var_name for v in vars_list):
-                    already_added = True
-                    break
-            
-            if not already_added:
+            if var_name not in added_names:
                 # Try to find file from definitions
                 definitions = var.get('definitions_found', [])
                 if definitions:
@@ -923,22 +944,20 @@ def export_gaps(
                         'High'
                     ])
                     count += 1
-                elif variables_data and 'by_file' in variables_data:
-                    # Find file from variables.json
-                    for file_path, vars_list in variables_data['by_file'].items():
-                        if var_name in vars_list:
-                            file_name = Path(file_path).name if file_path else 'unknown'
-                            writer.writerow([
-                                file_name,
-                                file_path or 'unknown',
-                                'Unresolved Variable',
-                                f"Variable '{var_name}' cannot be resolved",
-                                'Variable used but never defined',
-                                '',
-                                'High'
-                            ])
-                            count += 1
-                            break
+                elif files_using.get(var_name):
+                    # Find file from variables.json (first file using it)
+                    file_path = files_using[var_name][0]
+                    file_name = Path(file_path).name if file_path else 'unknown'
+                    writer.writerow([
+                        file_name,
+                        file_path or 'unknown',
+                        'Unresolved Variable',
+                        f"Variable '{var_name}' cannot be resolved",
+                        'Variable used but never defined',
+                        '',
+                        'High'
+                    ])
+                    count += 1
         
         # If no gaps found, try to add at least some basic information
         if count == 0:
@@ -971,13 +990,50 @@ def export_gaps(
     return count
 
 
-def export_all_to_csv(artifacts_dir: Path, output_dir: Path) -> Dict[str, int]:
+# Artifacts the CSV export reads (by artifact name) and their empty defaults
+CSV_ARTIFACTS = (
+    ("files_index", list),
+    ("database_context", dict),
+    ("sql_complexity_analysis", dict),
+    ("findings", dict),
+    ("repo_summary", dict),
+    ("complexity", dict),
+    ("unresolved", list),
+    ("partially_resolved", list),
+    ("variables", lambda: None),
+)
+
+
+def _export_gaps_or_warn(*args, **kwargs) -> int:
+    try:
+        return export_gaps(*args, **kwargs)
+    except Exception as e:
+        # Log error but don't fail the entire export
+        import sys
+        import traceback
+        print(f"Warning: Error exporting gaps CSV: {e}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 0
+
+
+def export_results_to_csv(
+    analysis: Dict[str, Any],
+    output_dir: Path,
+    max_workers: int = 4
+) -> Dict[str, int]:
     """
-    Export all analysis results to CSV files.
+    Export in-memory analysis results to CSV files.
+    
+    The CSV files are independent, so they are written concurrently on a
+    thread pool of ``max_workers`` (1 = one after the other). The results
+    are only read.
     
     Args:
-        artifacts_dir: Path to artifacts directory
+        analysis: Result objects by artifact name (see CSV_ARTIFACTS), e.g.
+            {"files_index": files_index, "findings": findings, ...}; list
+            values may be lazy sequences. Missing names are treated as empty
         output_dir: Path where CSV files will be saved
+        max_workers: Threads writing CSV files
         
     Returns:
         Dictionary with counts of exported items per file
@@ -986,117 +1042,69 @@ def export_all_to_csv(artifacts_dir: Path, output_dir: Path) -> Dict[str, int]:
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    results = {}
+    data = {}
+    for name, default in CSV_ARTIFACTS:
+        value = analysis.get(name)
+        data[name] = default() if value is None else value
+    files_index = data["files_index"]
+    database_context = data["database_context"]
+    sql_complexity = data["sql_complexity_analysis"]
+    findings = data["findings"]
+    complexity = data["complexity"]
     
-    # Load artifacts
-    try:
-        with open(artifacts_dir / "files_index.json") as f:
-            files_index = json.load(f)
-    except:
-        files_index = []
-    
-    try:
-        with open(artifacts_dir / "database_context.json") as f:
-            database_context = json.load(f)
-    except:
-        database_context = {}
-    
-    try:
-        with open(artifacts_dir / "sql_complexity_analysis.json") as f:
-            sql_complexity = json.load(f)
-    except:
-        sql_complexity = {}
-    
-    try:
-        with open(artifacts_dir / "findings.json") as f:
-            findings = json.load(f)
-    except:
-        findings = {}
-    
-    try:
-        with open(artifacts_dir / "repo_summary.json") as f:
-            repo_summary = json.load(f)
-    except:
-        repo_summary = {}
-    
-    try:
-        with open(artifacts_dir / "complexity.json") as f:
-            complexity = json.load(f)
-    except:
-        complexity = {}
-    
-    try:
-        with open(artifacts_dir / "unresolved.json") as f:
-            unresolved_vars = json.load(f)
-    except:
-        unresolved_vars = []
-    
-    try:
-        with open(artifacts_dir / "partially_resolved.json") as f:
-            partial_vars = json.load(f)
-    except:
-        partial_vars = []
-    
-    try:
-        with open(artifacts_dir / "variables.json") as f:
-            variables_data = json.load(f)
-    except:
-        variables_data = None
-    
-    # Load additional data for gaps export
-    try:
-        with open(artifacts_dir / "findings.json") as f:
-            findings_data = json.load(f)
-    except:
-        findings_data = {}
-    
-    # Export each type
+    # (result key, export function, arguments), in results order
+    tasks = []
     if files_index:
-        count = export_files_inventory(files_index, output_dir / "1_files_inventory.csv")
-        results['files_inventory'] = count
-    
+        tasks.append(('files_inventory', export_files_inventory,
+                      (files_index, output_dir / "1_files_inventory.csv"), {}))
     if database_context:
-        count = export_database_tables(database_context, output_dir / "2_database_tables.csv")
-        results['database_tables'] = count
-        
-        count = export_variables(database_context, output_dir / "5_variables.csv")
-        results['variables'] = count
-    
+        tasks.append(('database_tables', export_database_tables,
+                      (database_context, output_dir / "2_database_tables.csv"), {}))
+        tasks.append(('variables', export_variables,
+                      (database_context, output_dir / "5_variables.csv"), {}))
     if sql_complexity:
-        count = export_sql_complexity(sql_complexity, output_dir / "3_sql_complexity.csv")
-        results['sql_complexity'] = count
-    
+        tasks.append(('sql_complexity', export_sql_complexity,
+                      (sql_complexity, output_dir / "3_sql_complexity.csv"), {}))
     if findings:
-        count = export_connections(findings, output_dir / "4_connections.csv")
-        results['connections'] = count
-    
+        tasks.append(('connections', export_connections,
+                      (findings, output_dir / "4_connections.csv"), {}))
     # Always export summary
-    count = export_master_summary(repo_summary, database_context, sql_complexity, complexity, output_dir / "0_master_summary.csv")
-    results['master_summary'] = count
-    
+    tasks.append(('master_summary', export_master_summary,
+                  (data["repo_summary"], database_context, sql_complexity, complexity,
+                   output_dir / "0_master_summary.csv"), {}))
     # Export gaps (file name + identified gaps)
-    try:
-        count = export_gaps(
-            files_index,
-            unresolved_vars,
-            partial_vars,
-            sql_complexity,
-            complexity,
-            variables_data=variables_data,
-            database_context=database_context,
-            findings=findings_data,
-            output_path=output_dir / "6_gaps.csv"
-        )
-        results['gaps'] = count
-    except Exception as e:
-        # Log error but don't fail the entire export
-        import sys
-        import traceback
-        print(f"Warning: Error exporting gaps CSV: {e}", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
-        results['gaps'] = 0
+    tasks.append(('gaps', _export_gaps_or_warn,
+                  (files_index, data["unresolved"], data["partially_resolved"], sql_complexity, complexity),
+                  dict(variables_data=data["variables"], database_context=database_context,
+                       findings=findings, output_path=output_dir / "6_gaps.csv")))
     
-    return results
+    if max_workers <= 1:
+        return {key: fn(*args, **kwargs) for key, fn, args, kwargs in tasks}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="csv_export") as executor:
+        futures = [(key, executor.submit(fn, *args, **kwargs)) for key, fn, args, kwargs in tasks]
+        return {key: future.result() for key, future in futures}
+
+
+def export_all_to_csv(artifacts_dir: Path, output_dir: Path, max_workers: int = 4) -> Dict[str, int]:
+    """
+    Export all analysis results to CSV files, reading them from the artifacts
+    of a run (for regenerating CSVs offline; analyze_repository passes its
+    in-memory results to export_results_to_csv instead).
+    
+    Args:
+        artifacts_dir: Path to artifacts directory
+        output_dir: Path where CSV files will be saved
+        max_workers: Threads writing CSV files
+        
+    Returns:
+        Dictionary with counts of exported items per file
+    """
+    # NDJSON artifacts are read lazily, see artifacts.py
+    analysis = {
+        name: load_artifact(artifacts_dir, name, default=default())
+        for name, default in CSV_ARTIFACTS
+    }
+    return export_results_to_csv(analysis, output_dir, max_workers=max_workers)
 
 
 def export_csv_from_run_dir(run_dir: Path) -> Path:
@@ -0,0 +1,149 @@
+"""
+Indexes behind the variable gaps of csv_export.export_gaps.
+
+export_gaps ties every variable a file uses (variables.json ``by_file``) to
+the first unresolved variable whose name equals it, contains it or is
+contained in it. Testing every pair is O(files x vars x unresolved).
+UnresolvedVariableMatcher answers the same question per distinct variable
+name with two Aho-Corasick passes:
+
+- unresolved names as patterns, scanned over each variable name, find the
+  unresolved names contained in it;
+- the variable names as patterns, scanned over each unresolved name (in
+  order), find the unresolved names containing them.
+
+An unresolved entry with an empty name is contained in every name, as with
+``in``. Entries listed in ``exact_only`` (variables on a definition cycle)
+only match their own name.
+
+Usage:
+    matcher = UnresolvedVariableMatcher(["env", "hiveconf:db"], ["db", "env_x"])
+    matcher.first_match("db")      # 1
+    matcher.first_match("env_x")   # 0
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher over a fixed list of non-empty patterns."""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]  # pattern ids ending at the node
+        for pid, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = self._goto[node][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pid)
+
+        n = len(self._goto)
+        self._fail = [0] * n
+        # nearest proper suffix node with output (-1: none), and the lowest
+        # pattern id ending at the node or any suffix of it (-1: none)
+        self._dict_link = [-1] * n
+        self._min = [min(out) if out else -1 for out in self._out]
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail = self._fail[child]
+                self._dict_link[child] = fail if self._out[fail] else self._dict_link[fail]
+                if self._min[fail] >= 0 and (self._min[child] < 0 or self._min[fail] < self._min[child]):
+                    self._min[child] = self._min[fail]
+                queue.append(child)
+
+    def _nodes(self, text: str) -> Iterator[int]:
+        goto, fail = self._goto, self._fail
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            yield node
+
+    def matches(self, text: str) -> Iterator[int]:
+        """Ids of the patterns occurring in ``text``, once per occurrence."""
+        out, dict_link = self._out, self._dict_link
+        for node in self._nodes(text):
+            while node >= 0:
+                yield from out[node]
+                node = dict_link[node]
+
+    def first(self, text: str) -> Optional[int]:
+        """Lowest id of a pattern occurring in ``text``, or None."""
+        best = -1
+        lowest = self._min
+        for node in self._nodes(text):
+            m = lowest[node]
+            if m >= 0 and (best < 0 or m < best):
+                best = m
+        return best if best >= 0 else None
+
+
+class UnresolvedVariableMatcher:
+    """
+    First unresolved variable related to a name: equal to it, containing it
+    or contained in it (see the module docstring).
+    """
+
+    def __init__(
+        self, unresolved_names: Sequence[str], names: Iterable[str], exact_only: Iterable[int] = ()
+    ):
+        self._first: Dict[str, Optional[int]] = {}
+        exact = set(exact_only)
+        self._exact: Dict[str, int] = {}
+        for i in sorted(exact):
+            if isinstance(unresolved_names[i], str):
+                self._exact.setdefault(unresolved_names[i], i)
+        empty = [i for i, u in enumerate(unresolved_names) if u == "" and i not in exact]
+        self._empty = empty[0] if empty else None
+        indexed = [
+            (i, u) for i, u in enumerate(unresolved_names) if isinstance(u, str) and u and i not in exact
+        ]
+
+        queries = list(dict.fromkeys(n for n in names if isinstance(n, str) and n))
+        contained = AhoCorasick([u for _, u in indexed])
+        for name in queries:
+            pid = contained.first(name)
+            self._first[name] = indexed[pid][0] if pid is not None else None
+
+        containing = AhoCorasick(queries)
+        for i, u in indexed:
+            for pid in containing.matches(u):
+                name = queries[pid]
+                if self._first[name] is None or i < self._first[name]:
+                    self._first[name] = i
+
+    def first_match(self, name: str) -> Optional[int]:
+        """Index in ``unresolved_names`` of the first related entry, or None."""
+        best = self._first.get(name)
+        for other in (self._empty, self._exact.get(name)):
+            if other is not None and (best is None or other < best):
+                best = other
+        return best
+
+
+def files_by_variable(by_file: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """Variable name -> files using it, in ``by_file`` order, each file once."""
+    index: Dict[str, List[str]] = {}
+    for file_path, vars_list in by_file.items():
+        if not vars_list:
+            continue
+        for var_name in dict.fromkeys(vars_list):
+            index.setdefault(var_name, []).append(file_path)
+    return index
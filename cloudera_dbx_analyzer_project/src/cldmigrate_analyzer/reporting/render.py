@@ -1,10 +1,141 @@
+"""
+HTML report rendering.
+
+Two report modes:
+
+- ``inline`` (default): one self-contained report.html with every table.
+- ``paged``: report.html is a shell with the summary widgets; the
+  unbounded tables (file inventory, connection findings, source/target
+  table references) are written to ``report_data/`` next to it in chunks
+  of CHUNK_ROWS rows and paged in the browser, loading a chunk only when a
+  page needs it. Render time and report.html size no longer grow with the
+  repository.
+
+A chunk is a script calling ``cldmigrateReportChunk(table, index, data)``,
+with ``data`` the base64 of the gzipped JSON rows (lists of cell strings),
+so the report also works opened from disk, where browsers block fetch().
+
+Usage:
+    render_html_report(run_dir / "report.html", ..., report_mode="paged")
+"""
+
 from __future__ import annotations
 
+import base64
+import gzip
+import json
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
+REPORT_MODES = ("inline", "paged")
+REPORT_DATA_DIR = "report_data"
+CHUNK_ROWS = 2000
+PAGE_ROWS = 100
+
+# Paged table columns: (header, cell kind). The kind picks the markup in
+# the report script: code, small, muted, text, badge-<style>, confidence.
+_FINDING_COLUMNS = [("Value", "code"), ("File", "small"), ("Line", "text"), ("Confidence", "badge-info")]
+_TABLE_REF_COLUMNS = [
+    ("Database", "code"), ("Table", "code"), ("Operation", "badge-info"),
+    ("File", "small"), ("Line", "text"), ("Confidence", "confidence"),
+]
+_FILE_COLUMNS = [
+    ("Path", "small"), ("Type", "badge-info"), ("Lines", "text"),
+    ("Words", "text"), ("Size", "small"), ("Status", "muted"),
+]
+
+
+def _cell(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _format_size(size_bytes: Any) -> str:
+    if not size_bytes:
+        return "-"
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    if size_bytes < 1048576:
+        return "%.1f KB" % (size_bytes / 1024)
+    return "%.2f MB" % (size_bytes / 1048576)
+
+
+def _file_row(f: Dict[str, Any]) -> List[str]:
+    return [
+        _cell(f.get("path")),
+        _cell(f.get("detected_type")),
+        _cell(f.get("lines_count", "-")),
+        _cell(f.get("words_count", "-")),
+        _format_size(f.get("size_bytes")),
+        _cell(f.get("parse_status", "-")),
+    ]
+
+
+def _finding_row(r: Dict[str, Any]) -> List[str]:
+    return [_cell(r.get("value")), _cell(r.get("file")), _cell(r.get("line")), _cell(r.get("confidence"))]
+
+
+def _table_ref_row(t: Dict[str, Any]) -> List[str]:
+    return [
+        t.get("database") or "(default)",
+        _cell(t.get("table")),
+        _cell(t.get("operation")),
+        _cell(t.get("file")),
+        _cell(t.get("line_number")),
+        _cell(t.get("confidence")),
+    ]
+
+
+def _write_chunks(
+    data_dir: Path,
+    name: str,
+    records: Iterable[Any],
+    row: Callable[[Any], List[str]],
+    columns: List[Tuple[str, str]],
+) -> Dict[str, Any]:
+    """Write one paged table as chunk scripts; returns its descriptor for the report."""
+    rows = (row(r) for r in records if isinstance(r, dict))
+    chunks: List[str] = []
+    count = 0
+    while True:
+        batch = list(islice(rows, CHUNK_ROWS))
+        if not batch:
+            break
+        raw = json.dumps(batch, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = base64.b64encode(gzip.compress(raw, compresslevel=6)).decode("ascii")
+        chunk_name = f"{name}-{len(chunks):05d}.js"
+        (data_dir / chunk_name).write_text(
+            f"cldmigrateReportChunk({json.dumps(name)},{len(chunks)},\"{payload}\");\n", encoding="utf-8"
+        )
+        chunks.append(f"{REPORT_DATA_DIR}/{chunk_name}")
+        count += len(batch)
+    return {"columns": columns, "count": count, "chunks": chunks}
+
+
+def _write_paged_tables(
+    report_dir: Path,
+    files_index: List[Dict[str, Any]],
+    findings: Dict[str, Any],
+    database_context: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Write the chunks of every paged table under ``report_dir/report_data``."""
+    data_dir = report_dir / REPORT_DATA_DIR
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for stale in data_dir.glob("*-[0-9][0-9][0-9][0-9][0-9].js"):
+        stale.unlink()
+
+    tables: Dict[str, Any] = {"files": _write_chunks(data_dir, "files", files_index or [], _file_row, _FILE_COLUMNS)}
+    for key in ("jdbc_strings", "urls", "kafka_bootstrap_hints", "storage_paths"):
+        tables[key] = _write_chunks(data_dir, key, findings.get(key) or [], _finding_row, _FINDING_COLUMNS)
+    for key, operation_badge in (("source_tables", "badge-info"), ("target_tables", "badge-primary")):
+        columns = [(h, operation_badge if h == "Operation" else kind) for h, kind in _TABLE_REF_COLUMNS]
+        tables[key] = _write_chunks(
+            data_dir, key, (database_context or {}).get(key) or [], _table_ref_row, columns
+        )
+    return {"page_rows": PAGE_ROWS, "chunk_rows": CHUNK_ROWS, "tables": tables}
+
 
 def render_html_report(
     out_path: Path,
@@ -20,6 +151,7 @@ def render_html_report(
     database_context: Dict[str, Any] = None,
     sql_complexity_summary: Dict[str, Any] = None,  # NEW: SQL complexity parameter
     csv_dir: Path = None,  # NEW: CSV directory path for download links
+    report_mode: str = "inline",
 ) -> None:
     """
     Render comprehensive HTML report with all analysis results.
@@ -37,7 +169,10 @@ def render_html_report(
         unresolved_vars: Unresolved variables
         database_context: Database/schema inventory (optional)
         sql_complexity_summary: SQL complexity analysis (optional)
+        report_mode: "inline" or "paged" (see the module docstring)
     """
+    if report_mode not in REPORT_MODES:
+        raise ValueError(f"Unknown report mode: {report_mode!r} (expected one of {', '.join(REPORT_MODES)})")
     templates_dir = Path(__file__).parent / "templates"
     env = Environment(
         loader=FileSystemLoader(str(templates_dir)),
@@ -62,6 +197,10 @@ def render_html_report(
             # If relative path calculation fails, use absolute path
             csv_relative_path = str(csv_dir)
     
+    paged = None
+    if report_mode == "paged":
+        paged = _write_paged_tables(out_path.parent, files_index, findings, database_context)
+
     html = tpl.render(
         repo=repo_summary,
         files=files_index,
@@ -77,5 +216,6 @@ def render_html_report(
         database_context=database_context or {},
         sql_complexity_summary=sql_complexity_summary or {},  # NEW: Pass SQL complexity
         csv_dir_path=csv_relative_path,  # NEW: Pass CSV directory path
+        paged=paged,
     )
     out_path.write_text(html, encoding="utf-8")
@@ -0,0 +1,41 @@
+import os
+
+from cldmigrate_analyzer.core.discovery.content_store import ContentStore
+from cldmigrate_analyzer.core.pipeline.analysis_cache import AnalysisCache
+from cldmigrate_analyzer.core.pipeline.engine import FileAnalyzer, run_analyzers
+
+
+class _TextAnalyzer(FileAnalyzer):
+    name = "text"
+
+    def __init__(self, edit_to=None):
+        self.edit_to = edit_to
+
+    def visit(self, doc):
+        text = doc.text
+        if self.edit_to is not None:
+            # The file changes after it was read, before the run ends
+            doc.path.write_text(self.edit_to, encoding="utf-8")
+            st = os.stat(doc.path)
+            os.utime(doc.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        return {"text": text}
+
+    def reduce(self, visited):
+        return {f["path"]: r["text"] for f, r in visited}
+
+
+def _run(repo, db, analyzer):
+    files = [{"path": "a.sql", "detected_type": "sql", "size_bytes": os.path.getsize(repo / "a.sql")}]
+    with ContentStore(repo) as store, AnalysisCache(db, "fp") as cache:
+        return run_analyzers(store, files, [analyzer], cache=cache)["text"]
+
+
+def test_file_edited_during_the_run_is_analyzed_again(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.sql").write_text("SELECT 1", encoding="utf-8")
+    db = tmp_path / "cache.sqlite"
+
+    assert _run(repo, db, _TextAnalyzer(edit_to="SELECT 2")) == {"a.sql": "SELECT 1"}
+    assert _run(repo, db, _TextAnalyzer()) == {"a.sql": "SELECT 2"}
+    assert _run(repo, db, _TextAnalyzer()) == {"a.sql": "SELECT 2"}
@@ -0,0 +1,15 @@
+import os
+
+from cldmigrate_analyzer.core.discovery.content_store import ContentStore
+
+
+def test_relative_root_reads_paths_built_from_root(tmp_path, monkeypatch):
+    (tmp_path / "repo" / "dev").mkdir(parents=True)
+    (tmp_path / "repo" / "dev" / "workflow.xml").write_text("<workflow-app/>", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    with ContentStore("repo") as store:
+        assert store.root.is_absolute()
+        assert store.key(store.path("dev/workflow.xml")) == "dev/workflow.xml"
+        assert store.read_text(store.root / "dev" / "workflow.xml") == "<workflow-app/>"
+        assert store.read_text(os.path.join("dev", "workflow.xml")) == "<workflow-app/>"
@@ -0,0 +1,42 @@
+import csv
+
+from cldmigrate_analyzer.reporting.csv_export import export_gaps
+
+
+def test_cyclic_variable_only_matches_its_own_name(tmp_path):
+    unresolved = [
+        {"name": "a", "reason": ["<cyclic_definition>"], "definitions_found": [], "cycle": ["a", "b"]},
+        {"name": "b", "reason": ["<cyclic_definition>"], "definitions_found": [], "cycle": ["a", "b"]},
+    ]
+    variables = {"by_file": {"wf/job.properties": ["nameNode", "appPath", "a"], "etl/load.hql": ["targetDb"]}}
+    out = tmp_path / "gaps.csv"
+
+    export_gaps([], unresolved, [], {}, {}, variables, output_path=out)
+
+    with out.open(encoding="utf-8") as f:
+        rows = [r for r in csv.DictReader(f) if r["Gap Type"] == "Unresolved Variable"]
+    assert [(r["File Path"], r["Gap Description"]) for r in rows] == [
+        ("wf/job.properties", "Variable 'a' cannot be resolved"),
+    ]
+
+
+def test_cyclic_variable_definitions_use_repo_relative_paths(tmp_path):
+    defined_in = str(tmp_path / "repo" / "dev" / "wf" / "job.properties")
+    unresolved = [
+        {"name": "a", "reason": ["<cyclic_definition>"], "cycle": ["a", "b"],
+         "definitions_found": [{"value": "${b}", "defined_in": defined_in}]},
+        {"name": "b", "reason": ["<cyclic_definition>"], "cycle": ["a", "b"],
+         "definitions_found": [{"value": "${a}", "defined_in": defined_in}]},
+    ]
+    files_index = [{"path": "dev/wf/job.properties"}, {"path": "wf/job.properties"}]
+    variables = {"by_file": {"dev/wf/job.properties": ["a", "b"]}}
+    out = tmp_path / "gaps.csv"
+
+    export_gaps(files_index, unresolved, [], {}, {}, variables, output_path=out)
+
+    with out.open(encoding="utf-8") as f:
+        rows = [r for r in csv.DictReader(f) if r["Gap Type"] == "Unresolved Variable"]
+    assert [(r["File Path"], r["Gap Description"]) for r in rows] == [
+        ("dev/wf/job.properties", "Variable 'a' cannot be resolved"),
+        ("dev/wf/job.properties", "Variable 'b' cannot be resolved"),
+    ]
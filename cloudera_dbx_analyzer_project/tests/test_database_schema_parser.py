@@ -0,0 +1,37 @@
+import json
+
+from cldmigrate_analyzer.core.extraction.database_schema_parser import DatabaseSchemaParser
+
+
+def _tables(ctx):
+    return [t.full_name for t in ctx.source_tables + ctx.target_tables]
+
+
+def test_notebook_cells_yield_table_references():
+    notebook = json.dumps({
+        "cells": [
+            {"cell_type": "code", "source": ["df = spark.sql(\"SELECT * FROM sales.orders o\"\n",
+                                             "               \" JOIN ref.cust c ON o.id = c.id\")\n"]},
+            {"cell_type": "markdown", "source": ["```sql\n", "INSERT INTO silver.daily SELECT 1\n", "```\n"]},
+        ]
+    }, indent=1)
+
+    ctx = DatabaseSchemaParser.extract_databases_and_schemas(notebook, sql_text=False)
+
+    assert _tables(ctx) == ["sales.orders", "ref.cust", "silver.daily"]
+    assert ctx.databases == ["ref", "sales", "silver"]
+
+
+def test_sql_string_literals_are_not_references():
+    sql = "SELECT 'from fake.t' AS s FROM real.t;"
+
+    ctx = DatabaseSchemaParser.extract_databases_and_schemas(sql)
+
+    assert _tables(ctx) == ["real.t"]
+
+
+def test_quoted_parts_are_cleaned_in_full_name():
+    ctx = DatabaseSchemaParser.extract_databases_and_schemas("INSERT INTO `mart`.`t3` SELECT 1;")
+
+    ref = ctx.target_tables[0]
+    assert (ref.full_name, ref.database, ref.table) == ("mart.t3", "mart", "t3")
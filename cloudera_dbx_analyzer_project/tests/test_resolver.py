@@ -0,0 +1,18 @@
+import io
+
+from cldmigrate_analyzer.core.resolution.resolver import parse_maven_properties, stream_xml_definitions
+
+POM = """<?xml version="1.0"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <properties>
+    <sparkVersion>3.3.0</sparkVersion>
+    <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
+  </properties>
+</project>
+"""
+
+
+def test_maven_property_names_keep_their_case():
+    _, props = stream_xml_definitions(io.BytesIO(POM.encode("utf-8")), maven=True)
+    assert props == {"sparkVersion": "3.3.0", "project.build.sourceEncoding": "UTF-8"}
+    assert props == parse_maven_properties(POM)
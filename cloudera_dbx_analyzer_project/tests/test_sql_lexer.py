@@ -0,0 +1,14 @@
+from cldmigrate_analyzer.core.extraction.sql_lexer import split_statements
+
+
+def test_set_statement_ends_at_semicolon_on_its_line():
+    sql = "SET a=1; SELECT * FROM t JOIN u ON 1=1;\nSET b=2\nSELECT 1;"
+
+    statements = split_statements(sql)
+
+    assert [(s.text, s.line) for s in statements] == [
+        ("SET a=1", 1),
+        ("SELECT * FROM t JOIN u ON 1=1", 1),
+        ("SET b=2", 2),
+        ("SELECT 1", 3),
+    ]